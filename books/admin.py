@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Book, User
+from .models import Author, Book, User
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
@@ -13,3 +13,9 @@ class BookAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'published_date', 'is_read')
     list_filter = ('is_read', 'published_date')
     search_fields = ('title', 'author', 'isbn')
+
+@admin.register(Author)
+class AuthorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'book_count', 'created_at')
+    search_fields = ('name', 'name_key')
+    readonly_fields = ('name_key', 'book_count', 'created_at')
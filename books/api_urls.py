@@ -9,13 +9,14 @@ the request and returns JSON responses.
 from rest_framework.routers import DefaultRouter
 from django.urls import path
 from .api_views import (
-    BookViewSet, UserViewSet, NotificationViewSet, AuthViewSet,
-    SystemStatisticsView
+    BookViewSet, AuthorViewSet, UserViewSet, NotificationViewSet, AuthViewSet,
+    SystemStatisticsView, SyncView, BatchView
 )
 
 # Create router for ViewSets
 router = DefaultRouter()
 router.register(r'books', BookViewSet, basename='book')
+router.register(r'authors', AuthorViewSet, basename='author')
 router.register(r'users', UserViewSet, basename='user')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'auth', AuthViewSet, basename='auth')
@@ -24,5 +25,9 @@ router.register(r'auth', AuthViewSet, basename='auth')
 urlpatterns = [
     # System statistics endpoint
     path('statistics/', SystemStatisticsView.as_view(), name='api-statistics'),
+    # Incremental sync (change feed) endpoint
+    path('sync/', SyncView.as_view(), name='api-sync'),
+    # Batch endpoint running several API calls in one round-trip
+    path('batch/', BatchView.as_view(), name='api-batch'),
     # Removed send-email endpoint
 ] + router.urls
@@ -8,31 +8,52 @@ for all models in the application.
 
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.contrib.auth.hashers import check_password, make_password
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, Resolver404
+from urllib.parse import urlsplit
+import io
+import json
+import logging
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Count
-from .models import Book, User, Notification
+from django.db.models import Q, Count, Max
+from django.utils import timezone
+from .models import Author, Book, LibraryEntry, User, Notification, ChangeLog
+from .authors import author_name_key
+from .conditional import ConditionalListMixin
+from .isbn import canonical_isbn
+from . import user_import
+from .passwords import BUSY_MESSAGE, RETRY_AFTER, PasswordHashingBusy, check_password, make_password
 from .serializer import (
-    BookSerializer, UserSerializer, NotificationSerializer,
+    BookSerializer, AuthorSerializer, UserSerializer, NotificationSerializer,
     BookStatisticsSerializer, UserStatisticsSerializer, SystemStatisticsSerializer,
-    LoginSerializer, PasswordChangeSerializer
+    LoginSerializer, PasswordChangeSerializer, BatchRequestSerializer
 )
 from django.core.mail import send_mail
 from django.conf import settings
 
-class BookViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger(__name__)
+
+class BookViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Book model with comprehensive CRUD operations.
     
     This ViewSet provides full CRUD functionality for books, including
     filtering, searching, and statistics. It handles user authentication
-    and proper book attribution.
+    and proper book attribution. Unchanged list requests are answered with
+    304 Not Modified.
+    
+    Regular users see their library: books they added plus books saved to it
+    through library entries. Read status is reported per user (reader_is_read):
+    the entry's status for saved books, the book's own status otherwise.
     """
     serializer_class = BookSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # view_count is serialized but incremented without touching updated_at
+    validator_counter_field = 'view_count'
     
     def get_queryset(self):
         """
@@ -42,16 +63,35 @@ class BookViewSet(viewsets.ModelViewSet):
             Filtered queryset of books
         """
         user = self.request.user
-        queryset = Book.objects.all()
         
-        # Admin can see all books, regular users see their own
+        # Admin can see all books, regular users see their library
         if user.username != 'admin':
-            queryset = queryset.filter(added_by=user)
+            queryset = Book.in_library_of(user)
+        else:
+            queryset = Book.objects.all()
+        queryset = Book.with_read_status(queryset.select_related('added_by'), user)
+        
+        # Multi-get: resolve many books by id and/or ISBN in one IN query
+        ids = self.get_multi_get_values('ids')
+        isbns = self.get_multi_get_values('isbns')
+        if ids is not None or isbns is not None:
+            try:
+                id_values = [int(value) for value in ids or []]
+            except ValueError:
+                raise ValidationError({'ids': 'ids must be a comma-separated list of integers.'})
+            isbn_keys = [canonical_isbn(value) for value in isbns or []]
+            queryset = queryset.filter(Q(id__in=id_values) | Q(isbn_key__in=isbn_keys))
         
         # Apply filters
+        author = self.request.query_params.get('author', None)
+        if author is not None:
+            if not author.isdigit():
+                raise ValidationError({'author': 'author must be an author id.'})
+            queryset = queryset.filter(author_ref_id=author)
+        
         is_read = self.request.query_params.get('is_read', None)
         if is_read is not None:
-            queryset = queryset.filter(is_read=is_read.lower() == 'true')
+            queryset = queryset.filter(Book.read_by_q(user, is_read.lower() == 'true'))
         
         # Search functionality
         search = self.request.query_params.get('search', None)
@@ -64,6 +104,57 @@ class BookViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('-created_at')
     
+    def get_validator_parts(self):
+        """
+        Add the user's library entries to the list validators.
+        
+        Saving a book to the library or toggling its entry does not touch the
+        book row, so the entries' own aggregate is folded into the ETag.
+        
+        Returns:
+            List of values folded into the ETag
+        """
+        entries = LibraryEntry.objects.filter(user=self.request.user.pk).aggregate(
+            latest=Max('updated_at'), total=Count('pk')
+        )
+        return super().get_validator_parts() + [entries['total'], entries['latest']]
+    
+    def get_multi_get_values(self, param):
+        """
+        Parse a comma-separated multi-get query parameter.
+        
+        Args:
+            param: Query parameter name ('ids' or 'isbns')
+            
+        Returns:
+            List of values, or None if the parameter is absent
+            
+        Raises:
+            ValidationError: If more values than BOOK_MULTI_GET_LIMIT are requested
+        """
+        raw = self.request.query_params.get(param)
+        if raw is None:
+            return None
+        values = [value.strip() for value in raw.split(',') if value.strip()]
+        limit = settings.BOOK_MULTI_GET_LIMIT
+        if len(values) > limit:
+            raise ValidationError({param: f'At most {limit} values can be requested at once.'})
+        return values
+    
+    def paginate_queryset(self, queryset):
+        """
+        Disable pagination for multi-get requests, which are already bounded.
+        
+        Args:
+            queryset: Queryset to paginate
+            
+        Returns:
+            Page of results, or None for multi-get requests
+        """
+        if 'ids' in self.request.query_params or 'isbns' in self.request.query_params:
+            return None
+        return super().paginate_queryset(queryset)
+    
     def perform_create(self, serializer):
         """
         Create a book with user attribution.
@@ -101,8 +192,18 @@ class BookViewSet(viewsets.ModelViewSet):
             Updated book data
         """
         book = self.get_object()
-        book.is_read = not book.is_read
-        book.save()
+        entry = None
+        if book.added_by_id != request.user.pk:
+            entry = LibraryEntry.objects.filter(user=request.user.pk, book=book).first()
+        if entry is not None:
+            # Saved books keep a per-user status on the library entry
+            entry.is_read = not entry.is_read
+            entry.save()
+            book.reader_is_read = entry.is_read
+        else:
+            book.is_read = not book.is_read
+            book.save()
+            book.reader_is_read = book.is_read
         serializer = self.get_serializer(book)
         return Response(serializer.data)
     
@@ -117,7 +218,7 @@ class BookViewSet(viewsets.ModelViewSet):
         Returns:
             List of read books
         """
-        queryset = self.get_queryset().filter(is_read=True)
+        queryset = self.get_queryset().filter(Book.read_by_q(request.user, True))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -132,13 +233,13 @@ class BookViewSet(viewsets.ModelViewSet):
         Returns:
             List of unread books
         """
-        queryset = self.get_queryset().filter(is_read=False)
+        queryset = self.get_queryset().filter(Book.read_by_q(request.user, False))
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'], url_path='all')
     def all(self, request):
-        queryset = Book.objects.all().order_by('-created_at')
+        queryset = Book.objects.select_related('added_by').order_by('-created_at')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -157,13 +258,13 @@ class BookViewSet(viewsets.ModelViewSet):
         queryset = self.get_queryset()
         
         total_books = queryset.count()
-        read_books = queryset.filter(is_read=True).count()
-        unread_books = queryset.filter(is_read=False).count()
+        read_books = queryset.filter(Book.read_by_q(user, True)).count()
+        unread_books = queryset.filter(Book.read_by_q(user, False)).count()
         
         read_percentage = (read_books / total_books * 100) if total_books > 0 else 0
         unread_percentage = (unread_books / total_books * 100) if total_books > 0 else 0
         
-        most_read_books = queryset.filter(is_read=True).order_by('-view_count')[:5]
+        most_read_books = queryset.filter(Book.read_by_q(user, True)).order_by('-view_count')[:5]
         most_viewed_books = queryset.order_by('-view_count')[:5]
         
         data = {
@@ -172,13 +273,87 @@ class BookViewSet(viewsets.ModelViewSet):
             'unread_books': unread_books,
             'read_percentage': round(read_percentage, 2),
             'unread_percentage': round(unread_percentage, 2),
-            'most_read_books': BookSerializer(most_read_books, many=True).data,
-            'most_viewed_books': BookSerializer(most_viewed_books, many=True).data,
+            'most_read_books': most_read_books,
+            'most_viewed_books': most_viewed_books,
         }
         
         serializer = BookStatisticsSerializer(data)
         return Response(serializer.data)
 
+class AuthorViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only ViewSet for browsing authors.
+    
+    Authors are listed alphabetically (or by number of books with
+    ?ordering=popular) and can be narrowed to a name prefix with ?q=. Book
+    counts are stored on the author rows, and prefix matches use the unique
+    name key index, so neither browsing nor autocomplete counts books.
+    """
+    serializer_class = AuthorSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    autocomplete_default_limit = 10
+    autocomplete_max_limit = 50
+    
+    def get_queryset(self):
+        """
+        Get authors, optionally filtered by name prefix.
+        
+        Returns:
+            Ordered queryset of authors
+        """
+        queryset = Author.objects.all()
+        prefix = author_name_key(self.request.query_params.get('q'))
+        if prefix:
+            queryset = queryset.filter(name_key__startswith=prefix)
+        if self.request.query_params.get('ordering') == 'popular':
+            return queryset.order_by('-book_count', 'name')
+        return queryset.order_by('name', 'pk')
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """
+        Suggest authors whose name starts with a prefix, most prolific first.
+        
+        Args:
+            request: HTTP request with 'q' prefix and optional 'limit'
+            
+        Returns:
+            Unpaginated list of matching authors
+        """
+        prefix = author_name_key(request.query_params.get('q'))
+        if not prefix:
+            return Response([])
+        try:
+            limit = min(int(request.query_params.get('limit', self.autocomplete_default_limit)), self.autocomplete_max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        authors = Author.objects.filter(name_key__startswith=prefix).order_by('-book_count', 'name')[:max(limit, 1)]
+        return Response(self.get_serializer(authors, many=True).data)
+    
+    @action(detail=True, methods=['get'])
+    def books(self, request, pk=None):
+        """
+        List the books of an author visible to the current user.
+        
+        Args:
+            request: HTTP request
+            pk: Primary key of the author
+            
+        Returns:
+            Paginated list of books
+        """
+        author = self.get_object()
+        queryset = author.books.select_related('added_by')
+        if request.user.username != 'admin':
+            queryset = queryset.filter(pk__in=Book.in_library_of(request.user).values('pk'))
+        queryset = Book.with_read_status(queryset, request.user).order_by('-created_at')
+        page = self.paginate_queryset(queryset)
+        serializer = BookSerializer(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+# Request bodies the user import reads as a file, by content type
+IMPORT_CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson'}
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     ViewSet for User model with admin-only access.
@@ -210,6 +385,12 @@ class UserViewSet(viewsets.ModelViewSet):
         """
         serializer.save()
     
+    def handle_exception(self, exc):
+        """Answer 503 when creating or updating a user finds the password hashing pool saturated."""
+        if isinstance(exc, PasswordHashingBusy):
+            return hashing_busy_response()
+        return super().handle_exception(exc)
+    
     @action(detail=False, methods=['get', 'put', 'patch'], url_path='me')
     def me(self, request):
         user = request.user
@@ -223,6 +404,50 @@ class UserViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Import users from a CSV or NDJSON file (admin only).
+
+        The file is sent as a multipart "file" upload, its format taken from
+        the extension or a "format" field, or as the request body with a
+        text/csv or application/x-ndjson content type. Passwords are hashed
+        one at a time in the bounded password hashing pool, beside the
+        logins; at most USER_IMPORT_API_MAX_ROWS users are taken per request.
+
+        Args:
+            request: HTTP request with the file
+
+        Returns:
+            Created and rejected counts with the rejected lines (201), an error (400),
+            or 503 when the hashing pool is saturated
+        """
+        if request.user.username != 'admin':
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        content_type = request.content_type.split(';')[0].strip()
+        try:
+            if content_type in IMPORT_CONTENT_TYPES:
+                fmt, data = IMPORT_CONTENT_TYPES[content_type], request.body
+            else:
+                upload = request.FILES.get('file')
+                if upload is None:
+                    return Response(
+                        {'error': 'Send a CSV or NDJSON file as "file" or as the request body.'},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                fmt = request.data.get('format') or user_import.detect_format(upload.name)
+                data = upload.read()
+            result = user_import.import_users(
+                user_import.open_text(data), fmt, max_rows=settings.USER_IMPORT_API_MAX_ROWS, shared_pool=True,
+            )
+        except user_import.UserImportError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except PasswordHashingBusy:
+            return hashing_busy_response()
+        return Response(
+            {key: result[key] for key in ('created', 'rejected', 'errors')}, status=status.HTTP_201_CREATED,
+        )
+
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """
@@ -246,21 +471,24 @@ class UserViewSet(viewsets.ModelViewSet):
             'total_users': total_users,
             'admin_users': admin_users,
             'regular_users': regular_users,
-            'users': UserSerializer(users, many=True).data,
+            'users': users,
         }
         
         serializer = UserStatisticsSerializer(data)
         return Response(serializer.data)
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """
     ViewSet for Notification model with user-specific access.
     
     This ViewSet provides notification functionality for users to view
     their own notifications and for admins to manage all notifications.
+    Unchanged list requests are answered with 304 Not Modified.
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # The recommended book's title and author are serialized with each notification
+    validator_related_fields = ('book_recommendation',)
     
     def get_queryset(self):
         """
@@ -270,9 +498,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
             Filtered queryset of notifications
         """
         user = self.request.user
+        # Serialized with the recipient's name and the recommended book's details
+        queryset = Notification.objects.select_related('user', 'book_recommendation')
         if user.username == 'admin':
-            return Notification.objects.all().order_by('-created_at')
-        return Notification.objects.filter(user=user).order_by('-created_at')
+            return queryset.order_by('-created_at')
+        return queryset.filter(user=user).order_by('-created_at')
     
     def perform_create(self, serializer):
         """
@@ -313,9 +543,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
             Success message
         """
         user = request.user
-        unread_notifications = Notification.objects.filter(user=user, is_read=False)
-        count = unread_notifications.count()
-        unread_notifications.update(is_read=True)
+        unread_ids = list(Notification.objects.filter(user=user, is_read=False).values_list('id', flat=True))
+        count = len(unread_ids)
+        Notification.objects.filter(id__in=unread_ids).update(is_read=True, updated_at=timezone.now())
+        ChangeLog.record_changes(('notification', pk, user.id, 'update') for pk in unread_ids)
         
         return Response({
             'message': f'{count} notification(s) marked as read.',
@@ -337,6 +568,17 @@ class NotificationViewSet(viewsets.ModelViewSet):
         count = Notification.objects.filter(user=user, is_read=False).count()
         return Response({'unread_count': count})
 
+def hashing_busy_response():
+    """
+    Answer a request refused by the saturated password hashing pool.
+
+    Returns:
+        503 Response asking the client to retry after RETRY_AFTER seconds
+    """
+    return Response(
+        {'error': BUSY_MESSAGE}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': str(RETRY_AFTER)},
+    )
+
 class AuthViewSet(viewsets.ViewSet):
     """
     ViewSet for authentication operations.
@@ -359,7 +601,10 @@ class AuthViewSet(viewsets.ViewSet):
         """
         serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            try:
+                user = serializer.save()
+            except PasswordHashingBusy:
+                return hashing_busy_response()
             return Response({
                 'message': 'User registered successfully.',
                 'user': UserSerializer(user).data
@@ -384,7 +629,11 @@ class AuthViewSet(viewsets.ViewSet):
             
             try:
                 user = User.objects.get(username=username)
-                if check_password(password, user.password):
+                try:
+                    valid = check_password(password, user.password)
+                except PasswordHashingBusy:
+                    return hashing_busy_response()
+                if valid:
                     # Set session
                     request.session['user_id'] = user.id
                     return Response({
@@ -439,8 +688,13 @@ class AuthViewSet(viewsets.ViewSet):
             current_password = serializer.validated_data['current_password']
             new_password = serializer.validated_data['new_password']
             
-            if check_password(current_password, user.password):
-                user.password = make_password(new_password)
+            try:
+                valid = check_password(current_password, user.password)
+                if valid:
+                    user.password = make_password(new_password)
+            except PasswordHashingBusy:
+                return hashing_busy_response()
+            if valid:
                 user.save()
                 return Response({'message': 'Password changed successfully.'})
             else:
@@ -480,8 +734,8 @@ class SystemStatisticsView(APIView):
         read_percentage = (read_books / total_books * 100) if total_books > 0 else 0
         unread_percentage = (unread_books / total_books * 100) if total_books > 0 else 0
         
-        most_read_books = Book.objects.filter(is_read=True).order_by('-view_count')[:5]
-        most_viewed_books = Book.objects.order_by('-view_count')[:5]
+        most_read_books = Book.objects.select_related('added_by').filter(is_read=True).order_by('-view_count')[:5]
+        most_viewed_books = Book.objects.select_related('added_by').order_by('-view_count')[:5]
         
         # User statistics
         total_users = User.objects.count()
@@ -501,14 +755,14 @@ class SystemStatisticsView(APIView):
                 'unread_books': unread_books,
                 'read_percentage': round(read_percentage, 2),
                 'unread_percentage': round(unread_percentage, 2),
-                'most_read_books': BookSerializer(most_read_books, many=True).data,
-                'most_viewed_books': BookSerializer(most_viewed_books, many=True).data,
+                'most_read_books': most_read_books,
+                'most_viewed_books': most_viewed_books,
             },
             'user_stats': {
                 'total_users': total_users,
                 'admin_users': admin_users,
                 'regular_users': regular_users,
-                'users': UserSerializer(users, many=True).data,
+                'users': users,
             },
             'total_notifications': total_notifications,
             'read_notifications': read_notifications,
@@ -517,3 +771,188 @@ class SystemStatisticsView(APIView):
         
         serializer = SystemStatisticsSerializer(data)
         return Response(serializer.data)
+
+class SyncView(APIView):
+    """
+    API view for incremental client sync.
+    
+    Returns the inserts, updates and deletes of books and notifications visible
+    to the current user since a sync token, paginated by change sequence.
+    Several changes to the same object within a page are collapsed into its
+    latest state, so traffic follows the number of changed objects rather than
+    the size of the library.
+    
+    The token never moves past ChangeLog.settled_id(): a change still in an
+    open transaction may hold a lower id than changes already visible, so
+    recent changes are sent again on the next sync rather than skipped. A
+    token older than the pruned part of the feed is answered with 410 Gone
+    and a fresh token to use after reloading the library.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 100
+    max_limit = 1000
+    
+    def get(self, request):
+        """
+        Get changes after the given sync token.
+        
+        Args:
+            request: HTTP request with optional 'since' token and 'limit'
+            
+        Returns:
+            Changes, the token to resume from and whether more changes are pending
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({'error': 'since and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({'error': 'since must be >= 0 and limit must be >= 1.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pruned = ChangeLog.pruned_through()
+        if since < pruned:
+            return Response({
+                'error': 'Changes after this token were pruned; reload the library, then sync from next_token.',
+                'next_token': str(max(ChangeLog.settled_id(), pruned)),
+            }, status=status.HTTP_410_GONE)
+        
+        entries = ChangeLog.objects.filter(id__gt=since)
+        if request.user.username != 'admin':
+            entries = entries.filter(owner_id=request.user.id)
+        entries = list(entries.order_by('id')[:limit + 1])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        next_token = entries[-1].id if entries else since
+        if entries:
+            settled = ChangeLog.settled_id()
+            if next_token > settled:
+                # Stop before changes that may still have uncommitted ids below them;
+                # they are sent again, with anything after them, on the next sync
+                next_token, has_more = max(since, settled), False
+        
+        # Keep only the latest change per object within this page
+        latest = {}
+        for entry in entries:
+            latest[(entry.model, entry.object_id)] = entry
+        live_ids = {'book': [], 'notification': []}
+        for entry in latest.values():
+            if entry.action != 'delete':
+                live_ids[entry.model].append(entry.object_id)
+        objects = {
+            'book': Book.with_read_status(Book.objects.select_related('added_by'), request.user).in_bulk(live_ids['book']),
+            'notification': Notification.objects.select_related('user', 'book_recommendation').in_bulk(live_ids['notification']),
+        }
+        serializer_classes = {'book': BookSerializer, 'notification': NotificationSerializer}
+        
+        changes = []
+        for entry in sorted(latest.values(), key=lambda e: e.id):
+            if entry.action == 'delete':
+                changes.append({'seq': entry.id, 'model': entry.model, 'id': entry.object_id, 'action': 'delete', 'data': None})
+                continue
+            instance = objects[entry.model].get(entry.object_id)
+            if instance is None:
+                # Deleted after this page; its tombstone arrives on a later page
+                continue
+            changes.append({
+                'seq': entry.id,
+                'model': entry.model,
+                'id': entry.object_id,
+                'action': entry.action,
+                'data': serializer_classes[entry.model](instance).data,
+            })
+        
+        return Response({
+            'changes': changes,
+            'next_token': str(next_token),
+            'has_more': has_more,
+        })
+
+def _build_subrequest(request, method, path, body):
+    """
+    Build an in-process request for one batched API call.
+    
+    The sub-request shares the caller's session and carries the already
+    authenticated user, so DRF skips its authentication classes instead of
+    looking the user up again.
+    
+    Args:
+        request: The outer DRF request
+        method: HTTP method of the sub-request
+        path: API path with optional query string
+        body: Optional JSON-serializable request body
+        
+    Returns:
+        Django HttpRequest ready to pass to a view
+    """
+    parts = urlsplit(path)
+    payload = json.dumps(body).encode() if body is not None else b''
+    sub_request = HttpRequest()
+    sub_request.method = method
+    sub_request.path = sub_request.path_info = parts.path
+    sub_request.META = {
+        **request.META,
+        'REQUEST_METHOD': method,
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'HTTP_ACCEPT': 'application/json',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+    }
+    sub_request.GET = QueryDict(parts.query)
+    sub_request._stream = io.BytesIO(payload)
+    sub_request._read_started = False
+    sub_request.session = request.session
+    sub_request._force_auth_user = request.user
+    return sub_request
+
+class BatchView(APIView):
+    """
+    API view for executing several API calls in one round-trip.
+    
+    Sub-requests are dispatched in-process to the API views, in order, without
+    going through the middleware stack again. Authentication is resolved once
+    for the outer request and reused by every sub-request.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        """
+        Run a list of API sub-requests.
+        
+        Args:
+            request: HTTP request with a 'requests' list of {method, path, body}
+            
+        Returns:
+            List of {status, body} results in request order
+        """
+        serializer = BatchRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        results = []
+        for operation in serializer.validated_data['requests']:
+            method = operation['method']
+            path = operation['path']
+            try:
+                match = resolve(urlsplit(path).path)
+            except Resolver404:
+                results.append({'status': status.HTTP_404_NOT_FOUND, 'body': {'error': 'Not found.'}})
+                continue
+            sub_request = _build_subrequest(request, method, path, operation.get('body'))
+            sub_request.resolver_match = match
+            try:
+                response = match.func(sub_request, *match.args, **match.kwargs)
+            except Exception:
+                logger.exception("Batched request %s %s failed", method, path)
+                results.append({'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'body': {'error': 'Internal server error.'}})
+                continue
+            body = getattr(response, 'data', None)
+            if body is None and response.content:
+                try:
+                    body = json.loads(response.content)
+                except ValueError:
+                    body = response.content.decode(errors='replace')
+            results.append({'status': response.status_code, 'body': body})
+        
+        return Response({'responses': results})
@@ -0,0 +1,33 @@
+"""
+Author name normalization for the Book Catalog application.
+
+Book authors are typed by hand and imported from Open Library, so the same
+person shows up with different case, spacing and punctuation. This module
+reduces a name to one key, used to dedup Author rows and for prefix lookups:
+
+    J.R.R. Tolkien, j. r. r. tolkien, J R R  Tolkien  ->  j r r tolkien
+"""
+
+import re
+import unicodedata
+
+_PUNCTUATION = re.compile(r'[.,;:]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def author_name_key(name):
+    """
+    Return the normalized lookup key for an author name.
+
+    Args:
+        name: Author name as entered (may be None)
+
+    Returns:
+        Case-folded key with punctuation dropped and whitespace collapsed,
+        or None for empty names
+    """
+    if not name:
+        return None
+    key = unicodedata.normalize('NFKC', str(name)).casefold()
+    key = _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', key)).strip()
+    return key[:100] or None
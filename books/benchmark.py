@@ -0,0 +1,302 @@
+"""
+Endpoint load benchmarks for the Book Catalog application.
+
+An asyncio load generator drives a running server (gunicorn, runserver or a
+test live server) with a fixed number of concurrent connections per
+endpoint and reports latency percentiles and throughput. Query counts come
+from one extra in-process request per endpoint, recorded with
+QueryRecorder and rolled back, since a remote server cannot report them.
+
+Runs are appended to a JSON history file so that each run can be compared
+with the previous one and regressions flagged.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import httpx
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+
+from .models import User
+from .query_budget import QueryRecorder
+
+HISTORY_PATH = os.path.join(settings.BASE_DIR, 'var', 'benchmark_history.json')
+
+# name: (method, path, role, JSON body); the login body is filled in with the reader's credentials
+ENDPOINTS = {
+    'home': ('GET', '/home/', 'reader', None),
+    'api_books': ('GET', '/api/books/', 'reader', None),
+    'api_statistics': ('GET', '/api/statistics/', 'admin', None),
+    'login': ('POST', '/api/auth/login/', None, 'credentials'),
+}
+# Latency and throughput metrics compared between runs, and whether higher is worse
+COMPARED_METRICS = {'p50_ms': True, 'p95_ms': True, 'p99_ms': True, 'rps': False, 'queries': True}
+
+
+def percentile(values, percent):
+    """
+    Linearly interpolated percentile of a list of numbers.
+
+    Args:
+        values: Sorted list of numbers
+        percent: Percentile between 0 and 100
+
+    Returns:
+        Percentile value, or None for an empty list
+    """
+    if not values:
+        return None
+    rank = (len(values) - 1) * percent / 100
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def summarize(latencies, errors, elapsed, rejected=0):
+    """
+    Summarize the requests of one endpoint.
+
+    Args:
+        latencies: Latencies of the successful requests, in seconds
+        errors: Number of failed requests (transport errors or status >= 400)
+        elapsed: Wall time of the load phase, in seconds
+        rejected: Number of the failed requests answered 503 (overloaded server)
+
+    Returns:
+        Dictionary with request counts, RPS and latency percentiles in milliseconds
+    """
+    latencies = sorted(latency * 1000 for latency in latencies)
+
+    def rounded(value):
+        return None if value is None else round(value, 2)
+
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'rejected': rejected,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': rounded(percentile(latencies, 50)),
+        'p95_ms': rounded(percentile(latencies, 95)),
+        'p99_ms': rounded(percentile(latencies, 99)),
+        'mean_ms': rounded(sum(latencies) / len(latencies)) if latencies else None,
+        'max_ms': rounded(latencies[-1]) if latencies else None,
+    }
+
+
+async def _login(client, credentials):
+    """Log a client in through the API so its cookie jar carries the session."""
+    response = await client.post('/api/auth/login/', json=credentials)
+    if response.status_code != 200:
+        raise ValueError(f"Login as {credentials['username']} failed with status {response.status_code}")
+
+
+async def load_endpoint(base_url, endpoint, credentials, requests, concurrency, warmup=5, timeout=30.0):
+    """
+    Send a fixed number of requests to one endpoint over concurrent keep-alive connections.
+
+    Args:
+        base_url: Server root, e.g. http://127.0.0.1:8000
+        endpoint: (method, path, role, body) tuple from ENDPOINTS
+        credentials: Dictionary mapping roles to {"username", "password"}
+        requests: Number of timed requests
+        concurrency: Number of requests in flight at once
+        warmup: Untimed requests sent first, to open connections and fill caches
+        timeout: Per-request timeout in seconds
+
+    Returns:
+        Summary dictionary from summarize()
+    """
+    method, path, role, body = endpoint
+    payload = credentials['reader'] if body == 'credentials' else body
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        if role is not None:
+            await _login(client, credentials[role])
+        for _ in range(warmup):
+            try:
+                await client.request(method, path, json=payload)
+            except httpx.HTTPError:
+                pass
+        latencies, errors, rejected = [], 0, 0
+        remaining = requests
+
+        async def worker():
+            nonlocal remaining, errors, rejected
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=payload)
+                    failed = response.status_code >= 400
+                    if response.status_code == 503:
+                        rejected += 1
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed, rejected)
+
+
+def start_gunicorn(workers, asgi=False, env=None):
+    """
+    Start gunicorn on a free local port with the current settings and wait until it answers.
+
+    Args:
+        workers: Number of gunicorn workers
+        asgi: Serve ASGI_APPLICATION with uvicorn workers, as the Docker image does,
+            instead of WSGI_APPLICATION with sync workers
+        env: Extra environment variables for the server, e.g. settings read from the environment
+
+    Returns:
+        Tuple of (process, base URL)
+
+    Raises:
+        RuntimeError: gunicorn exited or did not answer within 30 seconds
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    module, _, app = (settings.ASGI_APPLICATION if asgi else settings.WSGI_APPLICATION).rpartition('.')
+    command = [sys.executable, '-m', 'gunicorn', f'{module}:{app}', '--bind', f'127.0.0.1:{port}',
+               '--workers', str(workers), '--log-level', 'warning']
+    if asgi:
+        command += ['--worker-class', 'uvicorn_worker.UvicornWorker']
+    # The views' debug prints would interleave with the report; errors still go to stderr
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env={**os.environ, **(env or {})}, stdout=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {process.returncode}')
+        try:
+            httpx.get(base_url + '/', timeout=1)
+            return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 30 seconds')
+
+
+def count_queries(endpoint, credentials):
+    """
+    Count the queries of one request to an endpoint, in process and rolled back.
+
+    Args:
+        endpoint: (method, path, role, body) tuple from ENDPOINTS
+        credentials: Dictionary mapping roles to {"username", "password"}
+
+    Returns:
+        Number of queries, or None when the role's user does not exist
+    """
+    method, path, role, body = endpoint
+    payload = credentials['reader'] if body == 'credentials' else body
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+        if role is not None:
+            user = User.objects.filter(username=credentials[role]['username']).first()
+            if user is None:
+                return None
+            session = client.session
+            session['user_id'] = user.pk
+            session.save()
+        with QueryRecorder() as recorder:
+            if method == 'GET':
+                client.get(path)
+            else:
+                client.generic(method, path, json.dumps(payload), content_type='application/json')
+        transaction.set_rollback(True)
+    return len(recorder.queries)
+
+
+def load_history(path=None):
+    """
+    Read the benchmark history.
+
+    Args:
+        path: History file (default: var/benchmark_history.json)
+
+    Returns:
+        List of runs, oldest first; empty when the file does not exist
+    """
+    try:
+        with open(path or HISTORY_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_run(run, path=None):
+    """
+    Append a run to the benchmark history.
+
+    Args:
+        run: Run dictionary built by the benchmark command
+        path: History file (default: var/benchmark_history.json)
+    """
+    path = path or HISTORY_PATH
+    history = load_history(path)
+    history.append(run)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+        f.write('\n')
+
+
+def new_run(base_url, requests, concurrency, label=''):
+    """Start a run record with its settings and timestamp."""
+    return {
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'label': label,
+        'target': base_url,
+        'requests': requests,
+        'concurrency': concurrency,
+        'endpoints': {},
+    }
+
+
+def find_regressions(run, baseline, tolerance):
+    """
+    Compare a run with an earlier one.
+
+    Args:
+        run: Current run
+        baseline: Earlier run to compare with
+        tolerance: Allowed relative change before a metric counts as regressed (0.1 = 10%)
+
+    Returns:
+        List of human-readable regressions, empty when none
+    """
+    regressions = []
+    for name, current in run['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            now, before = current.get(metric), previous.get(metric)
+            if now is None or not before:
+                continue
+            change = (now - before) / before
+            if metric == 'queries':
+                worse = now > before
+            else:
+                worse = change > tolerance if higher_is_worse else -change > tolerance
+            if worse:
+                regressions.append(f'{name} {metric}: {before} -> {now} ({change:+.0%})')
+    return regressions
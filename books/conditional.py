@@ -0,0 +1,136 @@
+"""
+Conditional GET support for the Book Catalog application.
+
+This module builds collection-level validators (ETag and Last-Modified) from
+cheap database aggregates, so clients that poll book and notification lists
+can be answered with 304 Not Modified without re-running the list query or
+serializing any objects.
+"""
+
+import hashlib
+from calendar import timegm
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def collection_validators(queryset, *parts, timestamp_field='updated_at', related_fields=(), counter_field=None):
+    """
+    Build ETag and Last-Modified validators for a collection of rows.
+
+    The validators are derived from a single aggregate query (newest timestamp
+    plus row count), so checking them never loads or serializes the rows.
+
+    Args:
+        queryset: Queryset describing the collection (ordering is ignored)
+        *parts: Extra values that change the representation (user, query string, format)
+        timestamp_field: Field whose maximum marks the last change
+        related_fields: Foreign keys whose rows are serialized too; their newest
+            updated_at and link count are folded into the ETag
+        counter_field: Field bumped with UPDATE ... F() + 1 without touching
+            timestamp_field (view_count); its sum is folded into the ETag
+
+    Returns:
+        Tuple of (etag, last_modified), where last_modified is a UNIX timestamp or None
+    """
+    aggregates = {'latest': Max(timestamp_field), 'total': Count('pk')}
+    for field in related_fields:
+        aggregates[f'{field}_latest'] = Max(f'{field}__updated_at')
+        aggregates[f'{field}_total'] = Count(field)
+    if counter_field:
+        aggregates['counter'] = Sum(counter_field)
+    stats = queryset.order_by().aggregate(**aggregates)
+    latest = stats.pop('latest')
+    extra = [value.isoformat() if hasattr(value, 'isoformat') else value for _, value in sorted(stats.items())]
+    key = ':'.join(str(part) for part in (*parts, *extra, latest.isoformat() if latest else ''))
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    last_modified = timegm(latest.utctimetuple()) if latest else None
+    return etag, last_modified
+
+
+def not_modified_response(request, etag, last_modified=None):
+    """
+    Return a 304 response if the client already holds the current representation.
+
+    Only the ETag is used for revalidation: deleting a row does not move the
+    newest timestamp, so If-Modified-Since on its own could wrongly report a
+    shrunken collection as unchanged. The ETag folds in the row count.
+
+    Args:
+        request: Django or DRF request object
+        etag: Current ETag of the collection
+        last_modified: Current Last-Modified timestamp, echoed on the 304
+
+    Returns:
+        HttpResponseNotModified if unchanged, None otherwise
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        return None
+    return set_validators(response, etag, last_modified)
+
+
+def set_validators(response, etag, last_modified=None):
+    """
+    Attach ETag, Last-Modified and revalidation headers to a response.
+
+    Args:
+        response: Response to decorate
+        etag: ETag of the collection
+        last_modified: Last-Modified timestamp of the collection, if known
+
+    Returns:
+        The same response object
+    """
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    ViewSet mixin that answers unchanged list requests with 304 Not Modified.
+
+    The validators cover the filtered queryset, the requesting user, the full
+    query string (filters and page) and the negotiated response format.
+    Views whose representation depends on other rows add them through
+    get_validator_parts(), validator_related_fields (serialized foreign keys)
+    and validator_counter_field (a counter updated without updated_at).
+    """
+    validator_related_fields = ()
+    validator_counter_field = None
+
+    def get_validator_parts(self):
+        """
+        Values besides the queryset aggregate that change the list representation.
+
+        Returns:
+            List of values folded into the ETag
+        """
+        return [self.request.user.pk, self.request.get_full_path(), self.request.accepted_renderer.format]
+
+    def list(self, request, *args, **kwargs):
+        """
+        List the collection, or return 304 if the client's copy is current.
+
+        Args:
+            request: HTTP request
+
+        Returns:
+            304 response or the regular paginated list response
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = collection_validators(
+            queryset,
+            *self.get_validator_parts(),
+            related_fields=self.validator_related_fields,
+            counter_field=self.validator_counter_field,
+        )
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
@@ -0,0 +1,63 @@
+"""
+Duplicate-book fingerprints for the Book Catalog application.
+
+Manual adds, Open Library imports and old per-user copies leave the same book
+in the catalog several times, with small differences in case, punctuation or
+a leading article. This module reduces a book to a short fingerprint of its
+normalized title, author and publication year, so candidates for merging can
+be grouped with one indexed GROUP BY:
+
+    "The Hobbit" / J.R.R. Tolkien / 1937-09-21
+    "hobbit"     / j. r. r. tolkien / 1937       ->  same fingerprint
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from .authors import author_name_key
+
+_NON_WORD = re.compile(r'[\W_]+')
+_LEADING_ARTICLE = re.compile(r'^(the|a|an) ')
+
+
+def title_key(title):
+    """
+    Return the normalized form of a book title.
+
+    Args:
+        title: Title as entered (may be None)
+
+    Returns:
+        Case-folded title with punctuation dropped, whitespace collapsed and a
+        leading English article removed
+    """
+    if not title:
+        return ''
+    key = _NON_WORD.sub(' ', unicodedata.normalize('NFKC', str(title)).casefold()).strip()
+    return _LEADING_ARTICLE.sub('', key)
+
+
+def publication_year(published_date):
+    """Return the year of a date, or of a 'YYYY...' string, as a string ('' if unknown)."""
+    if not published_date:
+        return ''
+    if hasattr(published_date, 'year'):
+        return str(published_date.year)
+    return str(published_date)[:4]
+
+
+def book_fingerprint(title, author, published_date):
+    """
+    Return the duplicate-detection fingerprint of a book.
+
+    Args:
+        title: Book title
+        author: Author name
+        published_date: Publication date, or a string starting with the year
+
+    Returns:
+        32-character hex digest
+    """
+    key = '|'.join((title_key(title), author_name_key(author) or '', publication_year(published_date)))
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
@@ -7,8 +7,9 @@ validation and security measures.
 """
 
 from django import forms
-from django.contrib.auth.hashers import check_password
+from .passwords import check_password
 from .models import Book, User, Notification, Tag
+from .isbn import canonical_isbn, clean_isbn, looks_like_isbn, is_valid_isbn10, is_valid_isbn13
 
 # forms.py
 
@@ -51,9 +52,23 @@ class BookForm(forms.ModelForm):
         }
 
     def clean_isbn(self):
+        """
+        Validate the ISBN checksum and reject duplicates in any spelling.
+        
+        Hyphenated, ISBN-10 and differently-cased values are compared through
+        their canonical key, so they all match the same stored book.
+        """
         isbn = self.cleaned_data.get('isbn')
         if not isbn or str(isbn).strip().lower() == 'none':
             return None
+        cleaned = clean_isbn(isbn)
+        if looks_like_isbn(cleaned) and not (is_valid_isbn10(cleaned) or is_valid_isbn13(cleaned)):
+            raise forms.ValidationError("This ISBN has an invalid check digit.")
+        duplicates = Book.objects.filter(isbn_key=canonical_isbn(isbn))
+        if self.instance.pk:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise forms.ValidationError("A book with this ISBN already exists.")
         return isbn
 
 class UserRegistrationForm(forms.ModelForm):
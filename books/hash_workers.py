@@ -0,0 +1,23 @@
+"""
+Start-up of the password hashing processes of the Book Catalog application.
+
+The process pools of books.passwords and books.user_import spawn fresh
+interpreters that set up Django before hashing. Under gunicorn every process
+that sees PROMETHEUS_MULTIPROC_DIR writes its metrics to files named after
+its pid, and only gunicorn's own workers are marked dead when they exit, so
+each pool process would leave a live gauge file behind. The parent records
+the hashing metrics itself, so the pool processes drop the variable before
+anything imports prometheus_client. This module must not import the
+metrics (nor books.passwords, which does), since a spawned process imports
+it before running init_worker.
+"""
+
+import os
+
+import django
+
+
+def init_worker():
+    """Initialize a spawned hashing process: keep its metrics in memory and set up Django."""
+    os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+    django.setup()
@@ -0,0 +1,174 @@
+"""
+Liveness and readiness probes for the Book Catalog application.
+
+HealthCheckMiddleware is listed first in MIDDLEWARE and answers the probe
+paths itself, before URL resolution, sessions, messages, templates or the
+metrics middleware are involved:
+
+    /healthz  liveness: the worker answers; no database access
+    /readyz   readiness: the database answers SELECT 1, every migration is
+              applied and, with HEALTH_CHECK_CACHE, the default cache
+              answers; 503 with the failing checks otherwise
+
+The readiness checks run on one long-lived thread per worker, which keeps
+its own database connection open between probes, so a probe normally costs
+one round trip. A check that does not finish within HEALTH_CHECK_TIMEOUT
+seconds fails the probe instead of holding the worker. Once every migration
+is applied the result is remembered, since code and schema only change
+together on a new deployment.
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+LIVENESS_PATH = '/healthz'
+READINESS_PATH = '/readyz'
+
+_executor = None
+_migrated = False
+
+
+def _check_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readyz')
+    return _executor
+
+
+def shutdown():
+    """Close the probe thread's database connection and stop the thread, e.g. before dropping a test database."""
+    global _executor
+    if _executor is None:
+        return
+    try:
+        _executor.submit(connections.close_all).result(timeout=settings.HEALTH_CHECK_TIMEOUT)
+    except FutureTimeout:
+        pass
+    _executor.shutdown(wait=False)
+    _executor = None
+
+
+def check_database():
+    """Ping the database on this thread's connection, reconnecting when it has gone bad."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception:
+        # Drop the broken connection, so the next probe reconnects
+        connection.close()
+        raise
+
+
+def check_migrations():
+    """Fail while migrations of the deployed code are not applied to the database."""
+    global _migrated
+    if _migrated:
+        return
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f'{len(plan)} unapplied migrations')
+    _migrated = True
+
+
+def check_cache():
+    """Write and read back a key in the default cache."""
+    cache.set('readyz', 1, 10)
+    if cache.get('readyz') != 1:
+        raise RuntimeError('value not returned')
+
+
+def run_checks():
+    """
+    Run the readiness checks in order, stopping at the database when it is down.
+
+    Returns:
+        Dictionary mapping check names to "ok" or an error message
+    """
+    checks = [('database', check_database), ('migrations', check_migrations)]
+    if settings.HEALTH_CHECK_CACHE:
+        checks.append(('cache', check_cache))
+    results = {}
+    for name, check in checks:
+        try:
+            check()
+            results[name] = 'ok'
+        except Exception as exc:
+            results[name] = f'{type(exc).__name__}: {exc}'
+            if name == 'database':
+                break
+    return results
+
+
+def _timed_out():
+    return {'timeout': f'checks did not finish within {settings.HEALTH_CHECK_TIMEOUT} s'}
+
+
+def readiness():
+    """
+    Run the readiness checks on the probe thread, giving up after HEALTH_CHECK_TIMEOUT.
+
+    Returns:
+        Dictionary mapping check names to "ok" or an error message
+    """
+    future = _check_executor().submit(run_checks)
+    try:
+        return future.result(timeout=settings.HEALTH_CHECK_TIMEOUT)
+    except FutureTimeout:
+        return _timed_out()
+
+
+async def areadiness():
+    """Async version of readiness(), waiting for the probe thread without blocking the event loop."""
+    future = asyncio.wrap_future(_check_executor().submit(run_checks))
+    try:
+        return await asyncio.wait_for(future, settings.HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _timed_out()
+
+
+def _probe_response(path, results=None):
+    if path == LIVENESS_PATH:
+        response = HttpResponse('ok', content_type='text/plain')
+    else:
+        ready = all(result == 'ok' for result in results.values())
+        body = json.dumps({'status': 'ok' if ready else 'unavailable', 'checks': results})
+        response = HttpResponse(body, status=200 if ready else 503, content_type='application/json')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+class HealthCheckMiddleware(MiddlewareMixin):
+    """
+    Answer /healthz and /readyz directly, skipping the rest of the middleware and the URLconf.
+
+    Under ASGI the probes are answered on the event loop, without a thread
+    hop for /healthz.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path_info == LIVENESS_PATH:
+            return _probe_response(LIVENESS_PATH)
+        if request.path_info == READINESS_PATH:
+            return _probe_response(READINESS_PATH, readiness())
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path_info == LIVENESS_PATH:
+            return _probe_response(LIVENESS_PATH)
+        if request.path_info == READINESS_PATH:
+            return _probe_response(READINESS_PATH, await areadiness())
+        return await self.get_response(request)
@@ -0,0 +1,89 @@
+"""
+ISBN normalization for the Book Catalog application.
+
+This module turns the many spellings of a book identifier into one canonical
+key, so duplicate checks and lookups can use a single indexed equality match:
+
+    978-0-306-40615-7, 9780306406157, 0-306-40615-2  ->  9780306406157
+    js00042, JS00042, JS42                           ->  JS42
+    ol45883w, OL45883W                               ->  OL45883W
+
+ISBN-10 values are converted to ISBN-13. Values that are neither a checksummed
+ISBN nor a JS/OL catalogue id fall back to their cleaned, upper-cased form.
+"""
+
+import re
+
+_SEPARATORS = re.compile(r'[\s\-]')
+
+
+def clean_isbn(value):
+    """
+    Strip separators and upper-case an ISBN-like value.
+
+    Args:
+        value: Raw ISBN string (may be None)
+
+    Returns:
+        Cleaned string, or '' for empty values
+    """
+    if not value:
+        return ''
+    return _SEPARATORS.sub('', str(value)).upper()
+
+
+def is_valid_isbn10(value):
+    """Return True if a cleaned value is an ISBN-10 with a correct check digit."""
+    if len(value) != 10 or not value[:9].isdigit() or not (value[9].isdigit() or value[9] == 'X'):
+        return False
+    digits = [int(c) for c in value[:9]] + [10 if value[9] == 'X' else int(value[9])]
+    return sum((10 - i) * d for i, d in enumerate(digits)) % 11 == 0
+
+
+def is_valid_isbn13(value):
+    """Return True if a cleaned value is an ISBN-13 with a correct check digit."""
+    if len(value) != 13 or not value.isdigit():
+        return False
+    return sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(value)) % 10 == 0
+
+
+def isbn10_to_isbn13(value):
+    """
+    Convert a valid, cleaned ISBN-10 to its ISBN-13 form.
+
+    Args:
+        value: Cleaned ISBN-10
+
+    Returns:
+        ISBN-13 string with the 978 prefix and a recomputed check digit
+    """
+    body = '978' + value[:9]
+    check = (10 - sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def looks_like_isbn(value):
+    """Return True if a cleaned value has the shape of an ISBN-10 or ISBN-13."""
+    return bool(re.fullmatch(r'\d{9}[\dX]|\d{13}', value))
+
+
+def canonical_isbn(value):
+    """
+    Return the canonical lookup key for an ISBN or catalogue id.
+
+    Args:
+        value: Raw ISBN, JS id or OL id (may be None)
+
+    Returns:
+        Canonical key string, or None for empty values
+    """
+    cleaned = clean_isbn(value)
+    if not cleaned or cleaned == 'NONE':
+        return None
+    if cleaned.startswith('JS') and cleaned[2:].isdigit():
+        return f'JS{int(cleaned[2:])}'
+    if is_valid_isbn13(cleaned):
+        return cleaned
+    if is_valid_isbn10(cleaned):
+        return isbn10_to_isbn13(cleaned)
+    return cleaned
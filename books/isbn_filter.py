@@ -0,0 +1,230 @@
+"""
+Probabilistic ISBN membership filter for high-volume import dedup.
+
+A Bloom filter over canonical ISBN keys (Book.isbn_key) answers "definitely
+not in the catalog" from memory, so importers only query the database for
+keys the filter reports as "maybe present". The filter is persisted to disk
+and refreshed incrementally from the ChangeLog feed: after the first build,
+bringing it up to date only reads the books changed since its watermark.
+The watermark never passes ChangeLog.settled_id(), so a change that commits
+after others with higher ids is still read, and a filter older than the
+pruned part of the feed is rebuilt.
+
+Deleted books stay in the filter. That only adds false positives, which the
+database check resolves; the filter never gives false negatives.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import tempfile
+
+from django.conf import settings
+
+from .models import Book, ChangeLog
+
+# magic, bit count, hash count, capacity, item count, ChangeLog watermark
+_HEADER = struct.Struct('<8sQIQQQ')
+_MAGIC = b'ISBNBF01'
+_BATCH_SIZE = 5000
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings using double hashing.
+
+    Attributes:
+        bit_count (int): Number of bits in the filter
+        hash_count (int): Number of bit positions set per key
+        capacity (int): Number of keys the filter was sized for
+        item_count (int): Number of keys added so far
+    """
+
+    def __init__(self, bit_count, hash_count, capacity, bits=None, item_count=0):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.capacity = capacity
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+        self.item_count = item_count
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate):
+        """
+        Create an empty filter sized for a number of keys and a false positive rate.
+
+        Args:
+            capacity: Expected number of keys
+            error_rate: Target false positive rate at capacity (e.g. 0.01)
+
+        Returns:
+            Empty filter instance
+        """
+        bit_count = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        return cls(bit_count, hash_count, capacity)
+
+    def _positions(self, key):
+        h1, h2 = struct.unpack('<QQ', hashlib.blake2b(key.encode(), digest_size=16).digest())
+        return [(h1 + i * h2) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, key):
+        """Add a key to the filter."""
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.item_count += 1
+
+    def __contains__(self, key):
+        """Return False if the key was never added, True if it may have been."""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def is_saturated(self):
+        """Whether more keys were added than the filter was sized for."""
+        return self.item_count > self.capacity
+
+
+class IsbnFilter(BloomFilter):
+    """
+    Bloom filter of canonical ISBN keys, kept in sync with the catalog.
+
+    Attributes:
+        watermark (int): Last ChangeLog id already reflected in the filter
+    """
+
+    def __init__(self, *args, watermark=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.watermark = watermark
+
+    @classmethod
+    def build(cls, capacity=None, error_rate=None):
+        """
+        Build a filter from every canonical ISBN key in the catalog.
+
+        Args:
+            capacity: Keys to size for (default: twice the catalog, at least ISBN_FILTER_MIN_CAPACITY)
+            error_rate: Target false positive rate (default: ISBN_FILTER_ERROR_RATE)
+
+        Returns:
+            Filled filter instance
+        """
+        # Take the watermark first; changes racing with the scan are re-read on refresh
+        watermark = ChangeLog.settled_id()
+        capacity = capacity or max(Book.objects.count() * 2, settings.ISBN_FILTER_MIN_CAPACITY)
+        isbn_filter = cls.for_capacity(capacity, error_rate or settings.ISBN_FILTER_ERROR_RATE)
+        keys = Book.objects.exclude(isbn_key=None).values_list('isbn_key', flat=True)
+        for key in keys.iterator(chunk_size=_BATCH_SIZE):
+            isbn_filter.add(key)
+        isbn_filter.watermark = watermark
+        return isbn_filter
+
+    def refresh(self):
+        """
+        Add the keys of books created or updated since the watermark.
+
+        Changes newer than the settled id are read too, but the watermark
+        stays before them, so they are read again on the next refresh.
+
+        Returns:
+            Number of change feed entries read
+        """
+        settled = ChangeLog.settled_id()
+        changes = ChangeLog.objects.filter(model='book').exclude(action='delete').order_by('id')
+        position = self.watermark
+        read = 0
+        while True:
+            batch = list(changes.filter(id__gt=position).values_list('id', 'object_id')[:_BATCH_SIZE])
+            if not batch:
+                return read
+            book_ids = [object_id for _, object_id in batch]
+            for key in Book.objects.filter(pk__in=book_ids).exclude(isbn_key=None).values_list('isbn_key', flat=True):
+                self.add(key)
+            position = batch[-1][0]
+            self.watermark = max(self.watermark, min(position, settled))
+            read += len(batch)
+
+    def save(self, path=None):
+        """
+        Write the filter to disk atomically.
+
+        Args:
+            path: Target file (default: ISBN_FILTER_PATH)
+        """
+        path = path or settings.ISBN_FILTER_PATH
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        header = _HEADER.pack(_MAGIC, self.bit_count, self.hash_count, self.capacity, self.item_count, self.watermark)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as tmp:
+            tmp.write(header)
+            tmp.write(self.bits)
+        os.replace(tmp.name, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Read a filter from disk.
+
+        Args:
+            path: Source file (default: ISBN_FILTER_PATH)
+
+        Returns:
+            Filter instance, or None if the file is missing or unreadable
+        """
+        path = path or settings.ISBN_FILTER_PATH
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                magic, bit_count, hash_count, capacity, item_count, watermark = _HEADER.unpack(header)
+                bits = bytearray(f.read())
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or len(bits) != (bit_count + 7) // 8:
+            return None
+        return cls(bit_count, hash_count, capacity, bits=bits, item_count=item_count, watermark=watermark)
+
+
+def load_isbn_filter(path=None, rebuild=False):
+    """
+    Load the persisted ISBN filter and bring it up to date.
+
+    The filter is rebuilt from scratch when missing, unreadable, saturated,
+    behind the pruned part of the change feed or when rebuild is requested;
+    otherwise only new changes are applied.
+
+    Args:
+        path: Filter file (default: ISBN_FILTER_PATH)
+        rebuild: Force a full rebuild
+
+    Returns:
+        Up-to-date IsbnFilter, saved back to disk if it changed
+    """
+    isbn_filter = None if rebuild else IsbnFilter.load(path)
+    if isbn_filter is None or isbn_filter.is_saturated or isbn_filter.watermark < ChangeLog.pruned_through():
+        isbn_filter = IsbnFilter.build()
+        isbn_filter.refresh()
+        isbn_filter.save(path)
+    elif isbn_filter.refresh():
+        isbn_filter.save(path)
+    return isbn_filter
+
+
+def existing_isbn_keys(keys, isbn_filter):
+    """
+    Return the subset of canonical ISBN keys already in the catalog.
+
+    Keys the filter rules out never reach the database; the rest are checked
+    with batched IN queries on the indexed isbn_key column.
+
+    Args:
+        keys: Iterable of canonical ISBN keys
+        isbn_filter: Up-to-date IsbnFilter
+
+    Returns:
+        Set of keys that exist in the catalog
+    """
+    maybe_present = [key for key in set(keys) if key in isbn_filter]
+    found = set()
+    for start in range(0, len(maybe_present), 1000):
+        chunk = maybe_present[start:start + 1000]
+        found.update(Book.objects.filter(isbn_key__in=chunk).values_list('isbn_key', flat=True))
+    return found
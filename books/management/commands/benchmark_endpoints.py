@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from books import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests /home/, /api/books/, /api/statistics/ and login with an asyncio HTTP client, '
+        'reporting p50/p95/p99 latency, RPS and query counts, and flags regressions against the previous run'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Server to benchmark (default: start a local gunicorn)')
+        parser.add_argument('--server-workers', type=int, default=2, help='Gunicorn workers when starting one')
+        parser.add_argument(
+            '--endpoints', default=','.join(benchmark.ENDPOINTS),
+            help=f"Comma-separated endpoints to run ({', '.join(benchmark.ENDPOINTS)})",
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint')
+        parser.add_argument('--username', default='seed1-reader0', help='Reader account (default: seed_catalog user)')
+        parser.add_argument('--password', default='seed-password', help="Reader's password")
+        parser.add_argument('--admin-username', default='admin', help='Admin account for /api/statistics/')
+        parser.add_argument('--admin-password', default='admin', help="Admin's password")
+        parser.add_argument('--history', default=benchmark.HISTORY_PATH, help='JSON file runs are appended to')
+        parser.add_argument('--label', default='', help='Free-form label stored with the run, e.g. a commit')
+        parser.add_argument('--no-save', action='store_true', help='Do not append this run to the history')
+        parser.add_argument('--tolerance', type=float, default=0.1, help='Relative change counted as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit with an error on regressions')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['endpoints'].split(',') if name.strip()]
+        unknown = set(names) - set(benchmark.ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1')
+        credentials = {
+            'reader': {'username': options['username'], 'password': options['password']},
+            'admin': {'username': options['admin_username'], 'password': options['admin_password']},
+        }
+
+        server = None
+        base_url = options['url']
+        if not base_url:
+            try:
+                server, base_url = benchmark.start_gunicorn(options['server_workers'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+        target = options['url'] or f"gunicorn ({options['server_workers']} workers)"
+        run = benchmark.new_run(target, options['requests'], options['concurrency'], options['label'])
+        try:
+            self.stdout.write(f"Benchmarking {base_url}: {options['requests']} requests per endpoint, "
+                              f"concurrency {options['concurrency']}\n")
+            self.stdout.write(f"{'endpoint':<16} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+                              f"{'errors':>7} {'queries':>8}")
+            for name in names:
+                endpoint = benchmark.ENDPOINTS[name]
+                try:
+                    result = asyncio.run(benchmark.load_endpoint(
+                        base_url, endpoint, credentials, options['requests'], options['concurrency'],
+                        warmup=options['warmup'],
+                    ))
+                except (ValueError, httpx.HTTPError) as exc:
+                    self.stdout.write(self.style.WARNING(f'{name:<16} skipped: {type(exc).__name__} {exc}'))
+                    continue
+                result['queries'] = benchmark.count_queries(endpoint, credentials)
+                run['endpoints'][name] = result
+                queries = '-' if result['queries'] is None else result['queries']
+                self.stdout.write(
+                    f"{name:<16} {result['rps']:>8} {self.ms(result['p50_ms'])} {self.ms(result['p95_ms'])} "
+                    f"{self.ms(result['p99_ms'])} {result['errors']:>7} {queries:>8}"
+                )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        history = benchmark.load_history(options['history'])
+        regressions = benchmark.find_regressions(run, history[-1], options['tolerance']) if history else []
+        if not options['no_save']:
+            benchmark.save_run(run, options['history'])
+            self.stdout.write(f"\nSaved run to {options['history']}")
+        if not history:
+            self.stdout.write('No previous run to compare with.')
+        elif regressions:
+            self.stdout.write(self.style.WARNING(f"Regressions against the run of {history[-1]['timestamp']}:"))
+            for regression in regressions:
+                self.stdout.write(f'  {regression}')
+            if options['fail_on_regression']:
+                raise CommandError(f'{len(regressions)} regressions')
+        else:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against the run of {history[-1]['timestamp']}."))
+
+    @staticmethod
+    def ms(value):
+        """Format a latency column, with a dash when no request succeeded."""
+        return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from books import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures login throughput against the number of password hashing workers, starting gunicorn with '
+        'uvicorn workers for each count and timing another endpoint during the login burst'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hash-workers', default='0,1,2,4',
+            help='Comma-separated PASSWORD_HASH_WORKERS values to compare (0 = hash on the request thread)',
+        )
+        parser.add_argument('--queue', type=int, default=16, help='PASSWORD_HASH_QUEUE of the server')
+        parser.add_argument('--server-workers', type=int, default=1, help='Gunicorn workers')
+        parser.add_argument('--logins', type=int, default=100, help='Timed logins per run')
+        parser.add_argument('--concurrency', type=int, default=16, help='Logins in flight at once')
+        parser.add_argument(
+            '--page', default='api_books', choices=[name for name in benchmark.ENDPOINTS if name != 'login'],
+            help='Endpoint timed during the login burst, to show whether logins starve it',
+        )
+        parser.add_argument('--page-requests', type=int, default=50, help='Timed requests to the page, one at a time')
+        parser.add_argument('--username', default='seed1-reader0', help='Reader account (default: seed_catalog user)')
+        parser.add_argument('--password', default='seed-password', help="Reader's password")
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(count) for count in options['hash_workers'].split(',') if count.strip()]
+        except ValueError:
+            raise CommandError('--hash-workers must be comma-separated integers')
+        if options['logins'] < 1 or options['concurrency'] < 1 or options['page_requests'] < 1:
+            raise CommandError('--logins, --concurrency and --page-requests must be at least 1')
+        credentials = {
+            'reader': {'username': options['username'], 'password': options['password']},
+            'admin': {'username': options['username'], 'password': options['password']},
+        }
+        login, page = benchmark.ENDPOINTS['login'], benchmark.ENDPOINTS[options['page']]
+
+        self.stdout.write(
+            f"{options['logins']} logins at concurrency {options['concurrency']} against "
+            f"{options['server_workers']} uvicorn worker(s), queue {options['queue']}; "
+            f"{options['page']} timed alongside\n"
+        )
+        self.stdout.write(f"{'hash workers':>12} {'logins/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'rejected':>9} "
+                          f"{'errors':>7} {'page p50':>9} {'page p95':>9}")
+        for count in counts:
+            env = {'PASSWORD_HASH_WORKERS': str(count), 'PASSWORD_HASH_QUEUE': str(options['queue'])}
+            try:
+                server, base_url = benchmark.start_gunicorn(options['server_workers'], asgi=True, env=env)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            try:
+                logins, pages = asyncio.run(self.burst(base_url, login, page, credentials, options))
+            except (ValueError, httpx.HTTPError) as exc:
+                raise CommandError(f'{type(exc).__name__} {exc}')
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+            self.stdout.write(
+                f"{count:>12} {logins['rps']:>9} {self.ms(logins['p50_ms'])} {self.ms(logins['p95_ms'])} "
+                f"{logins['rejected']:>9} {logins['errors'] - logins['rejected']:>7} "
+                f"{self.ms(pages['p50_ms'])} {self.ms(pages['p95_ms'])}"
+            )
+
+    @staticmethod
+    async def burst(base_url, login, page, credentials, options):
+        """Run the login burst and the page requests at the same time."""
+        return await asyncio.gather(
+            benchmark.load_endpoint(base_url, login, credentials, options['logins'], options['concurrency'], warmup=2),
+            benchmark.load_endpoint(base_url, page, credentials, options['page_requests'], 1, warmup=2),
+        )
+
+    @staticmethod
+    def ms(value):
+        """Format a latency column, with a dash when no request succeeded."""
+        return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
@@ -0,0 +1,77 @@
+import time
+from datetime import date, datetime, timezone as dt_timezone
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from books import renderers
+from books.models import Book
+from books.serializer import BookSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compares the stock and fast API renderers/parsers on a synthetic book list payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=10000, help='Number of books in the payload')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per codec (best run is reported)')
+
+    def handle(self, *args, **options):
+        count = options['books']
+        repeat = options['repeat']
+
+        # Serialized payload: what BookViewSet hands to the renderer today
+        books = [
+            Book(
+                id=i,
+                title=f'Book title number {i}',
+                author=f'Author {i % 500}',
+                description='A fairly typical description of a book. ' * 4,
+                published_date=date(1950 + i % 70, 1 + i % 12, 1 + i % 28),
+                isbn=f'JS{i:07d}',
+                is_read=bool(i % 2),
+                view_count=i % 1000,
+                created_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc),
+                updated_at=datetime(2025, 6, 1, tzinfo=dt_timezone.utc),
+            )
+            for i in range(1, count + 1)
+        ]
+        serialized = BookSerializer(books, many=True).data
+        # Raw payload: native dates/datetimes, as values() rows would carry
+        raw = [
+            {
+                'id': b.id, 'title': b.title, 'author': b.author, 'description': b.description,
+                'published_date': b.published_date, 'isbn': b.isbn, 'is_read': b.is_read,
+                'view_count': b.view_count, 'created_at': b.created_at, 'updated_at': b.updated_at,
+            }
+            for b in books
+        ]
+
+        codecs = [('stdlib json', JSONRenderer(), JSONParser())]
+        if renderers.orjson is not None:
+            codecs.append(('orjson', renderers.ORJSONRenderer(), renderers.ORJSONParser()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed, skipping it.'))
+        if renderers.msgpack is not None:
+            codecs.append(('msgpack', renderers.MessagePackRenderer(), renderers.MessagePackParser()))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed, skipping it.'))
+
+        self.stdout.write(f'Payload: {count} books, best of {repeat} runs\n')
+        self.stdout.write(f"{'codec':<12} {'payload':<11} {'render ms':>10} {'parse ms':>10} {'size KB':>10}")
+        for payload_name, payload in [('serialized', serialized), ('raw', raw)]:
+            for name, renderer, parser in codecs:
+                render_times, parse_times = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    body = renderer.render(payload)
+                    render_times.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    parser.parse(BytesIO(body), parser_context={})
+                    parse_times.append(time.perf_counter() - start)
+                self.stdout.write(
+                    f'{name:<12} {payload_name:<11} {min(render_times) * 1000:>10.1f} '
+                    f'{min(parse_times) * 1000:>10.1f} {len(body) / 1024:>10.0f}'
+                )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from books.isbn_filter import IsbnFilter, load_isbn_filter
+
+
+class Command(BaseCommand):
+    help = 'Builds or incrementally refreshes the on-disk Bloom filter of catalog ISBNs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild from the whole catalog instead of applying new changes')
+        parser.add_argument('--path', help='Filter file (default: settings.ISBN_FILTER_PATH)')
+
+    def handle(self, *args, **options):
+        existed = IsbnFilter.load(options['path']) is not None
+        isbn_filter = load_isbn_filter(options['path'], rebuild=options['full'])
+        action = 'Refreshed' if existed and not options['full'] else 'Built'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} ISBN filter: {isbn_filter.item_count} keys, capacity {isbn_filter.capacity}, '
+            f'{isbn_filter.bit_count // 8 // 1024} KB, {isbn_filter.hash_count} hashes, '
+            f'change feed watermark {isbn_filter.watermark}'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Min
+
+from books.merge import merge_books
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        'Collapses per-user copies of recommended books (same title, author, publication date '
+        'and ISBN key) into one shared book plus library entries'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be merged')
+
+    def handle(self, *args, **options):
+        groups = (
+            Book.objects.order_by()
+            .values('title', 'author', 'published_date', 'isbn_key')
+            .annotate(copies=Count('pk'), first_pk=Min('pk'))
+            .filter(copies__gt=1)
+        )
+        # Materialize the (small) group list first: merging deletes rows from the grouped table
+        groups = list(groups)
+        merged = 0
+        for group in groups:
+            if options['dry_run']:
+                merged += group['copies'] - 1
+                continue
+            canonical = Book.objects.get(pk=group['first_pk'])
+            copy_ids = list(
+                Book.objects.filter(
+                    title=group['title'], author=group['author'],
+                    published_date=group['published_date'], isbn_key=group['isbn_key'],
+                ).exclude(pk=canonical.pk).values_list('pk', flat=True)
+            )
+            merged += merge_books(canonical, copy_ids)
+        verb = 'Would collapse' if options['dry_run'] else 'Collapsed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {merged} copies in {len(groups)} groups.'))
@@ -0,0 +1,96 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from books.fingerprint import book_fingerprint
+from books.merge import merge_books
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills in missing duplicate fingerprints (normalized title + author + year) and merges '
+        'books that share one, repointing tags, notifications, referrals and library entries'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Books fingerprinted per batch')
+        parser.add_argument('--group-batch-size', type=int, default=500, help='Duplicate groups loaded per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be merged')
+
+    def handle(self, *args, **options):
+        fingerprinted = self.backfill_fingerprints(options['batch_size'])
+        self.stdout.write(f'Fingerprinted {fingerprinted} books.')
+        merged, groups, skipped = self.merge_duplicates(options['group_batch_size'], options['dry_run'])
+        verb = 'Would merge' if options['dry_run'] else 'Merged'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {merged} duplicates in {groups} groups; skipped {skipped} groups with conflicting ISBNs.'
+        ))
+
+    def backfill_fingerprints(self, batch_size):
+        """
+        Compute fingerprints for books that have none, one primary key batch at a time.
+
+        Books saved through the model already carry one, so after the first
+        run only rows written by bulk operations are touched.
+
+        Returns:
+            Number of books fingerprinted
+        """
+        total = 0
+        last_pk = 0
+        pending = Book.objects.filter(fingerprint=None).order_by('pk').only('pk', 'title', 'author', 'published_date')
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return total
+            for book in batch:
+                book.fingerprint = book_fingerprint(book.title, book.author, book.published_date)
+            Book.objects.bulk_update(batch, ['fingerprint'])
+            total += len(batch)
+            last_pk = batch[-1].pk
+
+    def merge_duplicates(self, group_batch_size, dry_run):
+        """
+        Walk fingerprint groups with more than one book and merge each into one book.
+
+        Groups are read with keyset pagination over the fingerprint index, so
+        memory stays bounded by group_batch_size whatever the table size.
+        Groups holding two or more different real ISBNs are different editions
+        and are left alone.
+
+        Returns:
+            Tuple of (duplicates merged, groups seen, groups skipped)
+        """
+        merged = groups = skipped = 0
+        last_fingerprint = ''
+        duplicate_groups = (
+            Book.objects.exclude(fingerprint=None).order_by('fingerprint')
+            .values('fingerprint').annotate(copies=Count('pk')).filter(copies__gt=1)
+        )
+        while True:
+            fingerprints = list(
+                duplicate_groups.filter(fingerprint__gt=last_fingerprint).values_list('fingerprint', flat=True)[:group_batch_size]
+            )
+            if not fingerprints:
+                return merged, groups, skipped
+            members = {}
+            rows = Book.objects.filter(fingerprint__in=fingerprints).order_by('pk').values_list('fingerprint', 'pk', 'isbn_key')
+            for fingerprint, pk, isbn_key in rows:
+                members.setdefault(fingerprint, []).append((pk, isbn_key))
+            for fingerprint in fingerprints:
+                books = members.get(fingerprint, [])
+                if len(books) < 2:
+                    continue
+                groups += 1
+                real_isbns = {isbn_key for _, isbn_key in books if isbn_key and isbn_key.isdigit()}
+                if len(real_isbns) > 1:
+                    skipped += 1
+                    continue
+                # Keep the oldest book with a real ISBN, else the oldest book
+                keep_pk = next((pk for pk, isbn_key in books if isbn_key in real_isbns), books[0][0])
+                duplicate_ids = [pk for pk, _ in books if pk != keep_pk]
+                if dry_run:
+                    merged += len(duplicate_ids)
+                else:
+                    merged += merge_books(Book.objects.get(pk=keep_pk), duplicate_ids)
+            last_fingerprint = fingerprints[-1]
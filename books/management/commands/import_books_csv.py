@@ -0,0 +1,122 @@
+import csv
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from books.isbn import canonical_isbn
+from books.isbn_filter import existing_isbn_keys, load_isbn_filter
+from books.authors import author_name_key
+from books.fingerprint import book_fingerprint
+from books.models import Author, Book, ChangeLog, User
+from books.sequences import generate_js_isbn, js_isbn_allocator
+
+
+def parse_published_date(value):
+    """Parse 'YYYY-MM-DD' or a bare year; fall back to 2000-01-01 like Open Library imports."""
+    value = (value or '').strip()
+    try:
+        if len(value) == 4:
+            return date(int(value), 1, 1)
+        return date.fromisoformat(value)
+    except ValueError:
+        return date(2000, 1, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports books from a CSV file (title, author, published_date, isbn, description), '
+        'skipping ISBNs already in the catalog'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--user', help='Username recorded as added_by for the imported books')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows checked and inserted per batch')
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['user']:
+            owner = User.objects.filter(username=options['user']).first()
+            if owner is None:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        # Dedup goes through the Bloom filter first; only "maybe present" keys hit the database
+        isbn_filter = load_isbn_filter()
+        seen = set()
+        created = skipped = 0
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as f:
+                batch = []
+                for row in csv.DictReader(f):
+                    batch.append(row)
+                    if len(batch) >= options['batch_size']:
+                        c, s = self.import_batch(batch, owner, isbn_filter, seen)
+                        created, skipped = created + c, skipped + s
+                        batch = []
+                if batch:
+                    c, s = self.import_batch(batch, owner, isbn_filter, seen)
+                    created, skipped = created + c, skipped + s
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["path"]}: {exc}')
+        isbn_filter.save()
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} books, skipped {skipped} duplicates.'))
+
+    def import_batch(self, rows, owner, isbn_filter, seen):
+        """
+        Insert the rows of one batch whose ISBN is not yet in the catalog.
+
+        Args:
+            rows: CSV rows as dictionaries
+            owner: User recorded as added_by, or None
+            isbn_filter: Up-to-date IsbnFilter, updated with the inserted keys
+            seen: Keys already handled earlier in this import
+
+        Returns:
+            Tuple of (created, skipped) counts
+        """
+        keys = [canonical_isbn(row.get('isbn')) for row in rows]
+        authors = Author.resolve((row.get('author') or 'Unknown').strip()[:100] for row in rows)
+        existing = existing_isbn_keys([key for key in keys if key], isbn_filter)
+        max_length = Book._meta.get_field('isbn').max_length
+        books = []
+        highest_js = 0
+        for row, key in zip(rows, keys):
+            # Stored in canonical form: a hyphenated ISBN-13 would not fit the column
+            isbn = key
+            if not key or len(key) > max_length:
+                isbn = generate_js_isbn()
+                key = canonical_isbn(isbn)
+            elif key in existing or key in seen:
+                continue
+            elif key.startswith('JS') and key[2:].isdigit():
+                # Keep the JS ISBNs of a re-imported export, in generate_js_isbn's spelling
+                isbn = f'JS{int(key[2:]):05d}'
+                highest_js = max(highest_js, int(key[2:]))
+            seen.add(key)
+            title = (row.get('title') or 'No Title').strip()[:200]
+            author = (row.get('author') or 'Unknown').strip()[:100]
+            published_date = parse_published_date(row.get('published_date'))
+            books.append(Book(
+                title=title,
+                author=author,
+                author_ref=authors.get(author_name_key(author)),
+                fingerprint=book_fingerprint(title, author, published_date),
+                published_date=published_date,
+                isbn=isbn,
+                isbn_key=key,
+                description=(row.get('description') or '').strip(),
+                added_by=owner,
+            ))
+        if highest_js:
+            # Generated JS ISBNs must not run into the imported ones
+            js_isbn_allocator.skip_past(highest_js)
+        with transaction.atomic():
+            # bulk_create skips Book.save() and the signals, so isbn_key, author_ref and
+            # fingerprint are set above, and the change feed and author counts are written here
+            created = Book.objects.bulk_create(books)
+            ChangeLog.record_changes(('book', book.pk, owner.pk if owner else None, 'create') for book in created)
+            Author.refresh_book_counts({book.author_ref_id for book in created})
+        for book in created:
+            isbn_filter.add(book.isbn_key)
+        return len(created), len(rows) - len(created)
@@ -0,0 +1,59 @@
+import resource
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books import memory
+from books.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Traces the memory of pages such as /home/ and /api/books/all/ with tracemalloc, reporting peak memory, '
+        'top allocation sites and the size of a Book as a model instance versus values() rows'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', default=['/home/', '/api/books/all/'], help='Pages to trace (GET, rolled back)'
+        )
+        parser.add_argument('--username', default='seed1-reader0', help='User to request the pages as')
+        parser.add_argument('--top', type=int, default=10, help='Allocation sites to list per page')
+        parser.add_argument(
+            '--frames', type=int, default=25,
+            help='Stack depth traced per allocation; deep enough to reach the application line behind Django',
+        )
+        parser.add_argument('--rows', type=int, default=1000, help='Books loaded to measure per-row sizes')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user named {options['username']}; seed a catalog or pass --username")
+
+        started = memory.ensure_tracing(options['frames'])
+        try:
+            for path in options['paths']:
+                result = memory.trace_request(path, user, options['top'])
+                self.stdout.write(
+                    f"\nGET {path}  status {result['status']}, body {result['body'] / 1024:.1f} KB\n"
+                    f"  peak {self.mb(result['peak'])}, held with the response {self.mb(result['held'])}"
+                )
+                for site in result['sites']:
+                    self.stdout.write(f"  {self.mb(site['size']):>10} {site['count']:>9} blocks  {site['site']}")
+
+            sizes = memory.row_sizes(options['rows'])
+        finally:
+            if started:
+                memory.tracemalloc.stop()
+
+        self.stdout.write(f"\nPer-row size of {sizes[0]['rows']} books:")
+        for size in sizes:
+            self.stdout.write(f"  {size['kind']:<22} {size['bytes_per_row']:>7} bytes")
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+        self.stdout.write(f'\nProcess max RSS: {self.mb(max_rss)} (includes tracemalloc overhead)')
+
+    @staticmethod
+    def mb(size):
+        """Format a byte count in megabytes."""
+        return f'{size / memory.MB:.2f} MB'
@@ -0,0 +1,151 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+# Spawned workers import this module before Django is set up, so models are imported lazily.
+# Set in each worker process by _init_worker, or in-process when running with one worker.
+_context = None
+
+
+def _set_context(state):
+    """Keep the run context for the blocks written by this process."""
+    from books.seeding import SeedContext
+    global _context
+    _context = SeedContext(**state)
+
+
+def _init_worker(state):
+    """Prepare a worker process: set up Django, needed when workers are spawned rather than forked."""
+    import django
+    django.setup()
+    _set_context(state)
+
+
+def _write_block(kind, block, start, stop):
+    """Write one block of books or notifications with the worker's context."""
+    from books import seeding
+    writer = seeding.write_book_block if kind == 'book' else seeding.write_notification_block
+    return writer(_context, block, start, stop)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a deterministic synthetic catalog of users, authors, tagged books with covers '
+        'and notifications for benchmarks, written in parallel with chunked bulk inserts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Users to create')
+        parser.add_argument('--books', type=int, default=100000, help='Books to create')
+        parser.add_argument('--authors', type=int, help='Distinct authors (default: one per 8 books)')
+        parser.add_argument('--tags', type=int, default=30, help='Genre tags to spread over the books')
+        parser.add_argument('--notifications', type=int, default=50000, help='Notifications to create')
+        parser.add_argument('--seed', type=int, default=1, help='Dataset seed, 0-99; the same seed gives the same catalog')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Writer processes')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per INSERT statement')
+        parser.add_argument('--password', default='seed-password', help='Password of every seeded user')
+        parser.add_argument('--covers', type=int, default=12, help='Distinct placeholder covers (0 for none)')
+
+    def handle(self, *args, **options):
+        from books import seeding
+        from books.models import Author, Tag, User
+
+        seed, workers = options['seed'], options['workers']
+        books, notifications = options['books'], options['notifications']
+        if not 0 <= seed <= 99:
+            raise CommandError('--seed must be between 0 and 99; it is part of every seeded ISBN')
+        if not 0 <= books < 10 ** 7:
+            raise CommandError('--books must be between 0 and 9,999,999 per seed')
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+        if not 1 <= options['tags'] <= len(seeding.GENRES):
+            raise CommandError(f'--tags must be between 1 and {len(seeding.GENRES)}')
+        if workers < 1 or options['chunk_size'] < 1:
+            raise CommandError('--workers and --chunk-size must be at least 1')
+        if User.objects.filter(username=seeding.seeded_username(seed, 0)).exists():
+            raise CommandError(f'Seed {seed} is already loaded; pick another seed or start from an empty database')
+        if connection.vendor == 'sqlite' and workers > 1:
+            self.stdout.write(self.style.WARNING('SQLite allows a single writer; seeding with one worker.'))
+            workers = 1
+
+        started = time.perf_counter()
+        user_ids = self.phase(
+            'users', lambda: seeding.seed_users(
+                seed, options['users'], make_password(options['password']), options['chunk_size']
+            ),
+        )
+        authors = self.phase('authors', lambda: self.seed_authors(options['authors'] or max(1, books // 8)))
+        tag_names = seeding.GENRES[:options['tags']]
+        Tag.objects.bulk_create([Tag(name=name) for name in tag_names], ignore_conflicts=True)
+        tag_pks = dict(Tag.objects.filter(name__in=tag_names).values_list('name', 'pk'))
+        covers = seeding.make_covers(seed, options['covers']) if options['covers'] else []
+
+        state = {
+            'seed': seed, 'chunk_size': options['chunk_size'], 'user_ids': user_ids, 'authors': authors,
+            'tag_ids': [tag_pks[name] for name in tag_names], 'covers': covers,
+        }
+        results = self.phase('books', lambda: self.run_blocks('book', books, state, workers))
+        state['book_ids'] = [pk for _, pks in sorted(results) for pk in pks]
+        author_ids = sorted({pk for _, pk in authors})
+        for start in range(0, len(author_ids), 5000):
+            Author.refresh_book_counts(author_ids[start:start + 5000])
+        self.phase('notifications', lambda: self.run_blocks('notification', notifications, state, workers))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users, {len(authors)} authors, {len(state["book_ids"])} books '
+            f'and {notifications} notifications with seed {seed} in {time.perf_counter() - started:.1f}s.'
+        ))
+
+    def phase(self, name, run):
+        """Run one seeding phase and report its duration."""
+        started = time.perf_counter()
+        result = run()
+        self.stdout.write(f'  {name}: {time.perf_counter() - started:.1f}s')
+        return result
+
+    def seed_authors(self, count):
+        """
+        Create the generated authors in chunks.
+
+        Returns:
+            List of (name, Author primary key) pairs in generation order
+        """
+        from books.authors import author_name_key
+        from books.models import Author
+        from books.seeding import author_names
+
+        names = author_names(count)
+        authors = []
+        for start in range(0, len(names), 5000):
+            chunk = names[start:start + 5000]
+            resolved = Author.resolve(chunk)
+            authors.extend((name, resolved[author_name_key(name)].pk) for name in chunk)
+        return authors
+
+    def run_blocks(self, kind, total, state, workers):
+        """
+        Write every block of one kind of row, in this process or across a pool of workers.
+
+        Returns:
+            List of the block writers' results
+        """
+        from books.seeding import block_ranges
+
+        blocks = list(block_ranges(total))
+        if workers == 1 or len(blocks) <= 1:
+            _set_context(state)
+            return [_write_block(kind, *block) for block in blocks]
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+            futures = [pool.submit(_write_block, kind, *block) for block in blocks]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.append(future.result())
+                if done % 100 == 0:
+                    self.stdout.write(f'    {kind}s: {done}/{len(blocks)} blocks')
+        return results
@@ -0,0 +1,225 @@
+"""
+Memory diagnostics for the Book Catalog application.
+
+tracemalloc records every Python allocation together with the lines that
+made it. trace_request runs one request in process, rolled back like the
+benchmark's query counts, and reports its peak memory, the memory still
+held once the response is built and the sites that allocated it.
+row_sizes measures what a Book costs as a model instance, a values() dict
+and a values_list() tuple. The memory_report command prints both for
+chosen pages against the configured database, e.g. one filled by
+seed_catalog.
+
+With MEMORY_DIAGNOSTICS on, MemoryDiagnosticsMiddleware traces every
+request and logs its peak and top allocation sites to the books.memory
+logger. tracemalloc makes Python several times slower and its counters are
+per process, so the mode is for one request at a time per process
+(gunicorn sync workers, runserver --nothreading), not for production.
+"""
+
+import gc
+import json
+import logging
+import os
+import tracemalloc
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.deprecation import MiddlewareMixin
+
+from .models import Book
+from .profiling import short_path
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+# tracemalloc's own bookkeeping is not part of what a request costs
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, os.path.abspath(__file__)),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+)
+
+
+def _is_app_frame(filename):
+    return filename.startswith(str(settings.BASE_DIR)) and 'site-packages' not in filename
+
+
+def describe_site(traceback):
+    """
+    Name an allocation site by its innermost line and the application line that led to it.
+
+    Args:
+        traceback: tracemalloc.Traceback, oldest frame first
+
+    Returns:
+        "file:line", followed by "(from file:line)" when the innermost line is library code
+    """
+    frames = list(reversed(traceback))
+    site = f'{short_path(frames[0].filename)}:{frames[0].lineno}'
+    if not _is_app_frame(frames[0].filename):
+        caller = next((frame for frame in frames if _is_app_frame(frame.filename)), None)
+        if caller is not None:
+            site += f' (from {short_path(caller.filename)}:{caller.lineno})'
+    return site
+
+
+def allocation_sites(before, after, limit=10):
+    """
+    List the sites that allocated the memory held in one snapshot but not the other.
+
+    Allocations are grouped by describe_site, so with enough traced frames
+    the same Django line reached from different views is listed per view.
+
+    Args:
+        before: tracemalloc.Snapshot taken first
+        after: tracemalloc.Snapshot taken later
+        limit: Maximum number of sites
+
+    Returns:
+        List of dicts with site, size (bytes) and count (blocks), largest first
+    """
+    sites = {}
+    for stat in after.filter_traces(_IGNORED).compare_to(before.filter_traces(_IGNORED), 'traceback'):
+        site = sites.setdefault(describe_site(stat.traceback), {'size': 0, 'count': 0})
+        site['size'] += stat.size_diff
+        site['count'] += stat.count_diff
+    ranked = sorted(sites.items(), key=lambda item: -item[1]['size'])
+    return [{'site': name, **site} for name, site in ranked[:limit] if site['size'] > 0]
+
+
+def ensure_tracing(frames=1):
+    """
+    Start tracemalloc unless it is already running.
+
+    Args:
+        frames: Stack depth stored per allocation; more frames find the application line behind
+            library allocations but cost more memory and time
+
+    Returns:
+        True when tracing was started here
+    """
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def trace_request(path, user=None, limit=10):
+    """
+    Trace the memory of one GET request, in process and rolled back.
+
+    The test client keeps the template context and serializer data with the
+    response, so the held memory and its sites show what the request's
+    querysets, serialized rows and rendered body cost. Peak memory also
+    counts temporaries freed before the response was returned.
+
+    Args:
+        path: URL path, with query string
+        user: User to log in as, or None
+        limit: Maximum number of allocation sites
+
+    Returns:
+        Dictionary with status, body (bytes), peak and held (bytes) and sites
+    """
+    started = ensure_tracing()
+    client = Client()
+    try:
+        with override_settings(ALLOWED_HOSTS=['*']), transaction.atomic():
+            if user is not None:
+                session = client.session
+                session['user_id'] = user.pk
+                session.save()
+            gc.collect()
+            before = tracemalloc.take_snapshot()
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            response = client.get(path)
+            body = len(b''.join(response.streaming_content)) if response.streaming else len(response.content)
+            held, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            transaction.set_rollback(True)
+        return {
+            'status': response.status_code,
+            'body': body,
+            'peak': peak - base,
+            'held': held - base,
+            'sites': allocation_sites(before, after, limit),
+        }
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _traced_bytes(load):
+    """Call load() and return its result with the traced memory it still holds."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = load()
+    return rows, tracemalloc.get_traced_memory()[0] - before
+
+
+def row_sizes(limit=1000):
+    """
+    Measure the memory of the same books as model instances, values() dicts and values_list() tuples.
+
+    Args:
+        limit: Number of books to load
+
+    Returns:
+        List of dicts with kind, rows and bytes_per_row
+    """
+    started = ensure_tracing()
+    try:
+        queryset = Book.objects.order_by('pk')[:limit]
+        sizes = []
+        for kind, load in (
+            ('model instances', lambda: list(queryset.all())),
+            ('values() dicts', lambda: list(queryset.values())),
+            ('values_list() tuples', lambda: list(queryset.values_list())),
+        ):
+            rows, size = _traced_bytes(load)
+            sizes.append({'kind': kind, 'rows': len(rows), 'bytes_per_row': size // len(rows) if rows else 0})
+            del rows
+        return sizes
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+class MemoryDiagnosticsMiddleware(MiddlewareMixin):
+    """
+    Log the peak traced memory and top allocation sites of every request.
+
+    Only active with MEMORY_DIAGNOSTICS; tracing then stays on for the life
+    of the process.
+    """
+
+    def process_request(self, request):
+        if not settings.MEMORY_DIAGNOSTICS:
+            return
+        ensure_tracing(settings.MEMORY_DIAGNOSTICS_FRAMES)
+        before = tracemalloc.take_snapshot()
+        request._memory = (before, tracemalloc.get_traced_memory()[0])
+        tracemalloc.reset_peak()
+
+    def process_response(self, request, response):
+        state = getattr(request, '_memory', None)
+        if state is None:
+            return response
+        before, base = state
+        held, peak = tracemalloc.get_traced_memory()
+        sites = allocation_sites(before, tracemalloc.take_snapshot(), limit=5)
+        match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'peak_mb': round((peak - base) / MB, 2),
+            'held_mb': round((held - base) / MB, 2),
+            'sites': [{**site, 'size': round(site['size'] / 1024, 1)} for site in sites],
+        }))
+        return response
@@ -0,0 +1,82 @@
+"""
+Book merging for the Book Catalog application.
+
+Folds duplicate Book rows into one canonical book. Everything that pointed at
+a duplicate (notifications, admin referrals, tags and library entries) is
+repointed with set-based UPDATE/INSERT statements, and users who owned a
+duplicate get the canonical book in their library instead, keeping their read
+status. The query count depends on the number of duplicates merged at once,
+not on how many rows reference them. The UPDATEs bypass the ChangeLog
+signals, so the changes they make are recorded in the sync feed explicitly,
+in the same transaction. Deletes run with the per-row signal handlers
+switched off: their tombstones go into the same bulk insert, and each
+affected author is recounted once.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Author, Book, ChangeLog, LibraryEntry, Notification, User
+from .signals import bulk_delete
+
+
+def merge_books(canonical, duplicate_ids):
+    """
+    Merge duplicate books into a canonical book and delete the duplicates.
+
+    Args:
+        canonical: Book that is kept
+        duplicate_ids: Primary keys of the books folded into it (the canonical pk is ignored)
+
+    Returns:
+        Number of duplicate books deleted
+    """
+    duplicate_ids = [pk for pk in duplicate_ids if pk != canonical.pk]
+    if not duplicate_ids:
+        return 0
+    with transaction.atomic(), bulk_delete():
+        duplicates = Book.objects.filter(pk__in=duplicate_ids)
+        rows = list(duplicates.values_list('pk', 'added_by_id', 'author_ref_id'))
+
+        # Owners of a duplicate keep the book through a library entry
+        entries = [
+            LibraryEntry(user_id=owner_id, book=canonical, is_read=is_read)
+            for owner_id, is_read in duplicates.exclude(added_by=None).values_list('added_by_id', 'is_read')
+            if owner_id != canonical.added_by_id
+        ]
+        LibraryEntry.objects.bulk_create(entries, ignore_conflicts=True)
+        changes = [('book', canonical.pk, owner_id, 'create') for owner_id in {entry.user_id for entry in entries}]
+        changes += [('book', pk, owner_id, 'delete') for pk, owner_id, _ in rows]
+
+        # Library entries of duplicates move over unless the user already has the canonical book
+        dropped = LibraryEntry.objects.filter(
+            book_id__in=duplicate_ids,
+            user_id__in=LibraryEntry.objects.filter(book=canonical).values('user_id'),
+        )
+        changes += [('book', book_id, user_id, 'delete') for user_id, book_id in dropped.values_list('user_id', 'book_id')]
+        dropped.delete()
+        moved = LibraryEntry.objects.filter(book_id__in=duplicate_ids)
+        for user_id, book_id in moved.values_list('user_id', 'book_id'):
+            changes += [('book', book_id, user_id, 'delete'), ('book', canonical.pk, user_id, 'create')]
+        moved.update(book=canonical, updated_at=timezone.now())
+
+        notifications = Notification.objects.filter(book_recommendation_id__in=duplicate_ids)
+        changes += [
+            ('notification', pk, user_id, 'update') for pk, user_id in notifications.values_list('pk', 'user_id')
+        ]
+        notifications.update(book_recommendation=canonical, updated_at=timezone.now())
+        User.objects.filter(admin_referral_id__in=duplicate_ids).update(admin_referral=canonical)
+
+        # Union of tags, inserted directly into the M2M table
+        Through = Book.tags.through
+        tag_ids = set(Through.objects.filter(book_id__in=duplicate_ids).values_list('tag_id', flat=True))
+        tag_ids -= set(Through.objects.filter(book=canonical).values_list('tag_id', flat=True))
+        Through.objects.bulk_create(Through(book_id=canonical.pk, tag_id=tag_id) for tag_id in tag_ids)
+        if tag_ids:
+            holders = set(LibraryEntry.objects.filter(book=canonical).values_list('user_id', flat=True))
+            changes += [('book', canonical.pk, user_id, 'update') for user_id in holders | {canonical.added_by_id}]
+
+        ChangeLog.record_changes(changes)
+        _, deleted = duplicates.delete()
+        Author.refresh_book_counts({author_id for _, _, author_id in rows})
+    return deleted.get('books.Book', 0)
@@ -0,0 +1,212 @@
+"""
+Prometheus metrics for the Book Catalog application.
+
+MetricsMiddleware records, per route (the URL name), request latency,
+response size and the number and time of database queries. It also counts
+conditional GETs answered with 304 Not Modified, the application's HTTP
+cache, so hit ratios can be graphed. Open Library calls are timed
+separately with observe_open_library, and password hashing (see
+books/passwords.py) with observe_password_hash and reject_password_hash.
+
+Under gunicorn every worker is its own process. When PROMETHEUS_MULTIPROC_DIR
+is set, prometheus_client keeps the values in memory-mapped files in that
+directory, and /metrics merges the files of all workers. gunicorn.conf.py
+empties the directory on startup and marks exited workers dead. The image
+sets the variable for every process, including runserver and management
+commands, so the directory is created here before the first metric opens
+its file.
+"""
+
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+HASH_BUCKETS = (0.001, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+REQUEST_LATENCY = Histogram(
+    'catalog_http_request_duration_seconds', 'Time to answer a request, by route',
+    ['method', 'route', 'status'],
+)
+RESPONSE_SIZE = Histogram(
+    'catalog_http_response_size_bytes', 'Size of response bodies, by route',
+    ['method', 'route'], buckets=SIZE_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'catalog_http_request_db_queries', 'Database queries run while answering a request, by route',
+    ['route'], buckets=QUERY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    'catalog_http_request_db_duration_seconds', 'Time spent in database queries per request, by route',
+    ['route'], buckets=DB_TIME_BUCKETS,
+)
+CONDITIONAL_REQUESTS = Counter(
+    'catalog_conditional_requests_total', 'Conditional GETs by route and result (hit = 304 Not Modified)',
+    ['route', 'result'],
+)
+OPEN_LIBRARY_LATENCY = Histogram(
+    'catalog_open_library_request_duration_seconds', 'Latency of Open Library API calls',
+    ['endpoint', 'status'],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    'catalog_password_hash_duration_seconds', 'CPU-bound time to hash or check a password, by operation',
+    ['operation'], buckets=HASH_BUCKETS,
+)
+PASSWORD_HASH_WAIT = Histogram(
+    'catalog_password_hash_wait_seconds', 'Time a password hash waited for a free hashing worker',
+    ['operation'], buckets=HASH_BUCKETS,
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    'catalog_password_hashes_in_flight', 'Password hashes running or waiting in the hashing pools',
+    multiprocess_mode='livesum',
+)
+PASSWORD_HASH_REJECTED = Counter(
+    'catalog_password_hash_rejected_total', 'Password hashes refused because the hashing pool was saturated',
+    ['operation'],
+)
+
+
+class _QueryTimer:
+    """execute_wrapper hook adding up the number and duration of queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def route_name(request):
+    """Label a request by its URL name, keeping label values bounded."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+def response_size(response):
+    """Body size of a response, or None for streaming responses without Content-Length."""
+    if response.streaming:
+        length = response.get('Content-Length')
+        return int(length) if length and length.isdigit() else None
+    return len(response.content)
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """
+    Record latency, response size, database usage and conditional GET results per route.
+
+    Listed near the top of MIDDLEWARE, so the measured time and queries
+    include the other middleware (sessions, messages) as well as the view.
+    Under ASGI its hooks run on the request's thread, where the request's
+    ORM calls run too, so async views are measured the same way.
+    """
+
+    def process_request(self, request):
+        queries = _QueryTimer()
+        wrapper = connection.execute_wrapper(queries)
+        wrapper.__enter__()
+        request._metrics = (queries, wrapper, time.perf_counter())
+
+    def process_response(self, request, response):
+        queries, wrapper, start = request._metrics
+        wrapper.__exit__(None, None, None)
+        elapsed = time.perf_counter() - start
+
+        route = route_name(request)
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(elapsed)
+        REQUEST_QUERIES.labels(route).observe(queries.count)
+        REQUEST_DB_TIME.labels(route).observe(queries.seconds)
+        size = response_size(response)
+        if size is not None:
+            RESPONSE_SIZE.labels(request.method, route).observe(size)
+        if request.method in ('GET', 'HEAD') and (
+            'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+        ):
+            CONDITIONAL_REQUESTS.labels(route, 'hit' if response.status_code == 304 else 'miss').inc()
+        return response
+
+
+def observe_open_library(endpoint, started, status):
+    """
+    Record one Open Library call.
+
+    Args:
+        endpoint: Open Library API used (search, subjects, works, authors)
+        started: time.perf_counter() value taken before the call
+        status: HTTP status code, or 'error' when the call raised
+    """
+    OPEN_LIBRARY_LATENCY.labels(endpoint, str(status)).observe(time.perf_counter() - started)
+
+
+def observe_password_hash(operation, waited, hashed):
+    """
+    Record one password hash.
+
+    Args:
+        operation: "make" or "check"
+        waited: Seconds spent waiting for a hashing worker
+        hashed: Seconds spent hashing
+    """
+    PASSWORD_HASH_WAIT.labels(operation).observe(max(waited, 0.0))
+    PASSWORD_HASH_DURATION.labels(operation).observe(hashed)
+
+
+def reject_password_hash(operation):
+    """Count a password hash refused by a saturated hashing pool."""
+    PASSWORD_HASH_REJECTED.labels(operation).inc()
+
+
+def render_metrics(multiprocess_dir=None):
+    """
+    Render all metrics in the Prometheus text format.
+
+    Args:
+        multiprocess_dir: Directory of the multiprocess store (default: PROMETHEUS_MULTIPROC_DIR,
+            falling back to this process's own metrics when unset)
+
+    Returns:
+        Exposition text as bytes
+    """
+    multiprocess_dir = multiprocess_dir or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not multiprocess_dir:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=multiprocess_dir)
+    return generate_latest(registry)
+
+
+def metrics_view(request):
+    """
+    Expose the metrics of every worker for Prometheus to scrape.
+
+    When METRICS_TOKEN is set, scrapers must send it as a bearer token.
+
+    Args:
+        request: Django HttpRequest object
+
+    Returns:
+        HttpResponse in the Prometheus text exposition format
+    """
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE_LATEST)
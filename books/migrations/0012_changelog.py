@@ -0,0 +1,52 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:33
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_changelog(apps, schema_editor):
+    """Seed the feed with a create entry per existing row, so since=0 is a full sync."""
+    ChangeLog = apps.get_model('books', 'ChangeLog')
+    sources = [
+        ('book', apps.get_model('books', 'Book'), 'added_by_id'),
+        ('notification', apps.get_model('books', 'Notification'), 'user_id'),
+    ]
+    for model_name, model, owner_field in sources:
+        last_pk = 0
+        while True:
+            rows = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', owner_field)[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            ChangeLog.objects.bulk_create(
+                ChangeLog(model=model_name, object_id=pk, owner_id=owner_id, action='create')
+                for pk, owner_id in rows
+            )
+            last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_book_updated_at_notification_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('book', 'Book'), ('notification', 'Notification')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('owner_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', 'id'], name='changelog_owner_seq_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changelog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+BLOCK_SIZE = 100
+
+
+def seed_js_isbn_sequence(apps, schema_editor):
+    """Start the JS ISBN allocator above every JS number already in use."""
+    Book = apps.get_model('books', 'Book')
+    SequenceCounter = apps.get_model('books', 'SequenceCounter')
+    highest = 0
+    js_isbns = Book.objects.filter(isbn__istartswith='js').values_list('isbn', flat=True)
+    for isbn in js_isbns.iterator(chunk_size=2000):
+        suffix = isbn[2:]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    start = highest + 1
+    SequenceCounter.objects.update_or_create(name='js_isbn', defaults={'next_value': start})
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS books_js_isbn_seq START WITH {int(start)} INCREMENT BY {BLOCK_SIZE}"
+        )
+
+
+def drop_js_isbn_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP SEQUENCE IF EXISTS books_js_isbn_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0012_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+        ),
+        migrations.RunPython(seed_js_isbn_sequence, drop_js_isbn_sequence),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:39
+
+from django.db import migrations, models
+
+from books.isbn import canonical_isbn
+
+BATCH_SIZE = 2000
+
+
+def backfill_isbn_keys(apps, schema_editor):
+    """Compute the canonical ISBN key for existing books in primary key batches."""
+    Book = apps.get_model('books', 'Book')
+    last_pk = 0
+    while True:
+        batch = list(Book.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'isbn')[:BATCH_SIZE])
+        if not batch:
+            break
+        for book in batch:
+            book.isbn_key = canonical_isbn(book.isbn)
+        Book.objects.bulk_update(batch, ['isbn_key'])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0013_sequencecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='isbn_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.RunPython(backfill_isbn_keys, migrations.RunPython.noop),
+    ]
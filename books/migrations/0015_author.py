@@ -0,0 +1,72 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+from books.authors import author_name_key
+
+BATCH_SIZE = 2000
+
+
+def backfill_authors(apps, schema_editor):
+    """
+    Link existing books to deduplicated Author rows in primary key batches.
+
+    Each batch creates the authors it has not seen yet (first spelling wins),
+    then points its books at them. Book counts are filled in once at the end.
+    """
+    Author = apps.get_model('books', 'Author')
+    Book = apps.get_model('books', 'Book')
+    last_pk = 0
+    while True:
+        batch = list(Book.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'author')[:BATCH_SIZE])
+        if not batch:
+            break
+        names = {}
+        for book in batch:
+            key = author_name_key(book.author)
+            if key is not None:
+                names.setdefault(key, book.author.strip()[:100])
+        known = set(Author.objects.filter(name_key__in=names).values_list('name_key', flat=True))
+        Author.objects.bulk_create(Author(name=name, name_key=key) for key, name in names.items() if key not in known)
+        author_ids = dict(Author.objects.filter(name_key__in=names).values_list('name_key', 'pk'))
+        for book in batch:
+            book.author_ref_id = author_ids.get(author_name_key(book.author))
+        Book.objects.bulk_update(batch, ['author_ref'])
+        last_pk = batch[-1].pk
+    counts = (
+        Book.objects.filter(author_ref=OuterRef('pk')).order_by()
+        .values('author_ref').annotate(total=Count('pk')).values('total')
+    )
+    Author.objects.update(book_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0014_book_isbn_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100)),
+                ('name_key', models.CharField(max_length=100, unique=True)),
+                ('book_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-book_count', 'name'], name='author_popular_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='author_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='books.author'),
+        ),
+        migrations.RunPython(backfill_authors, migrations.RunPython.noop),
+    ]
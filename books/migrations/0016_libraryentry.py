@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-19 16:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0015_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_read', models.BooleanField(default=False)),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_entries', to='books.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_entries', to='books.user')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='libraryentry',
+            constraint=models.UniqueConstraint(fields=('user', 'book'), name='library_entry_user_book_uniq'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-19 20:12
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+AddIndexConcurrentlyOnPostgres = import_module('books.migrations.0018_composite_indexes').AddIndexConcurrentlyOnPostgres
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('books', '0018_composite_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name='changelog',
+            index=models.Index(fields=['created_at', 'id'], name='changelog_created_seq_idx'),
+        ),
+    ]
@@ -5,9 +5,19 @@ This module defines the data structures used to store user accounts and book inf
 in the database. It includes models for user authentication, book management, and notifications.
 """
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.contrib.auth import hashers
 from django.contrib.auth.models import AbstractUser
-from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+from .passwords import make_password
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from .authors import author_name_key
+from .fingerprint import book_fingerprint
+from .isbn import canonical_isbn
 
 class User(models.Model):
     """
@@ -32,16 +42,35 @@ class User(models.Model):
     admin_referral = models.ForeignKey('Book', on_delete=models.SET_NULL, null=True, blank=True, related_name='referred_users', help_text='Book selected by admin as a referral for this user.')
     user_notes = models.TextField(blank=True, null=True, help_text='User personal notes or referral info.')
     
+    # Set by set_password once the password of a new user is hashed
+    _password_hashed = False
+    
+    def set_password(self, raw_password):
+        """
+        Hash a password in the bounded hashing pool and store it.
+        
+        Used by the request entry points (registration), so that a burst of
+        sign-ups waits on the pool like logins do.
+        
+        Raises:
+            PasswordHashingBusy: The pool is saturated
+        """
+        self.password = make_password(raw_password)
+        self._password_hashed = True
+    
     def save(self, *args, **kwargs):
         """
         Override save method to automatically hash passwords.
         
         This ensures that passwords are never stored in plain text. The hashing
         only occurs when creating a new user, not when updating existing users.
+        Unless set_password already hashed it in the pool, the password is
+        hashed on the calling thread, so commands, migrations, the shell and
+        tests never see PasswordHashingBusy.
         """
         # Hash the password before saving
-        if not self.pk:  # Only hash on creation, not update
-            self.password = make_password(self.password)
+        if not self.pk and not self._password_hashed:  # Only hash on creation, not update
+            self.password = hashers.make_password(self.password)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -64,6 +93,94 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+class Author(models.Model):
+    """
+    Model for a book author, shared by all books credited to them.
+    
+    Authors are deduplicated on a normalized name key, so different spellings
+    of the same name map to one row. The number of books is kept on the row,
+    so browse and autocomplete never have to count books.
+    
+    Attributes:
+        name (str): Display name, as first seen (max 100 characters)
+        name_key (str): Normalized name used for dedup and prefix lookups (unique)
+        book_count (int): Number of books credited to the author
+        created_at (datetime): When the author was first seen
+    """
+    name = models.CharField(max_length=100, db_index=True)
+    name_key = models.CharField(max_length=100, unique=True)
+    book_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-book_count', 'name'], name='author_popular_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def for_name(cls, name):
+        """
+        Get or create the author for a name.
+        
+        Args:
+            name: Author name as entered
+            
+        Returns:
+            Author instance, or None for empty names
+        """
+        key = author_name_key(name)
+        if key is None:
+            return None
+        author, _ = cls.objects.get_or_create(name_key=key, defaults={'name': name.strip()[:100]})
+        return author
+
+    @classmethod
+    def resolve(cls, names):
+        """
+        Get or create the authors for many names with a fixed number of queries.
+        
+        Args:
+            names: Iterable of author names
+            
+        Returns:
+            Dictionary mapping normalized name keys to Author instances
+        """
+        by_key = {}
+        for name in names:
+            key = author_name_key(name)
+            if key is not None:
+                by_key.setdefault(key, name.strip()[:100])
+        authors = {author.name_key: author for author in cls.objects.filter(name_key__in=by_key)}
+        missing = [cls(name=name, name_key=key) for key, name in by_key.items() if key not in authors]
+        if missing:
+            # Another import may insert the same keys concurrently; re-read instead of trusting pks
+            cls.objects.bulk_create(missing, ignore_conflicts=True)
+            authors.update(
+                (author.name_key, author)
+                for author in cls.objects.filter(name_key__in=[a.name_key for a in missing])
+            )
+        return authors
+
+    @classmethod
+    def refresh_book_counts(cls, author_ids):
+        """
+        Recount the books of the given authors with one UPDATE.
+        
+        Args:
+            author_ids: Iterable of Author primary keys (None values are ignored)
+        """
+        author_ids = [author_id for author_id in author_ids if author_id is not None]
+        if not author_ids:
+            return
+        counts = (
+            Book.objects.filter(author_ref=OuterRef('pk')).order_by()
+            .values('author_ref').annotate(total=Count('pk')).values('total')
+        )
+        cls.objects.filter(pk__in=author_ids).update(book_count=Coalesce(Subquery(counts), 0))
+
 class Book(models.Model):
     """
     Model for storing book information in the catalog.
@@ -78,17 +195,25 @@ class Book(models.Model):
         description (str): Optional book description/summary
         published_date (date): When the book was published
         isbn (str): International Standard Book Number (unique, optional)
+        isbn_key (str): Canonical form of the ISBN used for lookups and duplicate checks
+        author_ref (Author): Normalized author record, kept in sync with author
+        fingerprint (str): Hash of normalized title, author and year used to find duplicates
         is_read (bool): Whether the user has read this book
         view_count (int): Number of times the book has been viewed
         added_by (User): User who added the book to the catalog
         cover_image (ImageField): Optional cover image for the book
         tags (ManyToManyField): Tags/categories for this book
+        created_at (datetime): When the book was added to the catalog
+        updated_at (datetime): When the book was last modified
     """
     title = models.CharField(max_length=200)
     author = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     published_date = models.DateField()
     isbn = models.CharField(max_length=13, unique=True, blank=True, null=True)
+    isbn_key = models.CharField(max_length=20, blank=True, null=True, db_index=True, editable=False)
+    author_ref = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='books')
+    fingerprint = models.CharField(max_length=32, blank=True, null=True, db_index=True, editable=False)
     is_read = models.BooleanField(default=False)
     view_count = models.IntegerField(default=0)
     added_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='added_books')
@@ -100,16 +225,123 @@ class Book(models.Model):
     )
     tags = models.ManyToManyField(Tag, blank=True, related_name='books', help_text='Tags/categories for this book.')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta options: composite index matching the popularity query."""
+        indexes = [
+            models.Index(fields=['is_read', 'view_count'], name='book_read_views_idx'),
+        ]
 
     def __str__(self):
         """Return the book title as the string representation."""
         return self.title
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded author name, so saves only resolve the Author when it changes."""
+        instance = super().from_db(db, field_names, values)
+        instance._saved_author = instance.__dict__.get('author')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save method to keep the canonical ISBN key, fingerprint and author in sync.
+        
+        The ISBN key and duplicate fingerprint are recomputed on every save. The
+        Author record is resolved when the author name changed (or was never
+        resolved), and the book counts of the old and new author are refreshed.
+        When only some fields are being saved, the derived fields are written
+        along with them.
+        """
+        self.isbn_key = canonical_isbn(self.isbn)
+        self.fingerprint = book_fingerprint(self.title, self.author, self.published_date)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'isbn' in update_fields:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'isbn_key'}
+        if update_fields is not None and {'title', 'author', 'published_date'} & set(update_fields):
+            update_fields = kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+        previous_author_id = self.author_ref_id
+        if update_fields is None or 'author' in update_fields:
+            if self.author_ref_id is None or self.author != getattr(self, '_saved_author', None):
+                self.author_ref = Author.for_name(self.author)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'author_ref'}
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        self._saved_author = self.author
+        if created or self.author_ref_id != previous_author_id:
+            Author.refresh_book_counts({previous_author_id, self.author_ref_id})
+    
     def increment_view_count(self):
         """Increment the view count for this book."""
         self.view_count += 1
         self.save(update_fields=['view_count'])
     
+    @classmethod
+    def increment_view_counts(cls, books):
+        """
+        Increment the view count of many books with one UPDATE per 500 books.
+        
+        The in-memory instances are bumped too, so a page rendering them shows
+        the new counts. Like increment_view_count, nothing is logged to the
+        change feed.
+        
+        Args:
+            books: Iterable of Book instances (an unevaluated queryset is evaluated)
+        """
+        books = list(books)
+        ids = [book.pk for book in books]
+        # Chunked to stay under the backends' bound parameter limits on large pages
+        for start in range(0, len(ids), 500):
+            cls.objects.filter(pk__in=ids[start:start + 500]).update(view_count=F('view_count') + 1)
+        for book in books:
+            book.view_count += 1
+    
+    @classmethod
+    def in_library_of(cls, user):
+        """
+        Get the books in a user's library: those they added plus those saved to it.
+        
+        The two sources are combined with a UNION subquery rather than an OR,
+        so each side is read through its own index instead of scanning every book.
+        """
+        own = cls.objects.filter(added_by=user).values('pk')
+        saved = LibraryEntry.objects.filter(user=user).values('book_id')
+        return cls.objects.filter(pk__in=own.union(saved))
+    
+    @classmethod
+    def read_by_q(cls, user, is_read):
+        """
+        Build a filter for books by their read status as seen by a user.
+        
+        A user's library entry overrides the book's own read flag. Expressed
+        as two IN subqueries, so the check runs once per query rather than
+        once per book like filtering on a correlated Coalesce annotation.
+        
+        Args:
+            user: User whose library entries apply
+            is_read: Read status to match
+            
+        Returns:
+            Q object for filtering Book querysets
+        """
+        entries = LibraryEntry.objects.filter(user=user)
+        return Q(pk__in=entries.filter(is_read=is_read).values('book_id')) | (
+            Q(is_read=is_read) & ~Q(pk__in=entries.values('book_id'))
+        )
+    
+    @classmethod
+    def with_read_status(cls, queryset, user):
+        """
+        Annotate books with their read status as seen by a user (reader_is_read).
+        
+        The user's library entry wins over the book's own read flag, the
+        same rule read_by_q filters by.
+        """
+        entry_is_read = LibraryEntry.objects.filter(user=user.pk, book=OuterRef('pk')).values('is_read')[:1]
+        return queryset.annotate(reader_is_read=Coalesce(Subquery(entry_is_read), F('is_read')))
+    
     @classmethod
     def get_most_read(cls):
         """Get the most read books."""
@@ -135,6 +367,7 @@ class Notification(models.Model):
         book_recommendation (Book): Optional book being recommended
         is_read (bool): Whether the user has read the notification
         created_at (datetime): When the notification was created
+        updated_at (datetime): When the notification was last modified
         notification_type (str): Type of notification (recommendation, general, etc.)
     """
     NOTIFICATION_TYPES = [
@@ -149,11 +382,18 @@ class Notification(models.Model):
     book_recommendation = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications')
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES, default='general')
     
     class Meta:
-        """Meta options for ordering notifications by creation date."""
+        """Meta options for ordering notifications by creation date and indexing per-user lists."""
         ordering = ['-created_at']
+        indexes = [
+            # Lists filter on user alone, so is_read stays out of the full index to keep them sort-free
+            models.Index(fields=['user', 'created_at'], name='notif_user_created_idx'),
+            # Partial index: the (user, is_read=false, created_at) slice used by unread counts and lists
+            models.Index(fields=['user', 'created_at'], condition=Q(is_read=False), name='notif_user_unread_idx'),
+        ]
     
     def __str__(self):
         """Return a string representation of the notification."""
@@ -163,3 +403,181 @@ class Notification(models.Model):
         """Mark the notification as read."""
         self.is_read = True
         self.save()
+
+class LibraryEntry(models.Model):
+    """
+    Model linking a user to a shared catalog book in their personal library.
+    
+    Recommended books are added to a user's library through an entry instead
+    of copying the Book row, so every recipient references one canonical book
+    and keeps their own read status.
+    
+    Attributes:
+        user (User): Owner of the library
+        book (Book): Catalog book in the library
+        is_read (bool): Whether this user has read the book
+        added_at (datetime): When the book was added to the library
+        updated_at (datetime): When the entry was last modified
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='library_entries')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='library_entries')
+    is_read = models.BooleanField(default=False)
+    added_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        """Meta options: a book appears at most once in each library."""
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'book'], name='library_entry_user_book_uniq'),
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the entry."""
+        return f"{self.user_id} -> {self.book_id}"
+    
+    @classmethod
+    def add_for_users(cls, book, user_ids):
+        """
+        Add a book to many libraries with one insert.
+        
+        Users who already have the book are skipped. Each new entry is also
+        recorded in the ChangeLog feed, so recipients pick the book up on sync.
+        
+        Args:
+            book: Book to add
+            user_ids: Primary keys of the receiving users
+            
+        Returns:
+            Number of libraries the book was added to
+        """
+        user_ids = set(user_ids)
+        user_ids -= set(cls.objects.filter(book=book, user_id__in=user_ids).values_list('user_id', flat=True))
+        cls.objects.bulk_create((cls(user_id=user_id, book=book) for user_id in user_ids), ignore_conflicts=True)
+        ChangeLog.objects.bulk_create(
+            ChangeLog(model='book', object_id=book.pk, owner_id=user_id, action='create')
+            for user_id in user_ids
+        )
+        return len(user_ids)
+
+class SequenceCounter(models.Model):
+    """
+    Named counter row used to reserve blocks of unique values.
+    
+    Backends without native sequences reserve id blocks by locking and
+    advancing this row (see books.sequences). On PostgreSQL a real database
+    sequence is used instead and the row is not touched. The changelog_pruned
+    row holds the first ChangeLog id that prune_changelog has not deleted.
+    
+    Attributes:
+        name (str): Name of the counter (unique)
+        next_value (int): First value not yet reserved by any process
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+    
+    def __str__(self):
+        """Return the counter name and its next free value."""
+        return f"{self.name}: {self.next_value}"
+
+class ChangeLog(models.Model):
+    """
+    Append-only change feed used for incremental client sync.
+    
+    Every insert, update and delete of a Book or Notification appends one row.
+    The auto-incrementing primary key is a monotonic sequence and doubles as
+    the sync token handed to clients. Deletes are kept as tombstones so clients
+    can drop their local copies.
+    
+    Ids are allocated when a row is inserted, not when its transaction
+    commits, so a lower id can become visible after a higher one. Readers
+    only advance past settled_id(), and rows older than the retention period
+    are deleted by the prune_changelog command, which records how far it got
+    (see pruned_through()).
+    
+    Attributes:
+        model (str): Which model changed (book or notification)
+        object_id (int): Primary key of the changed row
+        action (str): Type of change (create, update or delete)
+        owner_id (int): User whose feed the row is in (book owner or saver, or notification recipient)
+        created_at (datetime): When the change was recorded
+    """
+    MODEL_CHOICES = [
+        ('book', 'Book'),
+        ('notification', 'Notification'),
+    ]
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    # SequenceCounter row recording how far the feed was pruned
+    PRUNED_COUNTER = 'changelog_pruned'
+    
+    model = models.CharField(max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    owner_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        """Meta options for reading a user's feed in sequence order, and the feed by age (settled_id, pruning)."""
+        indexes = [
+            models.Index(fields=['owner_id', 'id'], name='changelog_owner_seq_idx'),
+            models.Index(fields=['created_at', 'id'], name='changelog_created_seq_idx'),
+        ]
+    
+    def __str__(self):
+        """Return a string representation of the change."""
+        return f"#{self.pk} {self.action} {self.model} {self.object_id}"
+    
+    @classmethod
+    def record_changes(cls, changes):
+        """
+        Append changes to the feed with one insert.
+        
+        Args:
+            changes: Iterable of (model, object_id, owner_id, action) tuples
+        
+        Returns:
+            List of the created ChangeLog rows
+        """
+        return cls.objects.bulk_create(
+            cls(model=model, object_id=object_id, owner_id=owner_id, action=action)
+            for model, object_id, owner_id, action in changes
+        )
+    
+    @classmethod
+    def record(cls, model, object_id, owner_id, action):
+        """Append a single change to the feed."""
+        return cls.record_changes([(model, object_id, owner_id, action)])[0]
+    
+    @classmethod
+    def settled_id(cls):
+        """
+        Get the id up to which every change is committed.
+        
+        A change recorded more than CHANGELOG_SETTLE_SECONDS ago is past
+        every transaction that was given a lower id, as long as no
+        transaction writing the feed stays open that long.
+        
+        Returns:
+            Highest settled id, or 0 when no change has settled yet
+        """
+        cutoff = timezone.now() - timedelta(seconds=settings.CHANGELOG_SETTLE_SECONDS)
+        return cls.objects.filter(created_at__lte=cutoff).aggregate(latest=Max('id'))['latest'] or 0
+    
+    @classmethod
+    def pruned_through(cls):
+        """
+        Get the last id deleted by prune_changelog.
+        
+        Kept in a SequenceCounter row rather than taken from the oldest
+        remaining id: sequences skip the ids of rolled-back inserts, so a gap
+        at the start of the feed does not mean anything was pruned.
+        
+        Returns:
+            Highest pruned id, or 0 when the feed was never pruned
+        """
+        next_value = SequenceCounter.objects.filter(name=cls.PRUNED_COUNTER).values_list('next_value', flat=True).first()
+        return next_value - 1 if next_value else 0
+
@@ -0,0 +1,172 @@
+"""
+Password hashing off the request threads for the Book Catalog application.
+
+Hashing or checking a password with Django's PBKDF2 hasher costs a few
+hundred milliseconds of CPU by design. Under uvicorn workers every sync
+request runs on its own thread, so a burst of logins means as many hashes
+competing for the CPU with every other page. make_password and
+check_password here run the hash in a per-process pool instead:
+
+    PASSWORD_HASH_WORKERS    hashes running at once (0 = hash on the request thread)
+    PASSWORD_HASH_QUEUE      hashes waiting for a worker beyond those
+    PASSWORD_HASH_EXECUTOR   "thread" or "process"
+
+hashlib releases the GIL while it hashes, so threads run hashes in
+parallel with each other and with requests; "process" is for hashers that
+hold the GIL. When every worker is busy and the queue is full, the call
+raises PasswordHashingBusy at once and the view answers 503 with
+Retry-After, instead of queueing the login behind work it cannot finish in
+time. Hashing time, waiting time, hashes in flight and rejections are
+exported as catalog_password_hash_* metrics.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .hash_workers import init_worker
+from .metrics import PASSWORD_HASH_IN_FLIGHT, observe_password_hash, reject_password_hash
+
+# Seconds a rejected client is asked to wait before retrying
+RETRY_AFTER = 1
+BUSY_MESSAGE = 'The server is busy signing other people in. Please try again in a moment.'
+
+_lock = threading.Lock()
+_pool = None
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when every hashing worker is busy and the queue is full."""
+
+
+def _timed(function, args):
+    """Run a hashing function in a pool worker and return its result with the seconds it took."""
+    started = time.perf_counter()
+    return function(*args), time.perf_counter() - started
+
+
+class HashingPool:
+    """
+    Executor running at most workers hashes at once, with at most queue more waiting.
+
+    Attributes:
+        workers (int): Hashes running at once
+        queue (int): Hashes allowed to wait for a worker
+    """
+
+    def __init__(self, workers, queue, kind='thread'):
+        self.workers = workers
+        self.queue = queue
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        if kind == 'process':
+            # spawn, not fork: the parent runs request threads that may hold locks
+            self._executor = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash')
+
+    def run(self, operation, function, *args):
+        """
+        Run a hashing function in the pool and wait for its result.
+
+        Args:
+            operation: Metrics label, "make" or "check"
+            function: Module-level function, so process workers can unpickle it
+            *args: Arguments of the function
+
+        Returns:
+            Result of the function
+
+        Raises:
+            PasswordHashingBusy: The pool is saturated
+        """
+        if not self._slots.acquire(blocking=False):
+            reject_password_hash(operation)
+            raise PasswordHashingBusy(f'{self.workers} hashing workers busy and {self.queue} hashes waiting')
+        PASSWORD_HASH_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            result, hashed = self._executor.submit(_timed, function, args).result()
+        finally:
+            PASSWORD_HASH_IN_FLIGHT.dec()
+            self._slots.release()
+        observe_password_hash(operation, time.perf_counter() - started - hashed, hashed)
+        return result
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def get_pool():
+    """Get this process's hashing pool, created from the settings on first use; None when disabled."""
+    global _pool
+    if settings.PASSWORD_HASH_WORKERS <= 0:
+        return None
+    with _lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE, settings.PASSWORD_HASH_EXECUTOR,
+            )
+        return _pool
+
+
+def shutdown():
+    """Stop the hashing pool, e.g. so that changed settings take effect on the next hash."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def _run(operation, function, *args):
+    pool = get_pool()
+    if pool is None:
+        started = time.perf_counter()
+        result = function(*args)
+        observe_password_hash(operation, 0.0, time.perf_counter() - started)
+        return result
+    return pool.run(operation, function, *args)
+
+
+def hash_all(passwords):
+    """Hash a list of passwords on the calling thread; the unit of work of bulk imports' process pools."""
+    return [hashers.make_password(password) for password in passwords]
+
+
+def hash_each(passwords):
+    """
+    Hash a list of passwords in the hashing pool, one at a time.
+
+    Bulk work submitted this way never holds more than one worker, so
+    logins keep the others, and queue behind at most one of its hashes.
+
+    Raises:
+        PasswordHashingBusy: The pool is saturated
+    """
+    return [make_password(password) for password in passwords]
+
+
+def make_password(password):
+    """
+    Hash a password with the default hasher, in the hashing pool.
+
+    Raises:
+        PasswordHashingBusy: The pool is saturated
+    """
+    return _run('make', hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """
+    Check a password against its stored hash, in the hashing pool.
+
+    Raises:
+        PasswordHashingBusy: The pool is saturated
+    """
+    return _run('check', hashers.check_password, password, encoded)
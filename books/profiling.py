@@ -0,0 +1,338 @@
+"""
+On-demand request profiling for the Book Catalog application.
+
+ProfilingMiddleware profiles a request when the admin adds ?__profile=1 to
+any page or API URL, and a random 1 in PROFILE_SAMPLE_EVERY requests
+(0 = never). While the request runs, a background thread samples the
+Python stack of the threads running it every PROFILE_INTERVAL_MS. Like pyinstrument
+and py-spy it measures wall-clock time, so waiting on the database or on
+Open Library shows up next to Python code. Each profile is saved to
+PROFILE_DIR as:
+
+    <id>.collapsed          collapsed stacks, for flamegraph.pl or speedscope
+    <id>.speedscope.json    speedscope's own format (https://www.speedscope.app)
+    <id>.meta.json          request, status, duration and sample count
+
+Only the newest PROFILE_KEEP profiles are kept. The admin lists and
+downloads them at /admin-dashboard/profiles/.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from asgiref.sync import SyncToAsync, iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+from .timing import is_admin_session
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'collapsed': '.collapsed', 'speedscope': '.speedscope.json'}
+_META = '.meta.json'
+_PROFILE_ID = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{8}$')
+
+
+def short_path(filename):
+    """Shorten a source path to its project or site-packages relative form."""
+    base_dir = str(settings.BASE_DIR)
+    if filename.startswith(base_dir + os.sep):
+        return os.path.relpath(filename, base_dir)
+    _, marker, rest = filename.rpartition('site-packages' + os.sep)
+    return rest if marker else filename
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of some threads at a fixed interval.
+
+    Each thread is given a root: a code object, or a single frame when
+    several requests run the same code on one thread (coroutines on an event
+    loop). The root frame and its callers are left out of the stacks, and a
+    thread whose stack does not contain the root is not working on the
+    profiled code and is skipped. With no root the whole stack is kept.
+
+    Attributes:
+        stacks (dict): Sample count and wall time in seconds per stack, keyed by a tuple
+            of (function, file, first line) frames, outermost first
+        samples (int): Number of stacks recorded
+    """
+
+    def __init__(self, interval, roots=None):
+        """
+        Args:
+            interval: Seconds between samples
+            roots: Root code object, frame or None per thread id (default: the calling thread, no root)
+        """
+        self.interval = interval
+        self.roots = roots or {threading.get_ident(): None}
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            now = time.perf_counter()
+            for thread_id, root in self.roots.items():
+                stack = self._stack(frames.get(thread_id), root)
+                if stack is not None:
+                    count, seconds = self.stacks.get(stack, (0, 0.0))
+                    self.stacks[stack] = (count + 1, seconds + now - last)
+                    self.samples += 1
+            last = now
+
+    @staticmethod
+    def _stack(frame, root):
+        frames = []
+        while frame is not None and frame is not root and frame.f_code is not root:
+            code = frame.f_code
+            frames.append((code.co_name, short_path(code.co_filename), code.co_firstlineno))
+            frame = frame.f_back
+        if frame is None and root is not None:
+            return None
+        return tuple(reversed(frames))
+
+
+def frame_label(frame):
+    """Name a (function, file, line) frame as "function (file:line)"."""
+    return f'{frame[0]} ({frame[1]}:{frame[2]})'
+
+
+def collapsed_stacks(stacks):
+    """
+    Format stacks in the collapsed format of flamegraph.pl, one "a;b;c count" line per stack.
+
+    Args:
+        stacks: StackSampler.stacks
+
+    Returns:
+        Text with the heaviest stacks first
+    """
+    lines = [
+        f"{';'.join(frame_label(frame) for frame in stack)} {count}"
+        for stack, (count, _) in sorted(stacks.items(), key=lambda item: -item[1][0]) if stack
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def speedscope_profile(stacks, name):
+    """
+    Build a speedscope "sampled" profile weighted by wall time.
+
+    Args:
+        stacks: StackSampler.stacks
+        name: Title shown by speedscope
+
+    Returns:
+        JSON-serializable dictionary in the speedscope file format
+    """
+    frames, indexes, samples, weights = [], {}, [], []
+    for stack, (_, seconds) in stacks.items():
+        sample = []
+        for frame in stack:
+            if frame not in indexes:
+                indexes[frame] = len(frames)
+                frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+            sample.append(indexes[frame])
+        samples.append(sample)
+        weights.append(round(seconds * 1000, 3))
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'books.profiling',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': round(sum(weights), 3),
+            'samples': samples,
+            'weights': weights,
+        }],
+    }
+
+
+def save_profile(sampler, meta, directory=None):
+    """
+    Write a sampled request to the profile directory and prune old profiles.
+
+    Args:
+        sampler: Finished StackSampler
+        meta: JSON-serializable description of the request
+        directory: Target directory (default: PROFILE_DIR)
+
+    Returns:
+        Id of the saved profile
+    """
+    directory = directory or settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f'{timezone.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}'
+    base = os.path.join(directory, profile_id)
+    with open(base + FORMATS['collapsed'], 'w', encoding='utf-8') as f:
+        f.write(collapsed_stacks(sampler.stacks))
+    with open(base + FORMATS['speedscope'], 'w', encoding='utf-8') as f:
+        json.dump(speedscope_profile(sampler.stacks, f"{meta['method']} {meta['path']}"), f)
+    with open(base + _META, 'w', encoding='utf-8') as f:
+        json.dump({**meta, 'id': profile_id, 'samples': sampler.samples}, f)
+    prune(directory, settings.PROFILE_KEEP)
+    return profile_id
+
+
+def list_profiles(directory=None):
+    """
+    Describe the saved profiles.
+
+    Args:
+        directory: Profile directory (default: PROFILE_DIR)
+
+    Returns:
+        List of metadata dictionaries, newest first
+    """
+    directory = directory or settings.PROFILE_DIR
+    try:
+        names = sorted((name for name in os.listdir(directory) if name.endswith(_META)), reverse=True)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def prune(directory, keep):
+    """Delete all but the newest keep profiles in a directory."""
+    ids = sorted((name[:-len(_META)] for name in os.listdir(directory) if name.endswith(_META)), reverse=True)
+    for profile_id in ids[keep:]:
+        for suffix in (*FORMATS.values(), _META):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def profile_path(profile_id, fmt, directory=None):
+    """
+    Locate a saved profile file.
+
+    Args:
+        profile_id: Id returned by save_profile
+        fmt: One of FORMATS
+        directory: Profile directory (default: PROFILE_DIR)
+
+    Returns:
+        Path of the file, or None when the id or format is not valid
+    """
+    if fmt not in FORMATS or not _PROFILE_ID.match(profile_id):
+        return None
+    return os.path.join(directory or settings.PROFILE_DIR, profile_id + FORMATS[fmt])
+
+
+class ProfilingMiddleware(MiddlewareMixin):
+    """
+    Profile requests asked for by the admin with ?__profile=1, plus a sample of all requests.
+
+    Listed last in MIDDLEWARE, so the session is available for the admin check
+    and the profile covers the view and the rendering of its response. The
+    admin's profiled responses carry the profile id in an X-Profile-Id header.
+
+    Under ASGI the sampler follows two threads: the event loop thread while
+    it runs this request's coroutines (the async views), and the request's
+    thread-sensitive sync_to_async thread, which runs the sync middleware,
+    the sync views and the ORM calls of async views. Every request on the
+    loop passes through __acall__, so the loop thread is rooted at this
+    call's own coroutine frame: concurrent requests are not sampled into
+    the profile. Tasks a view spawns itself (asyncio.gather) are not
+    followed either.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if self.requested(request) and is_admin_session(request):
+            trigger = 'manual'
+        elif self.sampled():
+            trigger = 'sampled'
+        else:
+            return self.get_response(request)
+        start = time.perf_counter()
+        sampler = StackSampler(
+            settings.PROFILE_INTERVAL_MS / 1000, roots={threading.get_ident(): ProfilingMiddleware.__call__.__code__},
+        )
+        with sampler:
+            response = self.get_response(request)
+        return self.finish(request, response, trigger, sampler, start)
+
+    async def __acall__(self, request):
+        if self.requested(request) and await sync_to_async(is_admin_session)(request):
+            trigger = 'manual'
+        elif self.sampled():
+            trigger = 'sampled'
+        else:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        sync_thread = await sync_to_async(threading.get_ident)()
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000, roots={
+            threading.get_ident(): sys._getframe(),
+            sync_thread: SyncToAsync.thread_handler.__code__,
+        })
+        with sampler:
+            response = await self.get_response(request)
+        return await sync_to_async(self.finish)(request, response, trigger, sampler, start)
+
+    @staticmethod
+    def requested(request):
+        """Check whether a request asks to be profiled with ?__profile=1."""
+        return request.GET.get('__profile') == '1'
+
+    @staticmethod
+    def sampled():
+        """Pick 1 in PROFILE_SAMPLE_EVERY requests at random."""
+        every = settings.PROFILE_SAMPLE_EVERY
+        return bool(every) and random.random() * every < 1
+
+    def finish(self, request, response, trigger, sampler, start):
+        """Save the profile of a finished request and tag the admin's response with its id."""
+        match = getattr(request, 'resolver_match', None)
+        meta = {
+            'time': timezone.now().isoformat(timespec='seconds'),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'ms': round((time.perf_counter() - start) * 1000, 1),
+            'trigger': trigger,
+        }
+        try:
+            profile_id = save_profile(sampler, meta)
+        except OSError:
+            # A full or read-only disk must not fail the request
+            logger.exception('Could not save request profile')
+            return response
+        if trigger == 'manual':
+            response['X-Profile-Id'] = profile_id
+        return response
@@ -0,0 +1,166 @@
+"""
+Per-request query count and wall-time budgets for the Book Catalog application.
+
+Budgets live in books/query_budgets.json, keyed by "<METHOD> <url name>",
+with a "default" entry for anything not listed. QueryRecorder records every
+query a block of code runs, with its duration and the application frames
+that issued it, so a request over budget can be reported with the queries
+responsible. Repeated statements, the signature of an N+1 loop, are grouped
+and listed first.
+"""
+
+import json
+import os
+import time
+import traceback
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'query_budgets.json')
+_THIS_FILE = os.path.abspath(__file__)
+
+
+def load_budgets(path=None):
+    """
+    Read the budget file.
+
+    Args:
+        path: Budget file (default: books/query_budgets.json)
+
+    Returns:
+        Dictionary of budgets keyed by "<METHOD> <url name>", plus "default"
+    """
+    with open(path or BUDGETS_PATH) as f:
+        return json.load(f)
+
+
+def budget_for(label, budgets):
+    """
+    Get the budget for an endpoint, falling back to the default for missing limits.
+
+    Args:
+        label: Endpoint label, "<METHOD> <url name>"
+        budgets: Dictionary returned by load_budgets
+
+    Returns:
+        Dictionary with "queries" and "ms" limits
+    """
+    return {**budgets['default'], **budgets.get(label, {})}
+
+
+def query_origin(limit=3, skip=()):
+    """
+    Describe where the current query was issued from.
+
+    Args:
+        limit: Maximum number of application frames to include
+        skip: Absolute paths of further modules to leave out, e.g. query instrumentation
+
+    Returns:
+        Innermost application frames as "path:line in function", outermost first
+    """
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and os.path.abspath(frame.filename) != _THIS_FILE
+        and os.path.abspath(frame.filename) not in skip
+        and 'site-packages' not in frame.filename
+        and os.path.basename(frame.filename) != 'manage.py'
+        and not os.path.basename(frame.filename).startswith('test')
+    ]
+    return [
+        f"{os.path.relpath(frame.filename, base_dir)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-limit:]
+    ]
+
+
+class QueryRecorder:
+    """
+    Context manager recording the queries run on a database connection.
+
+    Attributes:
+        queries (list): Recorded queries as dicts with sql, ms and origin
+        elapsed_ms (float): Wall time spent inside the block
+    """
+
+    def __init__(self, using='default'):
+        self.connection = connections[using]
+        self.queries = []
+        self.elapsed_ms = 0.0
+        self._wrapper = None
+        self._start = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'ms': (time.perf_counter() - start) * 1000,
+                'origin': query_origin(),
+            })
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.elapsed_ms = (time.perf_counter() - self._start) * 1000
+        self._wrapper.__exit__(exc_type, exc_value, tb)
+
+    def grouped(self):
+        """
+        Group recorded queries by statement.
+
+        Returns:
+            List of (sql, count, total ms, origins) tuples, most repeated first
+        """
+        groups = OrderedDict()
+        for query in self.queries:
+            group = groups.setdefault(query['sql'], {'count': 0, 'ms': 0.0, 'origins': []})
+            group['count'] += 1
+            group['ms'] += query['ms']
+            if query['origin'] not in group['origins']:
+                group['origins'].append(query['origin'])
+        rows = [(sql, group['count'], group['ms'], group['origins']) for sql, group in groups.items()]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def violations(self, budget):
+        """
+        Compare the recording with a budget.
+
+        Args:
+            budget: Dictionary with "queries" and "ms" limits
+
+        Returns:
+            List of human-readable violations, empty when within budget
+        """
+        problems = []
+        if len(self.queries) > budget['queries']:
+            problems.append(f"{len(self.queries)} queries, budget {budget['queries']}")
+        if self.elapsed_ms > budget['ms']:
+            problems.append(f"{self.elapsed_ms:.0f} ms, budget {budget['ms']} ms")
+        return problems
+
+    def report(self, limit=10):
+        """
+        Describe the recorded queries for a failure message.
+
+        Args:
+            limit: Maximum number of distinct statements to list
+
+        Returns:
+            Multi-line report with counts, time and origins per statement
+        """
+        lines = [f"{len(self.queries)} queries in {self.elapsed_ms:.0f} ms:"]
+        for sql, count, ms, origins in self.grouped()[:limit]:
+            lines.append(f"  {count}x {ms:.1f} ms  {sql[:200]}")
+            for origin in origins[:2]:
+                lines.append(f"      from {' -> '.join(origin) or '<framework>'}")
+        return '\n'.join(lines)
@@ -0,0 +1,147 @@
+"""
+Fast renderers and parsers for the Book Catalog REST API.
+
+This module provides drop-in replacements for DRF's stock JSON renderer and
+parser built on orjson, plus optional MessagePack support for clients that
+send ``Accept: application/msgpack``. Dates, datetimes and UUIDs are encoded
+natively; anything else falls back to DRF's own encoder, so responses stay
+byte-compatible with the stock renderer apart from whitespace.
+
+Both libraries are optional. Settings only enable these classes when the
+matching package is installed.
+"""
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# DRF's encoder handles Decimal, lazy strings, querysets and timedeltas the
+# same way the stock renderer does. It is only called for types that orjson
+# and msgpack cannot encode themselves.
+_fallback_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer which serializes to JSON using orjson.
+
+    Output matches the stock JSONRenderer: UTC datetimes end in 'Z',
+    non-string dictionary keys are allowed, and U+2028/U+2029 are escaped.
+    orjson only supports two-space indentation, so any requested indent
+    (e.g. from the browsable API) is rendered with two spaces.
+    """
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render data into JSON, returning a bytestring.
+
+        Args:
+            data: Data to render
+            accepted_media_type: Negotiated media type, may carry an indent parameter
+            renderer_context: Context from the view
+
+        Returns:
+            JSON encoded bytes
+        """
+        if data is None:
+            return b''
+        option = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_fallback_default, option=option)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(BaseParser):
+    """
+    Parser for JSON request bodies using orjson.
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parse a JSON request body.
+
+        Args:
+            stream: Request body stream
+            media_type: Content type of the request
+            parser_context: Context from the view
+
+        Returns:
+            Parsed data
+
+        Raises:
+            ParseError: If the body is not valid JSON
+        """
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer which serializes to MessagePack.
+
+    Dates and datetimes are encoded as ISO 8601 strings, like in JSON
+    responses, so both formats carry the same values.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """
+        Render data into MessagePack, returning a bytestring.
+
+        Args:
+            data: Data to render
+            accepted_media_type: Negotiated media type
+            renderer_context: Context from the view
+
+        Returns:
+            MessagePack encoded bytes
+        """
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_fallback_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parser for MessagePack request bodies.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """
+        Parse a MessagePack request body.
+
+        Args:
+            stream: Request body stream
+            media_type: Content type of the request
+            parser_context: Context from the view
+
+        Returns:
+            Parsed data
+
+        Raises:
+            ParseError: If the body is not valid MessagePack
+        """
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (msgpack.exceptions.UnpackException, ValueError, TypeError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,345 @@
+"""
+Synthetic catalog generation for benchmarks and load tests.
+
+Rows are generated in fixed blocks of BLOCK_SIZE, each from its own random
+generator seeded with (seed, kind, block number). The same seed therefore
+produces the same catalog whether the blocks are written by one process or
+spread over many, and in whatever order they finish.
+
+Distributions follow what a real catalog looks like rather than uniform
+noise: a few authors and readers account for most books, titles are two to
+four common words, publication years lean recent, view counts are
+heavy-tailed and most notifications are already read.
+"""
+
+import io
+import random
+from datetime import date
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .fingerprint import book_fingerprint
+from .isbn import canonical_isbn
+from .models import Book, ChangeLog, Notification, User
+
+BLOCK_SIZE = 1000
+
+GENRES = [
+    'Fiction', 'Fantasy', 'Science Fiction', 'Mystery', 'Thriller', 'Romance', 'Historical Fiction',
+    'Horror', 'Biography', 'History', 'Science', 'Philosophy', 'Poetry', 'Travel', 'Cooking',
+    'Self-Help', 'Business', 'Psychology', 'Art', 'Music', 'Children', 'Young Adult', 'Classics',
+    'Graphic Novel', 'Adventure', 'Crime', 'Politics', 'Religion', 'Health', 'Sports', 'Nature',
+    'Technology', 'Mathematics', 'Economics', 'Education', 'Drama', 'Humor', 'Memoir', 'Essays',
+    'Short Stories', 'Western', 'Dystopian', 'Mythology', 'Law', 'Medicine', 'Architecture',
+    'Photography', 'Gardening', 'Parenting', 'True Crime',
+]
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Margaret', 'Mark', 'Sandra', 'Paul', 'Ashley',
+    'Steven', 'Emily', 'Andrew', 'Donna', 'Kenneth', 'Michelle', 'George', 'Carol', 'Edward', 'Amanda',
+    'Aoife', 'Ciaran', 'Siobhan', 'Niamh', 'Oisin', 'Yuki', 'Haruki', 'Chimamanda', 'Gabriel', 'Isabel',
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+    'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+    'Walker', 'Young', 'Allen', 'King', 'Wright', 'Scott', 'Torres', 'Nguyen', 'Hill', 'Flores',
+    'Murphy', 'Kelly', 'Byrne', 'Ryan', "O'Brien", 'Walsh', 'Murakami', 'Adichie', 'Marquez', 'Allende',
+]
+TITLE_WORDS = [
+    'night', 'house', 'river', 'garden', 'secret', 'shadow', 'light', 'time', 'world', 'heart', 'war',
+    'silence', 'city', 'stone', 'fire', 'water', 'winter', 'summer', 'road', 'sea', 'star', 'dream',
+    'blood', 'glass', 'iron', 'silver', 'golden', 'last', 'lost', 'hidden', 'broken', 'dark', 'long',
+    'little', 'wild', 'quiet', 'forgotten', 'empire', 'kingdom', 'island', 'mountain', 'forest', 'storm',
+    'memory', 'daughter', 'son', 'king', 'queen', 'thief', 'stranger', 'letter', 'map', 'journey', 'song',
+    'tale', 'story', 'history', 'book', 'art', 'science', 'life', 'death', 'love', 'hope', 'fear',
+    'promise', 'voyage', 'machine', 'mind', 'body', 'spirit', 'ghost', 'wolf', 'raven', 'crown', 'sword',
+    'bridge', 'tower', 'door', 'window', 'mirror', 'clock', 'moon', 'sun', 'sky', 'earth', 'north',
+    'south', 'east', 'west', 'beyond', 'between', 'after', 'before', 'under', 'across', 'within',
+]
+SUBTITLES = [': A Novel', ': A Memoir', ': Stories', ': A History', ' (Book One)', ' (Book Two)', ': A Thriller']
+NOTIFICATION_TEMPLATES = [
+    ('recommendation', 'New recommendation for you', 'We think you will enjoy this one.'),
+    ('recommendation', 'Recommended by the admin', 'A reader with similar taste loved this book.'),
+    ('general', 'Reading challenge update', 'You are on track for this year\'s reading challenge.'),
+    ('general', 'New books in the catalog', 'Fresh additions have arrived in your favourite genres.'),
+    ('system', 'Scheduled maintenance', 'The catalog will be briefly unavailable tonight.'),
+]
+NOTIFICATION_WEIGHTS = [35, 25, 15, 15, 10]
+TAG_COUNT_WEIGHTS = [15, 35, 30, 15, 5]  # books with 0, 1, 2, 3 and 4 tags
+
+
+class SeedContext:
+    """
+    Everything a worker needs to generate and write blocks for one seeding run.
+
+    Attributes:
+        seed (int): Dataset seed, also part of every ISBN and username
+        chunk_size (int): Rows per INSERT statement
+        user_ids (list): Primary keys of the seeded users, in generation order
+        authors (list): (name, Author primary key) pairs, in generation order
+        tag_ids (list): Primary keys of the seeded tags, most popular first
+        covers (list): Storage names of the placeholder cover images
+        book_ids (list): Primary keys of the seeded books by index, once written
+    """
+
+    def __init__(self, seed, chunk_size, user_ids, authors, tag_ids, covers, book_ids=None):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.user_ids = user_ids
+        self.authors = authors
+        self.tag_ids = tag_ids
+        self.covers = covers
+        self.book_ids = book_ids or []
+
+
+def block_random(seed, kind, block):
+    """Return the random generator for one block of one kind of row."""
+    return random.Random(f'{seed}:{kind}:{block}')
+
+
+def skewed_index(rng, count, skew=2.0):
+    """Pick an index in range(count), favouring low indexes more strongly as skew grows."""
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def seeded_isbn(seed, index):
+    """
+    Build the ISBN-13 of a seeded book.
+
+    The 979 prefix, the two-digit seed and a seven-digit index make every
+    seeded ISBN valid, unique within a seed and distinct between seeds.
+
+    Args:
+        seed: Dataset seed (0-99)
+        index: Book index within the dataset (below 10,000,000)
+
+    Returns:
+        13-digit ISBN string
+    """
+    body = f'979{seed:02d}{index:07d}'
+    check = (10 - sum((3 if i % 2 else 1) * int(c) for i, c in enumerate(body)) % 10) % 10
+    return body + str(check)
+
+
+def seeded_username(seed, index):
+    """Return the username of a seeded user."""
+    return f'seed{seed}-reader{index}'
+
+
+def author_names(count):
+    """
+    Generate distinct author names.
+
+    Names are built from the index alone, so they are unique up to
+    50 first names x 26 initials x 50 last names, and repeat after that.
+
+    Args:
+        count: Number of names
+
+    Returns:
+        List of names
+    """
+    names = []
+    for index in range(count):
+        first = FIRST_NAMES[index % len(FIRST_NAMES)]
+        initial = chr(ord('A') + index // len(FIRST_NAMES) % 26)
+        last = LAST_NAMES[index // (len(FIRST_NAMES) * 26) % len(LAST_NAMES)]
+        names.append(f'{first} {initial}. {last}')
+    return names
+
+
+def generate_title(rng):
+    """Generate a book title of two to four common words, sometimes with an article or subtitle."""
+    length = rng.choices([1, 2, 3, 4, 5], weights=[10, 30, 35, 18, 7])[0]
+    words = [TITLE_WORDS[skewed_index(rng, len(TITLE_WORDS), 1.5)] for _ in range(length)]
+    title = ' '.join(words).title()
+    if rng.random() < 0.2:
+        title = 'The ' + title
+    if rng.random() < 0.1:
+        title += rng.choice(SUBTITLES)
+    return title
+
+
+def generate_description(rng):
+    """Generate a description of zero to a few paragraphs, mostly one paragraph long."""
+    if rng.random() < 0.1:
+        return ''
+    sentences = max(1, int(rng.lognormvariate(1.5, 0.6)))
+    text = []
+    for _ in range(sentences):
+        words = [rng.choice(TITLE_WORDS) for _ in range(rng.randint(6, 18))]
+        text.append(' '.join(words).capitalize() + '.')
+    return ' '.join(text)
+
+
+def generate_books(context, block, start, stop):
+    """
+    Generate the unsaved books of one block and the tags of each.
+
+    Args:
+        context: SeedContext of the run
+        block: Block number, which selects the random generator
+        start: Index of the first book in the block
+        stop: Index after the last book in the block
+
+    Returns:
+        Tuple of (books, tag id lists), index-aligned
+    """
+    rng = block_random(context.seed, 'book', block)
+    books, tags = [], []
+    for index in range(start, stop):
+        author, author_id = context.authors[skewed_index(rng, len(context.authors), 2.5)]
+        title = generate_title(rng)
+        year = max(1800, 2024 - int(rng.expovariate(1 / 15)))
+        published_date = date(year, rng.randint(1, 12), rng.randint(1, 28))
+        isbn = seeded_isbn(context.seed, index)
+        books.append(Book(
+            title=title,
+            author=author,
+            author_ref_id=author_id,
+            fingerprint=book_fingerprint(title, author, published_date),
+            description=generate_description(rng),
+            published_date=published_date,
+            isbn=isbn,
+            isbn_key=canonical_isbn(isbn),
+            is_read=rng.random() < 0.35,
+            view_count=min(int((rng.paretovariate(1.2) - 1) * 20), 100000),
+            added_by_id=context.user_ids[skewed_index(rng, len(context.user_ids), 2.0)],
+            cover_image=rng.choice(context.covers) if context.covers and rng.random() < 0.7 else None,
+        ))
+        tag_count = min(rng.choices(range(5), weights=TAG_COUNT_WEIGHTS)[0], len(context.tag_ids))
+        tags.append({context.tag_ids[skewed_index(rng, len(context.tag_ids), 2.0)] for _ in range(tag_count)})
+    return books, tags
+
+
+def generate_notifications(context, block, start, stop):
+    """
+    Generate the unsaved notifications of one block.
+
+    Args:
+        context: SeedContext of the run, with book_ids filled in
+        block: Block number, which selects the random generator
+        start: Index of the first notification in the block
+        stop: Index after the last notification in the block
+
+    Returns:
+        List of notifications
+    """
+    rng = block_random(context.seed, 'notification', block)
+    notifications = []
+    for _ in range(start, stop):
+        kind, title, message = rng.choices(NOTIFICATION_TEMPLATES, weights=NOTIFICATION_WEIGHTS)[0]
+        book_id = None
+        if kind == 'recommendation' and context.book_ids:
+            book_id = context.book_ids[skewed_index(rng, len(context.book_ids), 2.0)]
+        notifications.append(Notification(
+            user_id=context.user_ids[skewed_index(rng, len(context.user_ids), 1.5)],
+            title=title,
+            message=message,
+            notification_type=kind,
+            book_recommendation_id=book_id,
+            is_read=rng.random() < 0.7,
+        ))
+    return notifications
+
+
+def write_book_block(context, block, start, stop):
+    """
+    Generate and insert one block of books with their tags and change feed entries.
+
+    Returns:
+        Tuple of (block, primary keys of the inserted books in index order)
+    """
+    books, tags = generate_books(context, block, start, stop)
+    Through = Book.tags.through
+    with transaction.atomic():
+        created = Book.objects.bulk_create(books, batch_size=context.chunk_size)
+        Through.objects.bulk_create(
+            [Through(book_id=book.pk, tag_id=tag_id) for book, tag_ids in zip(created, tags) for tag_id in tag_ids],
+            batch_size=context.chunk_size,
+        )
+        ChangeLog.objects.bulk_create(
+            [ChangeLog(model='book', object_id=book.pk, owner_id=book.added_by_id, action='create') for book in created],
+            batch_size=context.chunk_size,
+        )
+    return block, [book.pk for book in created]
+
+
+def write_notification_block(context, block, start, stop):
+    """
+    Generate and insert one block of notifications with their change feed entries.
+
+    Returns:
+        Tuple of (block, number of notifications inserted)
+    """
+    notifications = generate_notifications(context, block, start, stop)
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=context.chunk_size)
+        ChangeLog.objects.bulk_create(
+            [ChangeLog(model='notification', object_id=n.pk, owner_id=n.user_id, action='create') for n in created],
+            batch_size=context.chunk_size,
+        )
+    return block, len(created)
+
+
+def seed_users(seed, count, password_hash, chunk_size):
+    """
+    Insert the seeded users, all sharing one pre-hashed password.
+
+    Hashing once instead of per user keeps large runs from spending their
+    time in the password hasher. bulk_create skips User.save(), so the hash
+    is stored as given.
+
+    Returns:
+        Primary keys of the users in generation order
+    """
+    users = [
+        User(username=seeded_username(seed, index), email=f'{seeded_username(seed, index)}@example.com',
+             password=password_hash)
+        for index in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=chunk_size)
+    by_name = dict(
+        User.objects.filter(username__startswith=f'seed{seed}-reader').values_list('username', 'pk')
+    )
+    return [by_name[user.username] for user in users]
+
+
+def make_covers(seed, count):
+    """
+    Write a small pool of placeholder cover images shared by the seeded books.
+
+    Covers already written by an earlier run with the same seed are reused.
+
+    Args:
+        seed: Dataset seed, which selects the colours
+        count: Number of distinct covers
+
+    Returns:
+        Storage names of the covers, for Book.cover_image
+    """
+    from PIL import Image, ImageDraw
+
+    rng = block_random(seed, 'cover', 0)
+    names = []
+    for index in range(count):
+        name = f'book_covers/seed/seed{seed}-cover{index}.jpg'
+        colour = tuple(rng.randrange(40, 220) for _ in range(3))
+        if not default_storage.exists(name):
+            image = Image.new('RGB', (200, 300), colour)
+            ImageDraw.Draw(image).rectangle((20, 40, 180, 110), fill=(245, 240, 230))
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=80)
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def block_ranges(total):
+    """Yield (block, start, stop) for every block of a run writing total rows."""
+    for block, start in enumerate(range(0, total, BLOCK_SIZE)):
+        yield block, start, min(start + BLOCK_SIZE, total)
@@ -0,0 +1,112 @@
+"""
+Block-based id allocation for the Book Catalog application.
+
+An allocator reserves a block of values from the database in one round-trip
+and then hands them out from memory, so generating an id is an in-memory
+increment most of the time and never counts or scans a table. On PostgreSQL
+blocks come from a native sequence whose increment equals the block size;
+sequences are never rolled back, so values stay unique across gunicorn
+workers and pods even when the surrounding transaction fails. Other backends
+(SQLite in local development) lock and advance a SequenceCounter row.
+"""
+
+import threading
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import SequenceCounter
+
+# Must match the INCREMENT BY of the PostgreSQL sequences created in migrations; a new
+# allocator needs a migration creating books_<name>_seq with that increment
+BLOCK_SIZE = 100
+
+
+class BlockAllocator:
+    """
+    Hands out unique, increasing integers from blocks reserved in the database.
+    
+    Attributes:
+        name (str): Counter name, also used for the PostgreSQL sequence books_<name>_seq
+        block_size (int): Number of values reserved per database round-trip
+    """
+    
+    def __init__(self, name, block_size=BLOCK_SIZE):
+        self.name = name
+        self.block_size = block_size
+        self._next = 0
+        self._limit = 0
+        self._lock = threading.Lock()
+    
+    def allocate(self):
+        """
+        Return the next unique value, reserving a new block when the current one is used up.
+        
+        Returns:
+            Integer unique across all processes sharing the database
+        """
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self._reserve_block()
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+    
+    def skip_past(self, value):
+        """
+        Make sure no value up to and including value is handed out from now on.
+        
+        For values that entered the database by other means, like the JS ISBNs
+        of an imported export. Blocks other processes reserved earlier are left
+        alone, so a value inside one of them could still be handed out there;
+        values beyond everything allocated so far are always safe.
+        
+        Args:
+            value: Highest value already in use
+        """
+        with self._lock:
+            if connection.vendor == 'postgresql':
+                sequence = f'books_{self.name}_seq'
+                with connection.cursor() as cursor:
+                    # The next nextval returns at least value + block_size
+                    cursor.execute(f"SELECT setval(%s, GREATEST(%s, last_value)) FROM {sequence}", [sequence, value])
+            else:
+                with transaction.atomic():
+                    counter, _ = SequenceCounter.objects.select_for_update().get_or_create(name=self.name)
+                    if counter.next_value <= value:
+                        SequenceCounter.objects.filter(pk=counter.pk).update(next_value=value + 1)
+            if self._next <= value:
+                # Drop the rest of this process's block, it may hold values up to value
+                self._next = self._limit = 0
+    
+    def _reserve_block(self):
+        """Reserve the next block in the database and return its first value."""
+        if connection.vendor == 'postgresql':
+            # The sequence must already exist: each allocator's is created by a migration (0013 for js_isbn)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT nextval(%s)", [f'books_{self.name}_seq'])
+                return cursor.fetchone()[0]
+        with transaction.atomic():
+            counter, _ = SequenceCounter.objects.select_for_update().get_or_create(name=self.name)
+            SequenceCounter.objects.filter(pk=counter.pk).update(next_value=F('next_value') + self.block_size)
+            return counter.next_value
+
+
+js_isbn_allocator = BlockAllocator('js_isbn')
+
+
+def generate_js_isbn():
+    """
+    Generate a unique ISBN with 'JS' prefix for books without ISBNs.
+    
+    This function creates sequential ISBN numbers starting with 'JS' followed
+    by an (at least) 5-digit number. It's used for books that don't have official
+    ISBNs to ensure each book has a unique identifier. Numbers come from a block
+    allocator, so this is usually an in-memory increment and stays collision-free
+    across worker processes.
+    
+    Returns:
+        String containing the generated ISBN
+    """
+    return f"JS{js_isbn_allocator.allocate():05d}"  # e.g. JS00001
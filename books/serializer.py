@@ -7,10 +7,12 @@ and transformation for specific models.
 """
 
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password
-from .models import Book, User, Notification
+from .models import Author, Book, User, Notification
+from .isbn import canonical_isbn, clean_isbn, looks_like_isbn, is_valid_isbn10, is_valid_isbn13
+from .passwords import make_password
+from .timing import TimedRepresentationMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for User model with password handling.
     
@@ -65,8 +67,12 @@ class UserSerializer(serializers.ModelSerializer):
             Created User instance
         """
         validated_data.pop('confirm_password', None)
-        validated_data['password'] = make_password(validated_data['password'])
-        return super().create(validated_data)
+        password = validated_data.pop('password')
+        user = User(**validated_data)
+        # Hashed in the bounded pool; PasswordHashingBusy is answered with 503 by the views
+        user.set_password(password)
+        user.save()
+        return user
     
     def update(self, instance, validated_data):
         """
@@ -84,7 +90,7 @@ class UserSerializer(serializers.ModelSerializer):
             validated_data['password'] = make_password(validated_data['password'])
         return super().update(instance, validated_data)
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Book model with enhanced field handling.
     
@@ -99,9 +105,51 @@ class BookSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'author', 'description', 'published_date', 
             'isbn', 'is_read', 'view_count', 'added_by', 'added_by_username',
-            'is_read_display', 'created_at'
+            'is_read_display', 'author_ref', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'view_count', 'added_by', 'created_at']
+        read_only_fields = ['id', 'view_count', 'added_by', 'author_ref', 'created_at', 'updated_at']
+        # Uniqueness is checked against the canonical key in validate_isbn
+        extra_kwargs = {'isbn': {'validators': []}}
+    
+    def validate_isbn(self, value):
+        """
+        Validate the ISBN checksum and reject duplicates in any spelling.
+        
+        Args:
+            value: Submitted ISBN
+            
+        Returns:
+            Validated ISBN
+            
+        Raises:
+            ValidationError: If the check digit is wrong or the book already exists
+        """
+        if not value:
+            return value
+        cleaned = clean_isbn(value)
+        if looks_like_isbn(cleaned) and not (is_valid_isbn10(cleaned) or is_valid_isbn13(cleaned)):
+            raise serializers.ValidationError("This ISBN has an invalid check digit.")
+        duplicates = Book.objects.filter(isbn_key=canonical_isbn(value))
+        if self.instance is not None:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("A book with this ISBN already exists.")
+        return value
+    
+    def to_representation(self, instance):
+        """
+        Serialize a book, reporting the requesting user's read status when known.
+        
+        Args:
+            instance: Book instance, optionally annotated with reader_is_read
+            
+        Returns:
+            Dictionary of book data
+        """
+        data = super().to_representation(instance)
+        if getattr(instance, 'reader_is_read', None) is not None:
+            data['is_read'] = instance.reader_is_read
+        return data
     
     def create(self, validated_data):
         """
@@ -118,7 +166,20 @@ class BookSerializer(serializers.ModelSerializer):
             validated_data['added_by'] = request.user
         return super().create(validated_data)
 
-class NotificationSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    """
+    Serializer for Author model.
+    
+    Authors are read-only through the API; they are created and counted as
+    books are saved.
+    """
+    
+    class Meta:
+        model = Author
+        fields = ['id', 'name', 'book_count']
+        read_only_fields = fields
+
+class NotificationSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for Notification model with user and book details.
     
@@ -135,9 +196,9 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'user_username', 'title', 'message', 
             'notification_type', 'notification_type_display', 'book_recommendation',
-            'book_title', 'book_author', 'is_read', 'created_at'
+            'book_title', 'book_author', 'is_read', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user', 'created_at']
+        read_only_fields = ['id', 'user', 'created_at', 'updated_at']
     
     def create(self, validated_data):
         """
@@ -154,7 +215,7 @@ class NotificationSerializer(serializers.ModelSerializer):
             validated_data['user'] = request.user
         return super().create(validated_data)
 
-class BookStatisticsSerializer(serializers.Serializer):
+class BookStatisticsSerializer(TimedRepresentationMixin, serializers.Serializer):
     """
     Serializer for book statistics data.
     
@@ -168,7 +229,7 @@ class BookStatisticsSerializer(serializers.Serializer):
     most_read_books = BookSerializer(many=True)
     most_viewed_books = BookSerializer(many=True)
 
-class UserStatisticsSerializer(serializers.Serializer):
+class UserStatisticsSerializer(TimedRepresentationMixin, serializers.Serializer):
     """
     Serializer for user statistics data.
     
@@ -179,7 +240,7 @@ class UserStatisticsSerializer(serializers.Serializer):
     regular_users = serializers.IntegerField()
     users = UserSerializer(many=True)
 
-class SystemStatisticsSerializer(serializers.Serializer):
+class SystemStatisticsSerializer(TimedRepresentationMixin, serializers.Serializer):
     """
     Serializer for system-wide statistics data.
     
@@ -230,3 +291,62 @@ class PasswordChangeSerializer(serializers.Serializer):
             raise serializers.ValidationError("New password must be different from current password.")
         
         return attrs
+
+class BatchOperationSerializer(serializers.Serializer):
+    """
+    Serializer for a single sub-request inside a batch call.
+    
+    This serializer describes one API call to run in-process: the HTTP method,
+    the API path (with optional query string) and an optional JSON body.
+    """
+    method = serializers.ChoiceField(choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE'], default='GET')
+    path = serializers.CharField(max_length=2000)
+    body = serializers.JSONField(required=False)
+    
+    def validate_path(self, value):
+        """
+        Validate that the sub-request targets the REST API.
+        
+        Args:
+            value: Requested path
+            
+        Returns:
+            Validated path
+            
+        Raises:
+            ValidationError: If the path is outside /api/ or is the batch endpoint itself
+        """
+        if not value.startswith('/api/'):
+            raise serializers.ValidationError("Only /api/ paths can be batched.")
+        if value.split('?', 1)[0].rstrip('/') == '/api/batch':
+            raise serializers.ValidationError("Batch requests cannot be nested.")
+        return value
+
+class BatchRequestSerializer(serializers.Serializer):
+    """
+    Serializer for batch API calls.
+    
+    This serializer validates the list of sub-requests sent to the batch endpoint.
+    """
+    MAX_REQUESTS = 20
+    
+    requests = BatchOperationSerializer(many=True)
+    
+    def validate_requests(self, value):
+        """
+        Validate the number of sub-requests.
+        
+        Args:
+            value: List of validated sub-requests
+            
+        Returns:
+            Validated list
+            
+        Raises:
+            ValidationError: If the list is empty or too long
+        """
+        if not value:
+            raise serializers.ValidationError("At least one request is required.")
+        if len(value) > self.MAX_REQUESTS:
+            raise serializers.ValidationError(f"At most {self.MAX_REQUESTS} requests can be batched.")
+        return value
@@ -0,0 +1,102 @@
+"""
+Signal handlers for the Book Catalog application.
+
+These handlers append every Book and Notification insert, update and delete
+to the ChangeLog feed that powers the incremental sync API, and keep author
+book counts current when books are deleted. Library entries are logged as
+changes to their book in the entry owner's feed, and edits of a book are
+copied into the feed of everyone who saved it.
+
+Bulk operations that write the tombstones and recount authors themselves
+(merge_books) switch the per-row delete handlers off with bulk_delete().
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Author, Book, LibraryEntry, Notification, ChangeLog
+
+_bulk_deleting = ContextVar('bulk_deleting', default=False)
+
+
+@contextmanager
+def bulk_delete():
+    """
+    Skip the tombstone and author recount handlers of Book and LibraryEntry deletes.
+
+    The caller records the tombstones with one ChangeLog.record_changes call
+    and recounts each affected author once, instead of once per deleted row.
+    """
+    token = _bulk_deleting.set(True)
+    try:
+        yield
+    finally:
+        _bulk_deleting.reset(token)
+
+
+@receiver(post_save, sender=Book)
+def log_book_saved(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Record a created or updated book.
+    
+    Updates go to the owner's feed and to the feed of every user who has the
+    book in their library through a LibraryEntry. Deletes need no fan-out:
+    the entries are deleted with the book and log their own tombstones.
+    
+    View count increments are skipped: the home page bumps every listed book on
+    each visit, and logging those would make sync traffic follow page views
+    instead of real catalog changes.
+    """
+    if update_fields is not None and set(update_fields) == {'view_count'}:
+        return
+    if created:
+        ChangeLog.record('book', instance.pk, instance.added_by_id, 'create')
+        return
+    savers = instance.library_entries.exclude(user=instance.added_by_id).values_list('user_id', flat=True)
+    ChangeLog.record_changes(
+        ('book', instance.pk, owner_id, 'update') for owner_id in [instance.added_by_id, *savers]
+    )
+
+
+@receiver(post_delete, sender=Book)
+def log_book_deleted(sender, instance, **kwargs):
+    """Record a tombstone for a deleted book."""
+    if _bulk_deleting.get():
+        return
+    ChangeLog.record('book', instance.pk, instance.added_by_id, 'delete')
+
+
+@receiver(post_delete, sender=Book)
+def refresh_author_count(sender, instance, **kwargs):
+    """Recount the books of a deleted book's author."""
+    if _bulk_deleting.get():
+        return
+    Author.refresh_book_counts([instance.author_ref_id])
+
+
+@receiver(post_save, sender=Notification)
+def log_notification_saved(sender, instance, created, **kwargs):
+    """Record a created or updated notification."""
+    ChangeLog.record('notification', instance.pk, instance.user_id, 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=Notification)
+def log_notification_deleted(sender, instance, **kwargs):
+    """Record a tombstone for a deleted notification."""
+    ChangeLog.record('notification', instance.pk, instance.user_id, 'delete')
+
+
+@receiver(post_save, sender=LibraryEntry)
+def log_library_entry_saved(sender, instance, created, **kwargs):
+    """Record a book added to, or updated in, a user's library."""
+    ChangeLog.record('book', instance.book_id, instance.user_id, 'create' if created else 'update')
+
+
+@receiver(post_delete, sender=LibraryEntry)
+def log_library_entry_deleted(sender, instance, **kwargs):
+    """Record a tombstone for a book removed from a user's library."""
+    if _bulk_deleting.get():
+        return
+    ChangeLog.record('book', instance.book_id, instance.user_id, 'delete')
@@ -0,0 +1,234 @@
+"""
+Slow query log for the Book Catalog application.
+
+SlowQueryMiddleware wraps the queries of each request with
+connection.execute_wrapper. A query slower than SLOW_QUERY_MS is written as
+one JSON line to a rotating file (SLOW_QUERY_LOG_PATH) with its SQL,
+parameters, the view being served and the application lines that issued
+it. On PostgreSQL a sample of slow SELECTs (SLOW_QUERY_EXPLAIN_RATE) is
+re-run under EXPLAIN (ANALYZE, BUFFERS) and the plan stored with the entry.
+The admin reads the log at /admin-dashboard/slow-queries/.
+
+Each gunicorn worker writes to the same file; rotation is per process, so
+around a rollover a few lines may land in a backup file.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics, timing
+from .query_budget import query_origin
+
+logger = logging.getLogger(__name__)
+_explaining = ContextVar('slow_query_explaining', default=False)
+_handlers = {}
+# execute_wrapper hooks sit between the application code and the database
+_INSTRUMENTATION = tuple(os.path.abspath(module.__file__) for module in (metrics, timing)) + (os.path.abspath(__file__),)
+# Django's stored password hashes ("algorithm$iterations$salt$hash") never go to the log
+_PASSWORD_HASH = re.compile(r'^[a-z0-9_]+\$\S*\$\S+$')
+
+
+def _redact(value):
+    if isinstance(value, str) and _PASSWORD_HASH.match(value):
+        return '<redacted>'
+    return value
+
+
+def loggable_params(params, many):
+    """
+    Make query parameters JSON-safe for the log, hiding password hashes and truncating batches.
+
+    Args:
+        params: Parameters passed to cursor.execute or executemany
+        many: Whether params is a sequence of parameter sets
+
+    Returns:
+        JSON-serializable parameters
+    """
+    if params is None:
+        return None
+    if many:
+        params = list(params)
+        logged = [loggable_params(p, False) for p in params[:3]]
+        return logged + [f'... {len(params) - 3} more'] if len(params) > 3 else logged
+    if isinstance(params, dict):
+        return {key: _redact(value) if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+                for key, value in params.items()}
+    return [_redact(value) if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+            for value in params]
+
+
+def _file_handler(path):
+    handler = _handlers.get(path)
+    if handler is None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(
+            path, maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES, backupCount=settings.SLOW_QUERY_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _handlers[path] = handler
+    return handler
+
+
+def write_entry(entry, path=None):
+    """
+    Append one slow query entry to the rotating log.
+
+    Args:
+        entry: JSON-serializable dictionary
+        path: Log file (default: SLOW_QUERY_LOG_PATH)
+    """
+    record = logging.makeLogRecord({'msg': json.dumps(entry, default=str), 'levelno': logging.WARNING})
+    _file_handler(path or settings.SLOW_QUERY_LOG_PATH).handle(record)
+
+
+def explain(db, sql, params):
+    """
+    Run a SELECT again under EXPLAIN (ANALYZE, BUFFERS).
+
+    The statement runs in a savepoint, so a failing EXPLAIN cannot break the
+    request's transaction.
+
+    Returns:
+        Plan text, or the error message when EXPLAIN failed
+    """
+    token = _explaining.set(True)
+    try:
+        with transaction.atomic(using=db.alias), db.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'EXPLAIN failed: {exc}'
+    finally:
+        _explaining.reset(token)
+
+
+class SlowQueryLogger:
+    """
+    execute_wrapper hook logging the queries of one request that exceed SLOW_QUERY_MS.
+
+    Attributes:
+        request: HttpRequest being served, for the view name and path
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def __call__(self, execute, sql, params, many, context):
+        if _explaining.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = execute(sql, params, many, context)
+            failed = False
+            return result
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            if ms >= settings.SLOW_QUERY_MS:
+                try:
+                    self.record(context['connection'], sql, params, many, ms, failed)
+                except Exception:
+                    # Losing a log entry must never fail the request
+                    logger.exception('Could not record slow query')
+
+    def record(self, db, sql, params, many, ms, failed):
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'time': timezone.now().isoformat(timespec='seconds'),
+            'ms': round(ms, 1),
+            'sql': sql,
+            'params': loggable_params(params, many),
+            'view': match.view_name if match else None,
+            'path': self.request.path,
+            'origin': query_origin(limit=5, skip=_INSTRUMENTATION),
+            'failed': failed,
+            'explain': None,
+        }
+        if (
+            not failed and not many and db.vendor == 'postgresql'
+            and sql.lstrip().upper().startswith('SELECT')
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        ):
+            entry['explain'] = explain(db, sql, params)
+        write_entry(entry)
+
+
+class SlowQueryMiddleware(MiddlewareMixin):
+    """Log slow queries of every request; SLOW_QUERY_MS = 0 turns the log off."""
+
+    def process_request(self, request):
+        if settings.SLOW_QUERY_MS:
+            request._slow_query_wrapper = connection.execute_wrapper(SlowQueryLogger(request))
+            request._slow_query_wrapper.__enter__()
+
+    def process_response(self, request, response):
+        wrapper = getattr(request, '_slow_query_wrapper', None)
+        if wrapper is not None:
+            wrapper.__exit__(None, None, None)
+        return response
+
+
+def read_entries(limit=200, path=None):
+    """
+    Read the most recent slow query entries.
+
+    Args:
+        limit: Maximum number of entries
+        path: Log file (default: SLOW_QUERY_LOG_PATH); its first backup is read too when needed
+
+    Returns:
+        List of entry dictionaries, newest first
+    """
+    path = path or settings.SLOW_QUERY_LOG_PATH
+    entries = []
+    for name in (path, f'{path}.1'):
+        try:
+            with open(name, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            continue
+        for line in reversed(lines):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+            if len(entries) >= limit:
+                return entries
+    return entries
+
+
+def summarize(entries):
+    """
+    Group entries by statement, slowest in total first.
+
+    Args:
+        entries: Entries from read_entries
+
+    Returns:
+        List of dicts with sql, count, total_ms, max_ms and the views that ran it
+    """
+    groups = OrderedDict()
+    for entry in entries:
+        group = groups.setdefault(
+            entry['sql'], {'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': []}
+        )
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        if entry.get('view') and entry['view'] not in group['views']:
+            group['views'].append(entry['view'])
+    return sorted(groups.values(), key=lambda group: -group['total_ms'])
@@ -1,11 +1,13 @@
-from django.test import TestCase, override_settings
+from django.test import LiveServerTestCase, TestCase, override_settings
 from .models import Book
 from datetime import datetime
 from django.contrib.auth.hashers import check_password
 from .models import User
 from .models import Tag, Notification
 from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from django.db import connection
 import os
 import unittest
 
@@ -276,3 +278,2337 @@ class EnvVarTest(TestCase):
             print('WARNING: EMAIL_HOST_USER or EMAIL_HOST_PASSWORD is not set in environment. Email tests will be skipped.')
             raise unittest.SkipTest('Email environment variables not set.')
         # If present, test passes
+
+class ConditionalGetTest(TestCase):
+    """
+    Test suite for conditional GET (ETag / 304 Not Modified) on collection endpoints.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create(username="poller", email="poller@example.com", password="pollpass")
+        self.book = Book.objects.create(
+            title="Polled Book",
+            author="Poll Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="js8888888881",
+            added_by=self.user
+        )
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def test_unchanged_book_list_returns_304(self):
+        """
+        Test that repeating a book list request with its ETag returns 304.
+        """
+        first = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first.headers)
+        second = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_changed_book_list_returns_200(self):
+        """
+        Test that updating or deleting a book invalidates the collection ETag.
+        """
+        first = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json')
+        self.book.is_read = True
+        self.book.save()
+        second = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.book.delete()
+        third = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=second.headers['ETag'])
+        self.assertEqual(third.status_code, 200)
+
+    def test_mark_all_read_invalidates_notification_list(self):
+        """
+        Test that bulk-marking notifications as read changes the notification ETag.
+        """
+        Notification.objects.create(user=self.user, title="Hello", message="Unread notification.")
+        first = self.client_api.get('/api/notifications/', HTTP_ACCEPT='application/json')
+        self.client_api.post('/api/notifications/mark_all_read/')
+        second = self.client_api.get('/api/notifications/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 200)
+
+    def test_view_count_change_invalidates_book_list(self):
+        """
+        Test that counting views, which does not touch updated_at, changes the book list ETag.
+        """
+        first = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json')
+        Book.increment_view_counts([self.book])
+        second = self.client_api.get('/api/books/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['results'][0]['view_count'], 1)
+
+    def test_recommended_book_change_invalidates_notification_list(self):
+        """
+        Test that editing a recommended book changes the ETag of the notifications showing it.
+        """
+        Notification.objects.create(user=self.user, title="Try this", message="A recommendation.", book_recommendation=self.book)
+        first = self.client_api.get('/api/notifications/', HTTP_ACCEPT='application/json')
+        self.book.title = "Renamed Book"
+        self.book.save()
+        second = self.client_api.get('/api/notifications/', HTTP_ACCEPT='application/json', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['results'][0]['book_title'], "Renamed Book")
+
+    def test_unchanged_home_page_returns_304(self):
+        """
+        Test that the HTML home page supports conditional GET and skips view counting.
+        """
+        session = self.client.session
+        session['user_id'] = self.user.id
+        session.save()
+        first = self.client.get('/home/')
+        self.assertEqual(first.status_code, 200)
+        second = self.client.get('/home/', HTTP_IF_NONE_MATCH=first.headers['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.view_count, 1)
+
+@override_settings(CHANGELOG_SETTLE_SECONDS=0)
+class SyncTest(TestCase):
+    """
+    Test suite for the change feed and the incremental sync endpoint.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create(username="syncer", email="syncer@example.com", password="syncpass")
+        self.other = User.objects.create(username="other", email="other@example.com", password="otherpass")
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def make_book(self, isbn, owner):
+        return Book.objects.create(
+            title=f"Sync {isbn}",
+            author="Sync Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn=isbn,
+            added_by=owner
+        )
+
+    def test_sync_returns_only_changes_since_token(self):
+        """
+        Test that a sync token only yields later changes, collapsed per object, with tombstones.
+        """
+        kept = self.make_book("js9000000001", self.user)
+        self.make_book("js9000000002", self.other)
+        token = self.client_api.get('/api/sync/').data['next_token']
+
+        kept.is_read = True
+        kept.save()
+        kept.increment_view_count()
+        gone = self.make_book("js9000000003", self.user)
+        gone_id = gone.id
+        gone.delete()
+
+        data = self.client_api.get('/api/sync/', {'since': token}).data
+        changes = [(c['model'], c['id'], c['action']) for c in data['changes']]
+        self.assertEqual(changes, [('book', kept.id, 'update'), ('book', gone_id, 'delete')])
+        self.assertTrue(data['changes'][0]['data']['is_read'])
+        self.assertFalse(data['has_more'])
+
+    def test_sync_paginates_by_sequence(self):
+        """
+        Test that the limit parameter pages through the feed without gaps.
+        """
+        books = [self.make_book(f"js900000001{i}", self.user) for i in range(3)]
+        first = self.client_api.get('/api/sync/', {'limit': 2}).data
+        self.assertTrue(first['has_more'])
+        second = self.client_api.get('/api/sync/', {'since': first['next_token'], 'limit': 2}).data
+        self.assertFalse(second['has_more'])
+        seen = [c['id'] for c in first['changes'] + second['changes']]
+        self.assertEqual(seen, [b.id for b in books])
+
+    def test_sync_follows_saved_books(self):
+        """
+        Test that edits of a saved book reach the saver's feed with the saver's read status.
+        """
+        from .models import LibraryEntry
+        book = self.make_book("js9000000020", self.other)
+        LibraryEntry.objects.create(user=self.user, book=book, is_read=True)
+        token = self.client_api.get('/api/sync/').data['next_token']
+        book.title = "Renamed"
+        book.save()
+        changes = self.client_api.get('/api/sync/', {'since': token}).data['changes']
+        self.assertEqual([(c['id'], c['action']) for c in changes], [(book.id, 'update')])
+        self.assertEqual(changes[0]['data']['title'], "Renamed")
+        self.assertTrue(changes[0]['data']['is_read'])
+
+    @override_settings(CHANGELOG_SETTLE_SECONDS=30)
+    def test_token_waits_for_changes_to_settle(self):
+        """
+        Test that recent changes are sent again until they are older than the settle period.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ChangeLog
+        old = self.make_book("js9000000030", self.user)
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        recent = self.make_book("js9000000031", self.user)
+        data = self.client_api.get('/api/sync/').data
+        self.assertEqual([c['id'] for c in data['changes']], [old.id, recent.id])
+        self.assertEqual(data['next_token'], str(ChangeLog.objects.get(object_id=old.id).id))
+        data = self.client_api.get('/api/sync/', {'since': data['next_token']}).data
+        self.assertEqual([c['id'] for c in data['changes']], [recent.id])
+
+    def test_pruned_token_is_gone(self):
+        """
+        Test that pruning keeps recent changes and expires tokens older than the pruned entries.
+        """
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from io import StringIO
+        from .models import ChangeLog
+        books = [self.make_book(f"js900000004{i}", self.user) for i in range(3)]
+        ChangeLog.objects.exclude(object_id=books[2].id).update(created_at=timezone.now() - timedelta(days=100))
+        out = StringIO()
+        call_command('prune_changelog', stdout=out)
+        self.assertIn('Deleted 2 change feed entries', out.getvalue())
+        response = self.client_api.get('/api/sync/')
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.data['next_token'], str(ChangeLog.objects.get(object_id=books[2].id).id))
+        response = self.client_api.get('/api/sync/', {'since': ChangeLog.pruned_through()})
+        self.assertEqual([c['id'] for c in response.data['changes']], [books[2].id])
+
+    def test_sync_rejects_invalid_token(self):
+        """
+        Test that a malformed sync token is rejected with 400.
+        """
+        response = self.client_api.get('/api/sync/', {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+class BatchApiTest(TestCase):
+    """
+    Test suite for the batch endpoint running several API calls in one request.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create(username="batcher", email="batcher@example.com", password="batchpass")
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def test_batch_runs_sub_requests_in_order(self):
+        """
+        Test that GET and POST sub-requests run with the caller's identity and return in order.
+        """
+        response = self.client_api.post('/api/batch/', {'requests': [
+            {'method': 'GET', 'path': '/api/users/me/'},
+            {'method': 'POST', 'path': '/api/books/', 'body': {
+                'title': 'Batched', 'author': 'Batch Author', 'published_date': '2023-01-01', 'isbn': 'js9100000001'
+            }},
+            {'method': 'GET', 'path': '/api/books/statistics/'},
+            {'method': 'GET', 'path': '/api/notifications/unread_count/'},
+            {'method': 'GET', 'path': '/api/does-not-exist/'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['responses']
+        self.assertEqual([r['status'] for r in results], [200, 201, 200, 200, 404])
+        self.assertEqual(results[0]['body']['username'], 'batcher')
+        self.assertEqual(results[2]['body']['total_books'], 1)
+        self.assertEqual(results[3]['body']['unread_count'], 0)
+        self.assertEqual(Book.objects.get(isbn='js9100000001').added_by, self.user)
+
+    def test_batch_rejects_non_api_and_nested_paths(self):
+        """
+        Test that only /api/ paths can be batched and batches cannot be nested.
+        """
+        for path in ['/home/', '/api/batch/']:
+            response = self.client_api.post('/api/batch/', {'requests': [{'path': path}]}, format='json')
+            self.assertEqual(response.status_code, 400)
+
+class FastRendererTest(TestCase):
+    """
+    Test suite for the orjson and MessagePack API renderers and parsers.
+    """
+
+    def test_orjson_renderer_matches_stock_renderer(self):
+        """
+        Test that the orjson renderer produces the same document as the stock JSON renderer.
+        """
+        import json
+        from decimal import Decimal
+        from datetime import timezone as dt_timezone
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer, orjson
+        if orjson is None:
+            raise unittest.SkipTest('orjson is not installed.')
+        data = {
+            'created_at': datetime(2024, 1, 15, 10, 30, tzinfo=dt_timezone.utc),
+            'published_date': datetime(2023, 1, 1).date(),
+            'price': Decimal('9.99'),
+            'title': 'Line\u2028separator',
+            1: 'non-string key',
+        }
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertNotIn(b'\xe2\x80\xa8', ORJSONRenderer().render(data))
+
+    def test_msgpack_round_trip(self):
+        """
+        Test that a book list survives a MessagePack render/parse round trip.
+        """
+        from io import BytesIO
+        from .renderers import MessagePackRenderer, MessagePackParser, msgpack
+        if msgpack is None:
+            raise unittest.SkipTest('msgpack is not installed.')
+        data = [{'id': 1, 'title': 'Packed', 'published_date': datetime(2023, 1, 1).date()}]
+        parsed = MessagePackParser().parse(BytesIO(MessagePackRenderer().render(data)))
+        self.assertEqual(parsed, [{'id': 1, 'title': 'Packed', 'published_date': '2023-01-01'}])
+
+class BookMultiGetTest(TestCase):
+    """
+    Test suite for fetching many books by id or ISBN in one request.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create(username="multi", email="multi@example.com", password="multipass")
+        self.other = User.objects.create(username="hidden", email="hidden@example.com", password="hiddenpass")
+        self.books = [
+            Book.objects.create(
+                title=f"Multi {i}",
+                author="Multi Author",
+                published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+                isbn=f"js920000000{i}",
+                added_by=self.user if i < 25 else self.other
+            )
+            for i in range(26)
+        ]
+        self.client_api = APIClient()
+        self.client_api.force_authenticate(user=self.user)
+
+    def test_multi_get_by_ids_and_isbns_in_one_query(self):
+        """
+        Test that ids and ISBNs resolve in one unpaginated response without N+1 queries.
+
+        The three queries are the conditional GET validators (library entries and
+        books) and the IN lookup itself.
+        """
+        ids = ','.join(str(b.id) for b in self.books[:22])
+        with self.assertNumQueries(3):
+            isbns = f'{self.books[23].isbn},{self.books[24].isbn}'
+            response = self.client_api.get('/api/books/', {'ids': ids, 'isbns': isbns}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 24)
+
+    def test_multi_get_respects_visibility(self):
+        """
+        Test that books owned by other users are not returned to regular users.
+        """
+        response = self.client_api.get('/api/books/', {'ids': str(self.books[25].id)}, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.data, [])
+
+    @override_settings(BOOK_MULTI_GET_LIMIT=3)
+    def test_multi_get_limit_and_invalid_ids(self):
+        """
+        Test that too many values or non-integer ids are rejected with 400.
+        """
+        self.assertEqual(self.client_api.get('/api/books/', {'ids': '1,2,3,4'}).status_code, 400)
+        self.assertEqual(self.client_api.get('/api/books/', {'ids': '1,x'}).status_code, 400)
+
+class BlockAllocatorTest(TestCase):
+    """
+    Test suite for the block-based id allocator behind generated JS ISBNs.
+    """
+
+    def setUp(self):
+        # On PostgreSQL allocators draw from sequences that migrations create; make the test ones here
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE SEQUENCE books_test_block_seq INCREMENT BY 3")
+                cursor.execute("CREATE SEQUENCE books_test_shared_seq INCREMENT BY 5")
+
+    def test_allocator_reserves_blocks(self):
+        """
+        Test that values are unique and only the first value of each block hits the database.
+        """
+        from .sequences import BlockAllocator
+        allocator = BlockAllocator('test_block', block_size=3)
+        first = allocator.allocate()
+        with self.assertNumQueries(0):
+            second = allocator.allocate()
+            third = allocator.allocate()
+        fourth = allocator.allocate()
+        self.assertEqual([first, second, third, fourth], [first, first + 1, first + 2, first + 3])
+
+    def test_separate_allocators_never_collide(self):
+        """
+        Test that two allocators sharing a counter (like two worker processes) get disjoint blocks.
+        """
+        from .sequences import BlockAllocator
+        worker_a = BlockAllocator('test_shared', block_size=5)
+        worker_b = BlockAllocator('test_shared', block_size=5)
+        values = [worker_a.allocate() for _ in range(7)] + [worker_b.allocate() for _ in range(7)]
+        self.assertEqual(len(set(values)), 14)
+
+    def test_generate_js_isbn_does_not_count_books(self):
+        """
+        Test that generated JS ISBNs are unique and do not depend on the number of books.
+        """
+        from .sequences import generate_js_isbn
+        isbns = {generate_js_isbn() for _ in range(5)}
+        self.assertEqual(len(isbns), 5)
+        self.assertTrue(all(isbn.startswith('JS') for isbn in isbns))
+
+class IsbnNormalizationTest(TestCase):
+    """
+    Test suite for ISBN canonicalization and canonical-key duplicate checks.
+    """
+
+    def test_canonical_isbn_variants(self):
+        """
+        Test that hyphenated, ISBN-10 and differently-cased ids share one canonical key.
+        """
+        from .isbn import canonical_isbn
+        self.assertEqual(canonical_isbn('978-0-306-40615-7'), '9780306406157')
+        self.assertEqual(canonical_isbn('0-306-40615-2'), '9780306406157')
+        self.assertEqual(canonical_isbn('080442957x'), '9780804429573')
+        self.assertEqual(canonical_isbn('js00042'), canonical_isbn('JS42'))
+        self.assertEqual(canonical_isbn('ol45883w'), 'OL45883W')
+        self.assertIsNone(canonical_isbn('None'))
+        self.assertIsNone(canonical_isbn(''))
+
+    def test_key_is_stored_and_used_for_dedup(self):
+        """
+        Test that saving a book stores its key and the form rejects other spellings of it.
+        """
+        from .forms import BookForm
+        book = Book.objects.create(
+            title="Canonical",
+            author="Key Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="0306406152"
+        )
+        self.assertEqual(book.isbn_key, '9780306406157')
+        form = BookForm(data={'title': 'Dup', 'author': 'Dup', 'published_date': '2023-01-01', 'isbn': '978-0306406157'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('isbn', form.errors)
+        form = BookForm(data={'title': 'Bad', 'author': 'Bad', 'published_date': '2023-01-01', 'isbn': '9780306406158'})
+        self.assertFalse(form.is_valid())
+
+    def test_delete_by_isbn_matches_any_spelling(self):
+        """
+        Test that deleting by ISBN finds the book through its canonical key.
+        """
+        Book.objects.create(
+            title="Delete Me",
+            author="Key Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="js00077"
+        )
+        self.client.get('/delete/JS77/')
+        self.assertFalse(Book.objects.filter(title="Delete Me").exists())
+
+
+class IsbnFilterTest(TestCase):
+    """
+    Test cases for the on-disk Bloom filter used for import dedup.
+    """
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'isbn_filter.bin')
+        self.settings_override = override_settings(ISBN_FILTER_PATH=self.path, ISBN_FILTER_MIN_CAPACITY=1000)
+        self.settings_override.enable()
+        Book.objects.create(
+            title="Filtered",
+            author="Filter Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="0306406152"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmpdir.cleanup()
+
+    def test_build_save_and_load(self):
+        """
+        Test that a persisted filter reloads with the same contents and no false negatives.
+        """
+        from .isbn_filter import IsbnFilter, load_isbn_filter
+        isbn_filter = load_isbn_filter()
+        self.assertIn('9780306406157', isbn_filter)
+        loaded = IsbnFilter.load(self.path)
+        self.assertEqual(loaded.bits, isbn_filter.bits)
+        self.assertEqual(loaded.watermark, isbn_filter.watermark)
+        self.assertIn('9780306406157', loaded)
+
+    def test_refresh_picks_up_new_and_edited_books(self):
+        """
+        Test that an incremental refresh adds keys changed since the watermark.
+        """
+        from .isbn_filter import load_isbn_filter
+        load_isbn_filter()
+        Book.objects.create(
+            title="Later",
+            author="Filter Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="9780804429573"
+        )
+        book = Book.objects.get(title="Filtered")
+        book.isbn = "JS00123"
+        book.save()
+        isbn_filter = load_isbn_filter()
+        self.assertIn('9780804429573', isbn_filter)
+        self.assertIn('JS123', isbn_filter)
+
+    @override_settings(CHANGELOG_SETTLE_SECONDS=30)
+    def test_refresh_rereads_unsettled_changes(self):
+        """
+        Test that a change committing after a newer one is still picked up on the next refresh.
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+        from .isbn_filter import load_isbn_filter
+        from .models import ChangeLog
+        ChangeLog.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        settled = load_isbn_filter().watermark
+        # An id allocated by a transaction that has not committed yet
+        pending = ChangeLog.record('book', 0, None, 'create')
+        Book.objects.create(
+            title="Visible",
+            author="Filter Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="9780804429573"
+        )
+        isbn_filter = load_isbn_filter()
+        self.assertIn('9780804429573', isbn_filter)
+        self.assertEqual(isbn_filter.watermark, settled)
+        late = Book.objects.bulk_create([Book(
+            title="Late",
+            author="Filter Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="9780141439587",
+            isbn_key="9780141439587",
+        )])[0]
+        ChangeLog.objects.filter(pk=pending.pk).update(object_id=late.pk)
+        self.assertIn('9780141439587', load_isbn_filter())
+
+    def test_absent_keys_skip_the_database(self):
+        """
+        Test that keys the filter rules out are answered without a query.
+        """
+        from .isbn_filter import existing_isbn_keys, load_isbn_filter
+        isbn_filter = load_isbn_filter()
+        absent = [key for key in (f'OL{i}W' for i in range(200)) if key not in isbn_filter]
+        with self.assertNumQueries(0):
+            self.assertEqual(existing_isbn_keys(absent, isbn_filter), set())
+        self.assertEqual(existing_isbn_keys(['9780306406157'] + absent, isbn_filter), {'9780306406157'})
+
+    def test_csv_import_skips_duplicates(self):
+        """
+        Test that the CSV importer skips ISBNs already in the catalog or repeated in the file.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        csv_path = os.path.join(self.tmpdir.name, 'books.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write('title,author,published_date,isbn,description\n')
+            f.write('Existing,A,2020-01-01,978-0-306-40615-7,\n')
+            f.write('New,B,1999,080442957X,\n')
+            f.write('New again,B,1999,9780804429573,\n')
+            f.write('No ISBN,C,,,\n')
+        out = StringIO()
+        call_command('import_books_csv', csv_path, stdout=out)
+        self.assertIn('Imported 2 books, skipped 2 duplicates.', out.getvalue())
+        self.assertEqual(Book.objects.filter(isbn_key='9780804429573').count(), 1)
+        self.assertEqual(Book.objects.get(title='New').isbn, '9780804429573')
+        self.assertTrue(Book.objects.get(title='No ISBN').isbn.startswith('JS'))
+
+    def test_csv_import_stores_canonical_isbns(self):
+        """
+        Test that hyphenated ISBN-13s fit the ISBN column and overlong values get a JS ISBN.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        csv_path = os.path.join(self.tmpdir.name, 'hyphenated.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write('title,author,published_date,isbn,description\n')
+            f.write('Hyphenated,A,2020-01-01,978-0-14-143958-7,\n')
+            f.write('Overlong,B,2020-01-01,not-an-isbn-at-all,\n')
+        out = StringIO()
+        call_command('import_books_csv', csv_path, stdout=out)
+        self.assertIn('Imported 2 books, skipped 0 duplicates.', out.getvalue())
+        self.assertEqual(Book.objects.get(title='Hyphenated').isbn, '9780141439587')
+        self.assertTrue(Book.objects.get(title='Overlong').isbn.startswith('JS'))
+
+
+    def test_csv_reimport_keeps_js_isbns(self):
+        """
+        Test that re-importing an export keeps its JS ISBNs, skips the books already present
+        and moves generated JS ISBNs past the imported ones.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        from .sequences import generate_js_isbn
+        from .isbn import canonical_isbn
+        csv_path = os.path.join(self.tmpdir.name, 'export.csv')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write('title,author,published_date,isbn,description\n')
+            f.write('Home Made,A,2020-01-01,JS00007,\n')
+            f.write('Far Ahead,B,2020-01-01,js900000,\n')
+        call_command('import_books_csv', csv_path, stdout=StringIO())
+        out = StringIO()
+        call_command('import_books_csv', csv_path, stdout=out)
+        self.assertIn('Imported 0 books, skipped 2 duplicates.', out.getvalue())
+        self.assertEqual(Book.objects.get(title='Home Made').isbn, 'JS00007')
+        self.assertEqual(Book.objects.get(title='Far Ahead').isbn_key, 'JS900000')
+        self.assertGreater(int(canonical_isbn(generate_js_isbn())[2:]), 900000)
+
+class AuthorTest(TestCase):
+    """
+    Test cases for normalized authors, their book counts and the author API.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.user = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for title, author in [("Hobbit", "J.R.R. Tolkien"), ("Silmarillion", "j. r. r.  tolkien"), ("Dune", "Frank Herbert")]:
+            Book.objects.create(
+                title=title,
+                author=author,
+                published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+                added_by=self.user
+            )
+
+    def test_spellings_share_one_author(self):
+        """
+        Test that name variants map to one author with a maintained book count.
+        """
+        from .models import Author
+        tolkien = Author.objects.get(name_key='j r r tolkien')
+        self.assertEqual(tolkien.name, "J.R.R. Tolkien")
+        self.assertEqual(tolkien.book_count, 2)
+        book = Book.objects.get(title="Silmarillion")
+        book.author = "Christopher Tolkien"
+        book.save()
+        tolkien.refresh_from_db()
+        self.assertEqual(tolkien.book_count, 1)
+        Book.objects.get(title="Hobbit").delete()
+        tolkien.refresh_from_db()
+        self.assertEqual(tolkien.book_count, 0)
+
+    def test_view_count_save_skips_author_lookup(self):
+        """
+        Test that saving only the view count does not touch authors.
+        """
+        book = Book.objects.get(title="Dune")
+        with self.assertNumQueries(1):
+            book.increment_view_count()
+
+    def test_browse_autocomplete_and_books(self):
+        """
+        Test the author list, prefix autocomplete and per-author book listing.
+        """
+        response = self.client.get('/api/authors/')
+        self.assertEqual([a['name'] for a in response.data['results']], ["Frank Herbert", "J.R.R. Tolkien"])
+        response = self.client.get('/api/authors/autocomplete/', {'q': 'J.R'})
+        self.assertEqual(response.data, [{'id': response.data[0]['id'], 'name': "J.R.R. Tolkien", 'book_count': 2}])
+        response = self.client.get(f"/api/authors/{response.data[0]['id']}/books/")
+        self.assertEqual(sorted(b['title'] for b in response.data['results']), ["Hobbit", "Silmarillion"])
+        author_id = Book.objects.get(title="Dune").author_ref_id
+        response = self.client.get('/api/books/', {'author': author_id})
+        self.assertEqual([b['title'] for b in response.data['results']], ["Dune"])
+
+
+class LibraryEntryTest(TestCase):
+    """
+    Test cases for shared books in user libraries.
+    """
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        self.admin = User.objects.create(username="admin", email="admin@example.com", password="admin")
+        self.readers = [
+            User.objects.create(username=f"reader{i}", email=f"reader{i}@example.com", password="pw")
+            for i in range(3)
+        ]
+        self.book = Book.objects.create(
+            title="Shared",
+            author="Shared Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            isbn="9780306406157",
+            added_by=self.admin
+        )
+        self.api = APIClient()
+
+    def test_recommendation_adds_entries_instead_of_copies(self):
+        """
+        Test that saving a recommendation to every library adds no Book rows.
+        """
+        session = self.client.session
+        session['user_id'] = self.admin.id
+        session.save()
+        self.client.post('/send-notification/', {
+            'title': 'Read this',
+            'message': 'Good book',
+            'notification_type': 'recommendation',
+            'book_recommendation': self.book.id,
+            'save_book_to_list': 'on',
+        })
+        self.assertEqual(Book.objects.count(), 1)
+        self.assertEqual(set(self.book.library_entries.values_list('user_id', flat=True)), {u.id for u in self.readers})
+
+    def test_api_lists_library_with_per_user_read_status(self):
+        """
+        Test that a saved book is listed for the user and toggles only their read status.
+        """
+        from .models import LibraryEntry
+        LibraryEntry.add_for_users(self.book, [self.readers[0].id])
+        self.api.force_authenticate(self.readers[0])
+        response = self.api.get('/api/books/')
+        self.assertEqual([b['title'] for b in response.data['results']], ["Shared"])
+        response = self.api.post(f'/api/books/{self.book.id}/toggle_read/')
+        self.assertTrue(response.data['is_read'])
+        self.book.refresh_from_db()
+        self.assertFalse(self.book.is_read)
+        response = self.api.get('/api/books/', {'is_read': 'true'})
+        self.assertEqual(response.data['count'], 1)
+        self.api.force_authenticate(self.readers[1])
+        self.assertEqual(self.api.get('/api/books/').data['count'], 0)
+
+    def test_author_books_include_saved_books(self):
+        """
+        Test that an author's book list shows saved books with the reader's own read status.
+        """
+        from .models import LibraryEntry
+        LibraryEntry.objects.create(user=self.readers[0], book=self.book, is_read=True)
+        self.api.force_authenticate(self.readers[0])
+        response = self.api.get(f'/api/authors/{self.book.author_ref_id}/books/')
+        self.assertEqual([(b['title'], b['is_read']) for b in response.data['results']], [("Shared", True)])
+        self.api.force_authenticate(self.readers[1])
+        response = self.api.get(f'/api/authors/{self.book.author_ref_id}/books/')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_collapse_copies_into_entries(self):
+        """
+        Test that existing per-user copies are merged into one book plus library entries.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        from .models import LibraryEntry
+        copy = Book.objects.create(
+            title="Copied",
+            author="Copy Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            added_by=self.admin
+        )
+        duplicate = Book.objects.create(
+            title="Copied",
+            author="Copy Author",
+            published_date=datetime.strptime("01-01-2023", "%d-%m-%Y").date(),
+            is_read=True,
+            added_by=self.readers[0]
+        )
+        Notification.objects.create(user=self.readers[0], title="Rec", message="m", book_recommendation=duplicate)
+        out = StringIO()
+        call_command('collapse_book_copies', stdout=out)
+        self.assertIn('Collapsed 1 copies in 1 groups.', out.getvalue())
+        self.assertFalse(Book.objects.filter(pk=duplicate.pk).exists())
+        entry = LibraryEntry.objects.get(user=self.readers[0])
+        self.assertEqual(entry.book_id, copy.pk)
+        self.assertTrue(entry.is_read)
+        self.assertEqual(Notification.objects.get(title="Rec").book_recommendation_id, copy.pk)
+
+
+class DedupeBooksTest(TestCase):
+    """
+    Test cases for fingerprint-based duplicate detection and merging.
+    """
+
+    def make_book(self, title, author, date, **kwargs):
+        return Book.objects.create(
+            title=title,
+            author=author,
+            published_date=datetime.strptime(date, "%Y-%m-%d").date(),
+            **kwargs
+        )
+
+    def test_fingerprint_ignores_case_punctuation_and_article(self):
+        """
+        Test that near-duplicate spellings share a fingerprint and other years do not.
+        """
+        first = self.make_book("The Hobbit", "J.R.R. Tolkien", "1937-09-21")
+        second = self.make_book("hobbit!", "j. r. r. tolkien", "1937-01-01")
+        third = self.make_book("The Hobbit", "J.R.R. Tolkien", "1951-01-01")
+        self.assertEqual(first.fingerprint, second.fingerprint)
+        self.assertNotEqual(first.fingerprint, third.fingerprint)
+
+    def test_merge_repoints_references(self):
+        """
+        Test that merging moves tags, notifications and referrals to the kept book.
+        """
+        from django.core.management import call_command
+        from io import StringIO
+        owner = User.objects.create(username="owner", email="owner@example.com", password="pw")
+        keep = self.make_book("Dune", "Frank Herbert", "1965-08-01", isbn="9780441013593")
+        dup = self.make_book("DUNE", "frank herbert", "1965-01-01", added_by=owner)
+        tag = Tag.objects.create(name="scifi")
+        dup.tags.add(tag)
+        Notification.objects.create(user=owner, title="Rec", message="m", book_recommendation=dup)
+        owner.admin_referral = dup
+        owner.save()
+        # Rows written by bulk operations have no fingerprint until the command runs
+        Book.objects.filter(pk=dup.pk).update(fingerprint=None)
+        self.make_book("Dune", "Frank Herbert", "1965-01-01", isbn="9780340960196")
+        self.make_book("Emma", "Jane Austen", "1815-01-01", isbn="9780141439587")
+        self.make_book("emma", "jane austen", "1815-01-01", isbn="9780199535552")
+        out = StringIO()
+        call_command('dedupe_books', stdout=out)
+        self.assertIn('Fingerprinted 1 books.', out.getvalue())
+        # The Dune group has two real ISBNs (different editions) and is skipped, like Emma
+        self.assertIn('Merged 0 duplicates in 2 groups; skipped 2 groups', out.getvalue())
+        Book.objects.filter(isbn="9780340960196").delete()
+        out = StringIO()
+        call_command('dedupe_books', stdout=out)
+        self.assertIn('Merged 1 duplicates in 2 groups; skipped 1 groups', out.getvalue())
+        self.assertFalse(Book.objects.filter(pk=dup.pk).exists())
+        self.assertEqual(list(keep.tags.all()), [tag])
+        self.assertEqual(Notification.objects.get(title="Rec").book_recommendation_id, keep.pk)
+        owner.refresh_from_db()
+        self.assertEqual(owner.admin_referral_id, keep.pk)
+        self.assertTrue(keep.library_entries.filter(user=owner).exists())
+
+    def test_merge_reaches_sync_feed(self):
+        """
+        Test that owners and savers of a merged duplicate sync the kept book in its place.
+        """
+        from rest_framework.test import APIClient
+        from .merge import merge_books
+        from .models import ChangeLog, LibraryEntry
+        owner = User.objects.create(username="owner", email="owner@example.com", password="pw")
+        saver = User.objects.create(username="saver", email="saver@example.com", password="pw")
+        keep = self.make_book("Dune", "Frank Herbert", "1965-08-01")
+        dup = self.make_book("DUNE", "frank herbert", "1965-01-01", added_by=owner)
+        LibraryEntry.objects.create(user=saver, book=dup)
+        notification = Notification.objects.create(user=saver, title="Rec", message="m", book_recommendation=dup)
+        since = ChangeLog.objects.latest('id').id
+        merge_books(keep, [dup.pk])
+        client = APIClient()
+        for user, expected in [
+            (owner, [('book', dup.pk, 'delete'), ('book', keep.pk, 'create')]),
+            (saver, [('book', dup.pk, 'delete'), ('book', keep.pk, 'create'), ('notification', notification.pk, 'update')]),
+        ]:
+            client.force_authenticate(user)
+            changes = client.get('/api/sync/', {'since': since}).data['changes']
+            self.assertEqual(sorted((c['model'], c['id'], c['action']) for c in changes), sorted(expected))
+            self.assertEqual([b['id'] for b in client.get('/api/books/').data['results']], [keep.pk])
+
+    def test_merge_cost_does_not_grow_with_duplicates(self):
+        """
+        Test that merging writes tombstones in bulk and recounts authors once, whatever the number of duplicates.
+        """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .merge import merge_books
+        from .models import Author, ChangeLog
+        owner = User.objects.create(username="owner", email="owner@example.com", password="pw")
+        counts = []
+        for copies in (2, 6):
+            keep = self.make_book("Dune", "Frank Herbert", "1965-08-01")
+            dups = [self.make_book("DUNE", "frank herbert", "1965-01-01", added_by=owner) for _ in range(copies)]
+            since = ChangeLog.objects.latest('id').id
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(merge_books(keep, [dup.pk for dup in dups]), copies)
+            counts.append(len(queries))
+            tombstones = ChangeLog.objects.filter(id__gt=since, action='delete', owner_id=owner.pk)
+            self.assertEqual(sorted(tombstones.values_list('object_id', flat=True)), sorted(dup.pk for dup in dups))
+            keep.delete()
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Author.objects.get(name="Frank Herbert").book_count, 0)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Planner checks target PostgreSQL, the production database')
+class IndexUsageTest(TestCase):
+    """
+    Test that the PostgreSQL planner uses the composite and partial indexes for the hot queries.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="indexed", email="indexed@example.com", password="pw")
+        # Test tables are tiny, so a sequential or bitmap scan plus sort would always win on cost
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+        self.assertNotIn('Sort', plan, plan)
+
+    def test_most_read_uses_read_views_index(self):
+        """
+        Test that the most read books come straight from the (is_read, view_count) index.
+        """
+        self.assertUsesIndex(Book.get_most_read(), 'book_read_views_idx')
+
+    def test_notification_lists_use_user_indexes(self):
+        """
+        Test that notification lists and unread lookups use the per-user indexes.
+        """
+        self.assertUsesIndex(Notification.objects.filter(user=self.user).order_by('-created_at'), 'notif_user_created_idx')
+        self.assertUsesIndex(
+            Notification.objects.filter(user=self.user, is_read=False).order_by('-created_at'),
+            'notif_user_unread_idx'
+        )
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Planner checks target PostgreSQL, the production database')
+class QueryPlanRegressionTest(TestCase):
+    """
+    Test the query plans of the hot pages against reviewed EXPLAIN snapshots.
+
+    Each scenario requests a page over a seeded catalog, runs EXPLAIN on every
+    SELECT it issued that reads a large table, and fails on a sequential scan
+    or sort the scenario does not allow, or when the plan shape differs from
+    books/query_plans.json. Sequential scans and sorts are disabled while
+    planning, so one only shows up when no index can serve the query at all.
+
+    After an intended plan change, review the new plans and rewrite the
+    snapshots by running this test with UPDATE_PLAN_SNAPSHOTS=1.
+    """
+    SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), 'query_plans.json')
+    LARGE_TABLES = {'books_book', 'books_notification', 'books_libraryentry', 'books_changelog'}
+    USERS = 20
+    BOOKS = 5000
+
+    # name, client, path, tables allowed a sequential scan, allowed sort keys
+    SCENARIOS = [
+        # Substring search over the whole catalog has no index to use
+        ('home_search', 'web', '/home/?search=silmarillion', {'books_book'}, set()),
+        ('notifications_page', 'web', '/notifications/', set(), set()),
+        # A library merges two sources, so its orderings are sorted after the lookup
+        ('api_books', 'api', '/api/books/', set(), {'books_book.created_at DESC'}),
+        ('api_books_unread', 'api', '/api/books/?is_read=false', set(), {'books_book.created_at DESC'}),
+        ('api_book_statistics', 'api', '/api/books/statistics/', set(), {'books_book.view_count DESC'}),
+        ('api_notifications', 'api', '/api/notifications/', set(), set()),
+        # System statistics count and rank whole tables
+        ('api_system_statistics', 'admin', '/api/statistics/', {'books_book', 'books_notification'},
+         {'books_book.view_count DESC'}),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        from .models import LibraryEntry
+        cls.users = User.objects.bulk_create([
+            User(username=f"reader{i}", email=f"reader{i}@example.com", password="pw") for i in range(cls.USERS)
+        ])
+        cls.admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        words = ['river', 'night', 'garden', 'empire', 'shadow', 'winter', 'glass', 'ocean', 'iron', 'storm']
+        books = Book.objects.bulk_create([
+            Book(
+                title=f"{words[i % 10]} {words[i // 10 % 10]} {i}",
+                author=f"Author {i % 400}",
+                published_date=datetime(1950 + i % 70, 1, 1).date(),
+                isbn=f"PLAN{i:06d}",
+                isbn_key=f"PLAN{i:06d}",
+                added_by=cls.users[i % cls.USERS],
+                is_read=i % 3 == 0,
+                view_count=i % 500,
+            )
+            for i in range(cls.BOOKS)
+        ])
+        Book.objects.filter(pk=books[77].pk).update(title="The Silmarillion")
+        Notification.objects.bulk_create([
+            Notification(
+                user=cls.users[i % cls.USERS],
+                title=f"Recommendation {i}",
+                message="You might like this one",
+                notification_type='book_recommendation',
+                book_recommendation=book,
+                is_read=i % 10 != 0,
+            )
+            for i, book in enumerate(books)
+        ])
+        LibraryEntry.objects.bulk_create([
+            LibraryEntry(user=cls.users[i % cls.USERS], book=books[(i * 7 + 1) % cls.BOOKS], is_read=i % 2 == 0)
+            for i in range(1000)
+        ], ignore_conflicts=True)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        from rest_framework.test import APIClient
+        session = self.client.session
+        session['user_id'] = self.users[3].id
+        session.save()
+        self.clients = {'web': self.client, 'api': APIClient(), 'admin': APIClient()}
+        self.clients['api'].force_authenticate(self.users[3])
+        self.clients['admin'].force_authenticate(self.admin)
+
+    def capture_plans(self, client, path):
+        """Request a page and return the JSON plans of its SELECTs on large tables."""
+        import json
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        plans = []
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+            for query in context.captured_queries:
+                sql = query['sql']
+                if sql.startswith('SELECT') and any(f'"{table}"' in sql for table in self.LARGE_TABLES):
+                    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                    plan = cursor.fetchone()[0]
+                    plans.append((json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan'])
+        return plans
+
+    def plan_shape(self, node):
+        """
+        Reduce a plan to the indexes it reads, its sequential scans of large tables and its sorts.
+        
+        Costs, join strategies and the choice between plain, index-only and
+        bitmap scans of the same index are left out; they follow table
+        statistics and server version rather than the query.
+        """
+        shape = set()
+        node_type = node['Node Type']
+        if 'Index Name' in node:
+            shape.add(f"Index {node['Index Name']}")
+        elif node_type == 'Seq Scan' and node['Relation Name'] in self.LARGE_TABLES:
+            shape.add(f"Seq Scan on {node['Relation Name']}")
+        elif node_type in ('Sort', 'Incremental Sort'):
+            shape.add(f"Sort by {', '.join(node['Sort Key'])}")
+        for child in node.get('Plans', []):
+            shape |= self.plan_shape(child)
+        return shape
+
+    def test_hot_query_plans(self):
+        """
+        Test that hot pages avoid sequential scans and unexpected sorts and match the snapshots.
+        """
+        import json
+        shapes = {}
+        for name, client, path, seq_scan_tables, sort_keys in self.SCENARIOS:
+            with self.subTest(scenario=name):
+                plans = self.capture_plans(self.clients[client], path)
+                shapes[name] = [sorted(self.plan_shape(plan)) for plan in plans]
+                for shape in shapes[name]:
+                    for step in shape:
+                        if step.startswith('Seq Scan on '):
+                            self.assertIn(step[len('Seq Scan on '):], seq_scan_tables, f"{name}: {shape}")
+                        elif step.startswith('Sort by '):
+                            self.assertLessEqual(set(step[len('Sort by '):].split(', ')), sort_keys, f"{name}: {shape}")
+        if os.environ.get('UPDATE_PLAN_SNAPSHOTS') == '1':
+            with open(self.SNAPSHOT_PATH, 'w') as f:
+                json.dump(shapes, f, indent=2, sort_keys=True)
+                f.write('\n')
+            return
+        with open(self.SNAPSHOT_PATH) as f:
+            snapshots = json.load(f)
+        for name, shape in shapes.items():
+            with self.subTest(scenario=name):
+                self.assertEqual(
+                    shape, snapshots.get(name),
+                    f"Query plans of {name} changed; review them and rerun with UPDATE_PLAN_SNAPSHOTS=1"
+                )
+
+
+class QueryBudgetTest(TestCase):
+    """
+    Test every page and API endpoint against its query count and wall-time budget.
+
+    Budgets are read from books/query_budgets.json. Each scenario runs in a
+    rolled back savepoint, so endpoints that change data see the same seeded
+    catalog. A request over budget fails with the queries it ran, repeated
+    statements first, and the application lines that issued them.
+    """
+    READER_BOOKS = 30
+    READER_NOTIFICATIONS = 15
+    
+    # Pages that currently fail with a server error before doing their work.
+    # They are still driven, and the test fails once one starts working so its
+    # budget gets a real measurement.
+    BROKEN_ENDPOINTS = {
+        'GET edit_admin_referral', 'GET admin_set_referral', 'GET edit_profile', 'GET send_email',
+        'GET send_email_user', 'GET send_bulk_email', 'GET add_book', 'GET edit_book', 'GET toggle_read',
+        'GET read_books', 'GET unread_books',
+    }
+
+    # label ("<METHOD> <url name>"), role, url kwargs, request data
+    SCENARIOS = [
+        ('GET default', None, {}, None),
+        ('GET register_user', None, {}, None),
+        ('GET login_user', None, {}, None),
+        ('GET logout_user', 'reader', {}, None),
+        ('GET admin_dashboard', 'admin', {}, None),
+        ('POST delete_user', 'admin', {'user_id': 'other'}, {}),
+        ('GET change_user_email', 'admin', {'user_id': 'reader'}, None),
+        ('GET edit_admin_referral', 'admin', {'user_id': 'reader'}, None),
+        ('GET admin_view_user_books', 'admin', {'user_id': 'reader'}, None),
+        ('GET admin_set_referral', 'admin', {'user_id': 'reader'}, None),
+        ('GET admin_slow_queries', 'admin', {}, None),
+        ('GET admin_profiles', 'admin', {}, None),
+        ('GET admin_profile_download', 'admin', {'profile_id': 'profile', 'fmt': 'speedscope'}, None),
+        ('GET edit_profile', 'reader', {}, None),
+        ('GET change_password', 'reader', {}, None),
+        ('GET delete_profile', 'reader', {}, None),
+        ('GET view_notifications', 'reader', {}, None),
+        ('GET mark_notification_read', 'reader', {'notification_id': 'notification'}, None),
+        ('GET mark_all_notifications_read', 'reader', {}, None),
+        ('GET send_notification', 'admin', {}, None),
+        ('GET send_notification_user', 'admin', {'user_id': 'reader'}, None),
+        ('GET send_bulk_notification', 'admin', {}, None),
+        ('GET send_email', 'admin', {}, None),
+        ('GET send_email_user', 'admin', {'user_id': 'reader'}, None),
+        ('GET send_bulk_email', 'admin', {}, None),
+        ('GET home', 'reader', {}, None),
+        ('GET add_book', 'reader', {}, None),
+        ('GET edit_book', 'reader', {'pk': 'book'}, None),
+        ('POST delete_book_by_isbn', 'reader', {'isbn': 'isbn'}, {}),
+        ('GET toggle_read', 'reader', {'pk': 'book'}, None),
+        ('GET read_books', 'reader', {}, None),
+        ('GET unread_books', 'reader', {}, None),
+        ('GET open_library_search', 'reader', {}, None),
+        ('GET metrics', None, {}, None),
+        ('POST save_open_library_book', 'reader', {}, {
+            'title': 'Budgeted Book', 'author': 'Budget Author', 'published_date': '1999', 'isbn': '',
+        }),
+        ('GET api-root', 'reader', {}, None),
+        ('GET api-statistics', 'admin', {}, None),
+        ('GET api-sync', 'reader', {}, None),
+        ('POST api-batch', 'reader', {}, {'requests': [
+            {'method': 'GET', 'path': '/api/books/'}, {'method': 'GET', 'path': '/api/notifications/'},
+        ]}),
+        ('GET book-list', 'reader', {}, None),
+        ('POST book-list', 'reader', {}, {
+            'title': 'Budgeted Book', 'author': 'Budget Author', 'published_date': '1999-01-01', 'isbn': '',
+        }),
+        ('GET book-all', 'reader', {}, None),
+        ('GET book-read-books', 'reader', {}, None),
+        ('GET book-statistics', 'reader', {}, None),
+        ('GET book-unread-books', 'reader', {}, None),
+        ('GET book-detail', 'reader', {'pk': 'book'}, None),
+        ('POST book-toggle-read', 'reader', {'pk': 'book'}, {}),
+        ('GET author-list', 'reader', {}, None),
+        ('GET author-autocomplete', 'reader', {}, None),
+        ('GET author-detail', 'reader', {'pk': 'author'}, None),
+        ('GET author-books', 'reader', {'pk': 'author'}, None),
+        ('GET user-list', 'admin', {}, None),
+        ('GET user-me', 'reader', {}, None),
+        ('GET user-statistics', 'admin', {}, None),
+        ('POST user-bulk-import', 'admin', {}, {'file': SimpleUploadedFile(
+            'users.csv', b'username,email,password\nimported,imported@example.com,budget-pw\nreader,dup@example.com,pw\n',
+        )}),
+        ('GET user-detail', 'admin', {'pk': 'reader'}, None),
+        ('GET notification-list', 'reader', {}, None),
+        ('POST notification-mark-all-read', 'reader', {}, {}),
+        ('GET notification-unread-count', 'reader', {}, None),
+        ('GET notification-detail', 'reader', {'pk': 'notification'}, None),
+        ('POST notification-mark-read', 'reader', {'pk': 'notification'}, {}),
+        ('POST auth-login', None, {}, {'username': 'reader', 'password': 'budget-pw'}),
+        ('POST auth-logout', 'reader', {}, {}),
+        ('POST auth-register', None, {}, {
+            'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'budget-pw',
+            'confirm_password': 'budget-pw',
+        }),
+        ('POST auth-change-password', 'reader', {}, {
+            'current_password': 'budget-pw', 'new_password': 'budget-pw-2', 'confirm_new_password': 'budget-pw-2',
+        }),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        from .authors import author_name_key
+        from .models import Author, LibraryEntry
+        cls.reader = User.objects.create(username="reader", email="reader@example.com", password="budget-pw")
+        cls.other = User.objects.create(username="other", email="other@example.com", password="budget-pw")
+        cls.admin = User.objects.create(username="admin", email="admin@example.com", password="budget-pw")
+        authors = Author.resolve([f"Budget Author {i}" for i in range(5)])
+        tags = Tag.objects.bulk_create([Tag(name=f"Tag {i}") for i in range(3)])
+        books = Book.objects.bulk_create([
+            Book(
+                title=f"Budget Book {i}",
+                author=f"Budget Author {i % 5}",
+                author_ref=authors[author_name_key(f"Budget Author {i % 5}")],
+                published_date=datetime(1990 + i, 1, 1).date(),
+                isbn=f"BUDGET{i:04d}",
+                isbn_key=f"BUDGET{i:04d}",
+                added_by=cls.reader if i < cls.READER_BOOKS else cls.other,
+                is_read=i % 2 == 0,
+            )
+            for i in range(cls.READER_BOOKS + 10)
+        ])
+        Author.refresh_book_counts([author.pk for author in authors.values()])
+        for book in books:
+            book.tags.set(tags[:book.pk % 3])
+        LibraryEntry.add_for_users(books[-1], [cls.reader.pk])
+        Notification.objects.bulk_create([
+            Notification(
+                user=cls.reader,
+                title=f"Recommendation {i}",
+                message="Worth a read",
+                notification_type='book_recommendation',
+                book_recommendation=books[i],
+                is_read=i % 3 == 0,
+            )
+            for i in range(cls.READER_NOTIFICATIONS)
+        ])
+        cls.book = books[0]
+        cls.author = authors[author_name_key("Budget Author 0")]
+        cls.notification = Notification.objects.filter(user=cls.reader).first()
+
+    def resolve_kwargs(self, kwargs):
+        """Replace symbolic url kwargs with ids of the seeded objects."""
+        values = {
+            'reader': self.reader.pk, 'other': self.other.pk, 'book': self.book.pk,
+            'isbn': self.book.isbn, 'author': self.author.pk, 'notification': self.notification.pk,
+            'profile': '20260101T000000-00000000', 'speedscope': 'speedscope',
+        }
+        return {name: values[value] for name, value in kwargs.items()}
+
+    def run_scenario(self, label, role, kwargs, data):
+        """Request one endpoint as a role and return the response and its recording."""
+        from unittest import mock
+        from django.db import transaction
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from .query_budget import QueryRecorder
+        method, name = label.split(' ', 1)
+        client = APIClient(raise_request_exception=False)
+        import httpx
+        open_library = mock.Mock(status_code=200)
+        open_library.json.return_value = {'docs': [], 'works': []}
+        async_open_library = httpx.Response(200, json={'docs': [], 'works': []})
+        with transaction.atomic():
+            user = getattr(self, role) if role else None
+            if user is not None:
+                session = client.session
+                session['user_id'] = user.pk
+                session.save()
+                client.force_authenticate(user)
+            url = reverse(name, kwargs=self.resolve_kwargs(kwargs))
+            with mock.patch('books.views.requests.get', return_value=open_library), \
+                    mock.patch('books.views.httpx.AsyncClient.get', return_value=async_open_library), \
+                    QueryRecorder() as recorder:
+                if method == 'GET':
+                    response = client.get(url)
+                else:
+                    response = client.post(url, data, format='json' if name.startswith(('api-', 'auth-')) else None)
+            transaction.set_rollback(True)
+        return response, recorder
+
+    def url_names(self):
+        """Get the names of every pattern in books/urls.py and books/api_urls.py."""
+        from . import api_urls, urls
+        return {pattern.name for pattern in urls.urlpatterns + api_urls.urlpatterns}
+
+    def test_every_url_has_a_scenario_and_budget(self):
+        """
+        Test that every named URL is driven by a scenario and every scenario has a budget.
+        """
+        from .query_budget import load_budgets
+        budgets = load_budgets()
+        covered = {label.split(' ', 1)[1] for label, *_ in self.SCENARIOS}
+        self.assertEqual(self.url_names() - covered, set())
+        self.assertEqual({label for label, *_ in self.SCENARIOS} - set(budgets), set())
+
+    def test_endpoints_within_budget(self):
+        """
+        Test that every endpoint stays within its query count and wall-time budget.
+        """
+        from .query_budget import budget_for, load_budgets
+        budgets = load_budgets()
+        for label, role, kwargs, data in self.SCENARIOS:
+            with self.subTest(endpoint=label):
+                if label in self.BROKEN_ENDPOINTS:
+                    with self.assertLogs('django.request', level='ERROR'):
+                        response, recorder = self.run_scenario(label, role, kwargs, data)
+                    self.assertEqual(response.status_code, 500, f"{label} works now; drop it from BROKEN_ENDPOINTS")
+                else:
+                    response, recorder = self.run_scenario(label, role, kwargs, data)
+                    self.assertLess(response.status_code, 500, label)
+                problems = recorder.violations(budget_for(label, budgets))
+                if problems:
+                    self.fail(f"{label} over budget ({'; '.join(problems)})\n{recorder.report()}")
+
+
+class SeedCatalogTest(TestCase):
+    """
+    Test cases for the synthetic catalog generator.
+    """
+
+    def seed(self, **options):
+        from django.core.management import call_command
+        from io import StringIO
+        out = StringIO()
+        options = {'users': 4, 'books': 60, 'tags': 5, 'notifications': 30, 'seed': 42, 'covers': 0,
+                   'workers': 1, **options}
+        call_command('seed_catalog', stdout=out, **options)
+        return out.getvalue()
+
+    def test_seed_catalog_writes_requested_rows(self):
+        """
+        Test that seeding writes the requested rows with derived fields, tags, covers and change feed entries.
+        """
+        import tempfile
+        from .isbn import is_valid_isbn13
+        from .models import Author, ChangeLog
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            out = self.seed(covers=2)
+            self.assertTrue(os.path.exists(os.path.join(media_root, 'book_covers', 'seed', 'seed42-cover0.jpg')))
+        self.assertIn('Seeded 4 users, 7 authors, 60 books and 30 notifications with seed 42', out)
+        books = Book.objects.all()
+        self.assertEqual(books.count(), 60)
+        self.assertTrue(all(is_valid_isbn13(isbn) for isbn in books.values_list('isbn', flat=True)))
+        self.assertFalse(books.filter(author_ref=None).exists())
+        self.assertFalse(books.filter(fingerprint=None).exists())
+        self.assertTrue(books.exclude(cover_image='').exclude(cover_image=None).exists())
+        self.assertTrue(Book.tags.through.objects.exists())
+        self.assertEqual(sum(Author.objects.values_list('book_count', flat=True)), 60)
+        self.assertEqual(Notification.objects.count(), 30)
+        self.assertEqual(ChangeLog.objects.filter(model='book', action='create').count(), 60)
+        self.assertEqual(ChangeLog.objects.filter(model='notification', action='create').count(), 30)
+        self.assertEqual(User.objects.filter(username__startswith='seed42-').count(), 4)
+        self.assertTrue(check_password('seed-password', User.objects.get(username='seed42-reader0').password))
+
+    def test_seed_already_loaded_is_rejected(self):
+        """
+        Test that a seed cannot be loaded twice, since its ISBNs and usernames would collide.
+        """
+        from django.core.management.base import CommandError
+        self.seed(books=5, notifications=0)
+        with self.assertRaises(CommandError):
+            self.seed(books=5, notifications=0)
+
+    def test_blocks_are_deterministic(self):
+        """
+        Test that a block depends only on the seed and its number, not on the process writing it.
+        """
+        from .seeding import SeedContext, author_names, generate_books
+
+        def rows(seed, block):
+            context = SeedContext(seed, 100, [1, 2, 3], [(name, i) for i, name in enumerate(author_names(20))],
+                                  [7, 8, 9], [])
+            books, tags = generate_books(context, block, block * 50, block * 50 + 50)
+            return [(b.title, b.author, b.isbn, b.published_date, b.view_count, b.added_by_id) for b in books], tags
+
+        self.assertEqual(rows(1, 3), rows(1, 3))
+        self.assertNotEqual(rows(1, 3), rows(1, 4))
+        self.assertNotEqual(rows(1, 3)[0], rows(2, 3)[0])
+
+
+class EndpointBenchmarkTest(LiveServerTestCase):
+    """
+    Test cases for the endpoint load benchmark against a live server.
+    """
+
+    def setUp(self):
+        User.objects.create(username="reader", email="reader@example.com", password="bench-pw")
+        User.objects.create(username="admin", email="admin@example.com", password="admin")
+        Book.objects.create(
+            title="Benchmarked", author="Bench Author",
+            published_date=datetime.strptime("2001-01-01", "%Y-%m-%d").date(), isbn="0306406152",
+        )
+
+    def test_benchmark_records_history_and_flags_regressions(self):
+        """
+        Test that each run reports percentiles, RPS and query counts and is compared with the previous run.
+        """
+        import json
+        import tempfile
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        from io import StringIO
+        with tempfile.TemporaryDirectory() as tmpdir:
+            history = os.path.join(tmpdir, 'history.json')
+            options = {'url': self.live_server_url, 'requests': 6, 'concurrency': 2, 'warmup': 1,
+                       'username': 'reader', 'password': 'bench-pw', 'history': history}
+            out = StringIO()
+            call_command('benchmark_endpoints', stdout=out, **options)
+            self.assertIn('No previous run to compare with.', out.getvalue())
+            with open(history) as f:
+                run = json.load(f)[0]
+            self.assertEqual(set(run['endpoints']), {'home', 'api_books', 'api_statistics', 'login'})
+            for result in run['endpoints'].values():
+                self.assertEqual((result['requests'], result['errors']), (6, 0))
+                self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+                self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+                self.assertGreater(result['rps'], 0)
+                self.assertGreater(result['queries'], 0)
+
+            # An impossible baseline makes every compared metric regress
+            run['endpoints']['api_books'].update(p50_ms=0.001, p95_ms=0.001, p99_ms=0.001, rps=10 ** 6, queries=1)
+            with open(history, 'w') as f:
+                json.dump([run], f)
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('benchmark_endpoints', stdout=out, endpoints='api_books', fail_on_regression=True,
+                             **options)
+            self.assertIn('api_books queries: 1 ->', out.getvalue())
+            with open(history) as f:
+                self.assertEqual(len(json.load(f)), 2)
+
+    def test_percentile_interpolates(self):
+        """
+        Test the percentile helper on small samples.
+        """
+        from .benchmark import percentile
+        self.assertIsNone(percentile([], 50))
+        self.assertEqual(percentile([5], 99), 5)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertAlmostEqual(percentile(list(range(101)), 95), 95)
+
+
+class MetricsTest(TestCase):
+    """
+    Test cases for the Prometheus metrics middleware and /metrics endpoint.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(username="metered", email="metered@example.com", password="pw")
+        session = self.client.session
+        session['user_id'] = self.user.id
+        session.save()
+
+    def sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_are_recorded_per_route(self):
+        """
+        Test that latency, size, query counts and conditional GET hits are labelled by URL name.
+        """
+        latency = self.sample('catalog_http_request_duration_seconds_count', method='GET', route='home', status='200')
+        queries = self.sample('catalog_http_request_db_queries_count', route='home')
+        hits = self.sample('catalog_conditional_requests_total', route='home', result='hit')
+        response = self.client.get('/home/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/home/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(
+            self.sample('catalog_http_request_duration_seconds_count', method='GET', route='home', status='200'),
+            latency + 1,
+        )
+        self.assertEqual(self.sample('catalog_http_request_db_queries_count', route='home'), queries + 2)
+        self.assertGreater(self.sample('catalog_http_request_db_queries_sum', route='home'), 0)
+        self.assertEqual(self.sample('catalog_conditional_requests_total', route='home', result='hit'), hits + 1)
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertIn('catalog_http_request_duration_seconds_bucket{le="0.005",method="GET",route="home",status="200"}', body)
+        self.assertIn('catalog_http_response_size_bytes_count{method="GET",route="home"}', body)
+
+    def test_open_library_latency_is_recorded(self):
+        """
+        Test that Open Library calls are timed by API and status.
+        """
+        from unittest import mock
+        import httpx
+        before = self.sample('catalog_open_library_request_duration_seconds_count', endpoint='search', status='200')
+        upstream = httpx.Response(200, json={'docs': []})
+        with mock.patch('books.views.httpx.AsyncClient.get', return_value=upstream):
+            self.client.get('/open-library/', {'query': 'dune'})
+        self.assertEqual(
+            self.sample('catalog_open_library_request_duration_seconds_count', endpoint='search', status='200'),
+            before + 1,
+        )
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_metrics_token(self):
+        """
+        Test that a configured token is required to scrape metrics.
+        """
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+
+    def test_multiprocess_store_merges_workers(self):
+        """
+        Test that observations from separate worker processes are merged into one exposition.
+        
+        The store directory does not exist yet, as under runserver or a
+        management command where no gunicorn hook has created it.
+        """
+        import subprocess
+        import sys
+        import tempfile
+        from .metrics import render_metrics
+        script = (
+            "import django; django.setup()\n"
+            "from books.metrics import REQUEST_LATENCY\n"
+            "REQUEST_LATENCY.labels('GET', 'home', '200').observe(0.05)\n"
+        )
+        with tempfile.TemporaryDirectory() as parent:
+            store = os.path.join(parent, 'prometheus')
+            env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': store, 'PYTHONPATH': os.pathsep.join(sys.path)}
+            for _ in range(2):
+                subprocess.run([sys.executable, '-c', script], env=env, cwd=settings.BASE_DIR, check=True)
+            body = render_metrics(store).decode()
+        self.assertIn('catalog_http_request_duration_seconds_count{method="GET",route="home",status="200"} 2.0', body)
+
+
+class ServerTimingTest(TestCase):
+    """
+    Test cases for the per-request timing breakdown.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        Book.objects.create(
+            title="Timed", author="Timing Author", isbn="0306406152", added_by=self.reader,
+            published_date=datetime.strptime("2001-01-01", "%Y-%m-%d").date(),
+        )
+
+    def login(self, user):
+        session = self.client.session
+        session['user_id'] = user.id
+        session.save()
+
+    def phases(self, header):
+        return {entry.split(';')[0].strip() for entry in header.split(',')}
+
+    @override_settings(SERVER_TIMING=True)
+    def test_header_for_admin_only(self):
+        """
+        Test that page and API responses carry a Server-Timing breakdown for the admin only.
+        """
+        self.login(self.admin)
+        response = self.client.get('/home/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue({'db', 'template', 'app', 'total'} <= self.phases(response['Server-Timing']))
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="SQL \(\d+ queries\)"')
+        response = self.client.get('/api/books/', HTTP_ACCEPT='application/json')
+        self.assertTrue({'db', 'serialize', 'app', 'total'} <= self.phases(response['Server-Timing']))
+
+        self.login(self.reader)
+        self.assertNotIn('Server-Timing', self.client.get('/home/'))
+
+    @override_settings(SERVER_TIMING=True)
+    def test_open_library_phase(self):
+        """
+        Test that Open Library calls are reported as their own phase.
+        """
+        from unittest import mock
+        import httpx
+        self.login(self.admin)
+        upstream = httpx.Response(200, json={'docs': []})
+        with mock.patch('books.views.httpx.AsyncClient.get', return_value=upstream):
+            response = self.client.get('/open-library/', {'query': 'dune'})
+        self.assertIn('openlibrary', self.phases(response['Server-Timing']))
+
+    def test_disabled_by_default(self):
+        """
+        Test that no header is added unless SERVER_TIMING is enabled.
+        """
+        self.login(self.admin)
+        self.assertNotIn('Server-Timing', self.client.get('/home/'))
+
+    @override_settings(SERVER_TIMING_LOG=True)
+    def test_structured_log_line(self):
+        """
+        Test that the breakdown is logged as one JSON line whose phases add up to the total.
+        """
+        import json
+        self.login(self.reader)
+        with self.assertLogs('books.timing', 'INFO') as logs:
+            self.client.get('/home/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['route'], record['status']), ('home', 200))
+        self.assertGreater(record['db_queries'], 0)
+        parts = sum(record[f'{phase}_ms'] for phase in ('db', 'template', 'serialize', 'openlibrary', 'app'))
+        self.assertAlmostEqual(parts, record['total_ms'], delta=0.1)
+
+    def test_nested_phases_are_exclusive(self):
+        """
+        Test that time spent in a nested phase is not also charged to the enclosing one.
+        """
+        import time
+        from .timing import RequestTimings, _current, measure
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with measure('template'):
+                with measure('db'):
+                    time.sleep(0.02)
+        finally:
+            _current.reset(token)
+        self.assertGreaterEqual(timings.seconds['db'], 0.02)
+        self.assertLess(timings.seconds['template'], 0.01)
+        self.assertEqual(timings.counts, {'db': 1, 'template': 1, 'serialize': 0, 'openlibrary': 0})
+
+
+class SlowQueryLogTest(TestCase):
+    """
+    Test cases for the slow query log and its admin page.
+    """
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'slow.log')
+        # Any positive threshold below a query's duration logs it
+        override = override_settings(SLOW_QUERY_MS=0.000001, SLOW_QUERY_LOG_PATH=self.path, SLOW_QUERY_EXPLAIN_RATE=1.0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+
+    def login(self, user):
+        session = self.client.session
+        session['user_id'] = user.id
+        session.save()
+
+    def test_slow_queries_are_logged_with_view_and_origin(self):
+        """
+        Test that slow queries are written with their SQL, parameters, view and calling code.
+        """
+        from .slow_queries import read_entries
+        self.login(self.reader)
+        self.client.get('/home/')
+        entries = read_entries(path=self.path)
+        self.assertTrue(entries)
+        home = [entry for entry in entries if entry['view'] == 'home' and 'books_notification' in entry['sql']]
+        self.assertTrue(home)
+        self.assertEqual(home[0]['params'][0], self.reader.pk)
+        self.assertTrue(any('books/views.py' in frame for frame in home[0]['origin']))
+
+    def test_password_hashes_are_redacted(self):
+        """
+        Test that stored password hashes never reach the log.
+        """
+        from django.contrib.auth.hashers import make_password
+        from .slow_queries import loggable_params
+        params = loggable_params([make_password('secret'), 'reader', 3], many=False)
+        self.assertEqual(params, ['<redacted>', 'reader', 3])
+        self.assertEqual(len(loggable_params([[1], [2], [3], [4], [5]], many=True)), 4)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'EXPLAIN (ANALYZE, BUFFERS) is PostgreSQL syntax')
+    def test_explain_is_captured_on_postgresql(self):
+        """
+        Test that sampled slow SELECTs carry an EXPLAIN ANALYZE plan and writes are never re-run.
+        """
+        from .slow_queries import read_entries
+        self.login(self.reader)
+        self.client.get('/home/')
+        entries = read_entries(path=self.path)
+        selects = [entry for entry in entries if entry['sql'].startswith('SELECT')]
+        self.assertTrue(selects)
+        self.assertTrue(all('actual time' in entry['explain'] for entry in selects))
+        self.assertTrue(all(entry['explain'] is None for entry in entries if not entry['sql'].startswith('SELECT')))
+
+    def test_admin_page(self):
+        """
+        Test that the admin sees logged statements and other users are turned away.
+        """
+        self.login(self.reader)
+        self.client.get('/home/')
+        self.assertEqual(self.client.get('/admin-dashboard/slow-queries/').status_code, 302)
+        self.login(self.admin)
+        response = self.client.get('/admin-dashboard/slow-queries/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'books_notification')
+        self.assertContains(response, 'Statements by total time')
+
+
+class RequestProfilingTest(TestCase):
+    """
+    Test cases for on-demand and sampled request profiling.
+    """
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        override = override_settings(PROFILE_DIR=self.tmpdir.name, PROFILE_SAMPLE_EVERY=0, PROFILE_KEEP=200)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+
+    def login(self, user):
+        session = self.client.session
+        session['user_id'] = user.id
+        session.save()
+
+    def test_sampler_records_wall_time_stacks(self):
+        """
+        Test that the sampler attributes waiting time to the function that waits.
+        """
+        import time
+        from .profiling import StackSampler, collapsed_stacks, speedscope_profile
+
+        def wait_for_upstream():
+            time.sleep(0.05)
+
+        with StackSampler(0.001) as sampler:
+            wait_for_upstream()
+        self.assertGreater(sampler.samples, 5)
+        self.assertIn('wait_for_upstream (books/tests.py:', collapsed_stacks(sampler.stacks))
+        profile = speedscope_profile(sampler.stacks, 'test')
+        frames = profile['shared']['frames']
+        self.assertTrue(all(0 <= index < len(frames) for sample in profile['profiles'][0]['samples'] for index in sample))
+        self.assertGreaterEqual(profile['profiles'][0]['endValue'], 40)
+
+    def test_admin_profiles_page_and_api_requests(self):
+        """
+        Test that ?__profile=1 profiles HTML and API requests for the admin only.
+        """
+        from .profiling import list_profiles
+        self.login(self.reader)
+        self.assertNotIn('X-Profile-Id', self.client.get('/home/?__profile=1'))
+        self.assertEqual(list_profiles(), [])
+
+        self.login(self.admin)
+        page = self.client.get('/admin-dashboard/?__profile=1')
+        api = self.client.get('/api/books/?__profile=1')
+        self.assertIn('X-Profile-Id', page)
+        self.assertIn('X-Profile-Id', api)
+        profiles = list_profiles()
+        self.assertEqual({profile['id'] for profile in profiles}, {page['X-Profile-Id'], api['X-Profile-Id']})
+        self.assertEqual({profile['view'] for profile in profiles}, {'admin_dashboard', 'book-list'})
+        self.assertTrue(all(profile['trigger'] == 'manual' for profile in profiles))
+        for suffix in ('.collapsed', '.speedscope.json'):
+            self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, page['X-Profile-Id'] + suffix)))
+
+    async def test_asgi_profile_samples_sync_view_thread(self):
+        """
+        Test that under ASGI a sync view is sampled on the thread that runs it.
+        """
+        import time
+        from unittest import mock
+        from asgiref.sync import sync_to_async
+        from .api_views import BookViewSet
+        list_books = BookViewSet.list
+
+        def slow_list(viewset, request, *args, **kwargs):
+            time.sleep(0.05)
+            return list_books(viewset, request, *args, **kwargs)
+
+        await sync_to_async(self.login)(self.admin)
+        self.async_client.cookies = self.client.cookies
+        with mock.patch.object(BookViewSet, 'list', slow_list):
+            response = await self.async_client.get('/api/books/?__profile=1')
+        self.assertEqual(response.status_code, 200)
+        with open(os.path.join(self.tmpdir.name, response['X-Profile-Id'] + '.collapsed'), encoding='utf-8') as f:
+            collapsed = f.read()
+        self.assertIn('slow_list (books/tests.py:', collapsed)
+        self.assertNotIn('asyncio', collapsed)
+
+    async def test_asgi_profile_leaves_out_concurrent_requests(self):
+        """
+        Test that a profile of an async view does not collect another request running on the same loop.
+        """
+        import asyncio
+        import time
+        from unittest import mock
+        import httpx
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient, Client
+
+        def busy_wait():
+            # Holds the event loop thread, like CPU-bound work in another request
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        async def search(url, **kwargs):
+            if kwargs['params']['q'] == 'busy':
+                busy_wait()
+            else:
+                await asyncio.sleep(0.1)
+            return httpx.Response(200, json={'docs': []})
+
+        await sync_to_async(self.login)(self.admin)
+        self.async_client.cookies = self.client.cookies
+        # The reader needs a session of their own
+        reader = Client()
+        session = await sync_to_async(lambda: reader.session)()
+        session['user_id'] = self.reader.id
+        await sync_to_async(session.save)()
+        reader_client = AsyncClient()
+        reader_client.cookies = reader.cookies
+        with mock.patch('books.views.httpx.AsyncClient.get', side_effect=search):
+            profiled, other = await asyncio.gather(
+                self.async_client.get('/open-library/', {'query': 'dune', '__profile': '1'}),
+                reader_client.get('/open-library/', {'query': 'busy'}),
+            )
+        self.assertEqual(other.status_code, 200)
+        with open(os.path.join(self.tmpdir.name, profiled['X-Profile-Id'] + '.collapsed'), encoding='utf-8') as f:
+            collapsed = f.read()
+        self.assertNotIn('busy_wait', collapsed)
+
+    def test_sampled_requests_are_profiled_without_header(self):
+        """
+        Test that sampling profiles ordinary requests without telling the user.
+        """
+        from .profiling import list_profiles
+        self.login(self.reader)
+        with override_settings(PROFILE_SAMPLE_EVERY=1, PROFILE_KEEP=2):
+            for _ in range(3):
+                response = self.client.get('/notifications/')
+                self.assertNotIn('X-Profile-Id', response)
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(profiles[0]['trigger'], 'sampled')
+        self.assertEqual(len(os.listdir(self.tmpdir.name)), 6)
+
+    def test_listing_and_download(self):
+        """
+        Test that the admin lists and downloads profiles and other users are turned away.
+        """
+        import json
+        self.login(self.admin)
+        profile_id = self.client.get('/home/?__profile=1')['X-Profile-Id']
+        listing = self.client.get('/admin-dashboard/profiles/')
+        self.assertContains(listing, f'/admin-dashboard/profiles/{profile_id}/speedscope/')
+        download = self.client.get(f'/admin-dashboard/profiles/{profile_id}/speedscope/')
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+        profile = json.loads(b''.join(download.streaming_content))
+        self.assertEqual(profile['profiles'][0]['type'], 'sampled')
+        self.assertEqual(self.client.get(f'/admin-dashboard/profiles/{profile_id}/pstats/').status_code, 404)
+        self.assertEqual(self.client.get('/admin-dashboard/profiles/..%2Fsettings/collapsed/').status_code, 404)
+
+        self.login(self.reader)
+        self.assertEqual(self.client.get('/admin-dashboard/profiles/').status_code, 302)
+        self.assertEqual(self.client.get(f'/admin-dashboard/profiles/{profile_id}/collapsed/').status_code, 302)
+
+
+class MemoryReportTest(TestCase):
+    """
+    Test cases for the tracemalloc memory diagnostics.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        Book.objects.bulk_create([
+            Book(title=f"Memory Book {i}", author="Author", published_date=datetime(2000, 1, 1).date(),
+                 isbn=f"MEM{i:05d}", isbn_key=f"MEM{i:05d}", added_by=cls.reader)
+            for i in range(200)
+        ])
+
+    def tearDown(self):
+        import tracemalloc
+        self.assertFalse(tracemalloc.is_tracing(), "tracing was left running")
+
+    def test_row_sizes(self):
+        """
+        Test that tuples from values_list() are measured smaller than model instances.
+        """
+        from .memory import row_sizes
+        sizes = {size['kind']: size for size in row_sizes(limit=100)}
+        self.assertEqual(set(sizes), {'model instances', 'values() dicts', 'values_list() tuples'})
+        self.assertTrue(all(size['rows'] == 100 for size in sizes.values()))
+        self.assertLess(sizes['values_list() tuples']['bytes_per_row'], sizes['model instances']['bytes_per_row'])
+
+    def test_trace_request_finds_application_sites(self):
+        """
+        Test that a traced page reports its peak and the application lines behind its allocations.
+        """
+        import tracemalloc
+        from .memory import trace_request
+        tracemalloc.start(10)
+        try:
+            result = trace_request('/api/books/all/', self.reader)
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(result['status'], 200)
+        self.assertGreaterEqual(result['peak'], result['held'])
+        self.assertGreater(result['held'], result['body'])
+        self.assertTrue(any('(from books/' in site['site'] for site in result['sites']))
+
+    def test_memory_report_command(self):
+        """
+        Test the report printed by the memory_report command.
+        """
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+        out = StringIO()
+        call_command('memory_report', '/home/', '/api/books/all/', username='reader', rows=50, frames=5, stdout=out)
+        report = out.getvalue()
+        self.assertIn('GET /home/  status 200', report)
+        self.assertIn('GET /api/books/all/  status 200', report)
+        self.assertIn('Per-row size of 50 books:', report)
+        self.assertIn('values() dicts', report)
+        with self.assertRaises(CommandError):
+            call_command('memory_report', username='nobody', stdout=StringIO())
+
+    def test_diagnostics_middleware_logs_peak(self):
+        """
+        Test that MEMORY_DIAGNOSTICS logs each request's peak memory.
+        """
+        import json
+        import tracemalloc
+        self.addCleanup(tracemalloc.stop)
+        with override_settings(MEMORY_DIAGNOSTICS=True), self.assertLogs('books.memory', level='INFO') as logs:
+            self.client.get('/login/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['route'], 'login_user')
+        self.assertGreater(record['peak_mb'], 0)
+        tracemalloc.stop()
+
+
+class HealthCheckTest(TestCase):
+    """
+    Test cases for the /healthz and /readyz probe endpoints.
+    """
+
+    def setUp(self):
+        from .health import shutdown
+        # The probe thread's own connection would keep the test database from being dropped
+        self.addCleanup(shutdown)
+
+    def test_liveness_skips_database_and_sessions(self):
+        """
+        Test that /healthz answers from any host without queries or cookies.
+        """
+        with override_settings(ALLOWED_HOSTS=['catalog.example.com']), self.assertNumQueries(0):
+            response = self.client.get('/healthz', HTTP_HOST='10.1.2.3:8000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'ok')
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        self.assertFalse(response.cookies)
+
+    def test_readiness_checks(self):
+        """
+        Test that /readyz reports the database, migration and optional cache checks.
+        """
+        with override_settings(HEALTH_CHECK_CACHE=True):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'status': 'ok', 'checks': {'database': 'ok', 'migrations': 'ok', 'cache': 'ok'},
+        })
+        self.assertNotIn('cache', self.client.get('/readyz').json()['checks'])
+
+    def test_readiness_fails_without_database(self):
+        """
+        Test that a database error makes /readyz answer 503 and skip the remaining checks.
+        """
+        from unittest import mock
+        from django.db import OperationalError
+        with mock.patch('books.health.check_database', side_effect=OperationalError('connection refused')):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks'], {'database': 'OperationalError: connection refused'})
+
+    def test_readiness_fails_with_unapplied_migrations(self):
+        """
+        Test that /readyz stays unavailable until every migration is applied.
+        """
+        from unittest import mock
+        from django.db.migrations.executor import MigrationExecutor
+        with mock.patch('books.health._migrated', False), \
+                mock.patch.object(MigrationExecutor, 'migration_plan', return_value=[('books', False)]):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['migrations'], 'RuntimeError: 1 unapplied migrations')
+
+    def test_readiness_gives_up_after_timeout(self):
+        """
+        Test that a hanging check fails the probe after HEALTH_CHECK_TIMEOUT instead of holding the worker.
+        """
+        import time
+        from unittest import mock
+        with override_settings(HEALTH_CHECK_TIMEOUT=0.05), \
+                mock.patch('books.health.check_database', side_effect=lambda: time.sleep(0.3)):
+            started = time.perf_counter()
+            response = self.client.get('/readyz')
+            self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('timeout', response.json()['checks'])
+
+
+class AsyncOpenLibraryTest(TestCase):
+    """
+    Test cases for the async Open Library search and import views.
+    """
+
+    def setUp(self):
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        session = self.async_client.session
+        session['user_id'] = self.reader.id
+        session.save()
+
+    async def test_searches_wait_on_open_library_concurrently(self):
+        """
+        Test that concurrent searches overlap while waiting on a slow Open Library.
+        """
+        import asyncio
+        import time
+        from unittest import mock
+        import httpx
+
+        async def slow_search(url, **kwargs):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={'docs': [{'title': kwargs['params']['q'], 'author_name': ['Herbert']}]})
+
+        with mock.patch('books.views.httpx.AsyncClient.get', side_effect=slow_search):
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(
+                self.async_client.get('/open-library/', {'query': f'dune {i}'}) for i in range(10)
+            ))
+            elapsed = time.perf_counter() - started
+        # One after the other, the ten searches would take two seconds
+        self.assertLess(elapsed, 1)
+        for i, response in enumerate(responses):
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, f'dune {i}')
+
+    async def test_one_client_per_event_loop(self):
+        """
+        Test that requests on the same event loop share one pooled client.
+        """
+        from .views import open_library_client
+        self.assertIs(open_library_client(), open_library_client())
+
+    async def test_save_book(self):
+        """
+        Test that a search result is saved to the catalog from the async view.
+        """
+        response = await self.async_client.post('/open-library/save/', {
+            'title': 'Dune', 'author': 'Frank Herbert', 'published_date': '1965', 'isbn': '0441013597',
+        })
+        self.assertEqual(response.status_code, 302)
+        book = await Book.objects.aget(isbn='0441013597')
+        self.assertEqual(book.published_date.year, 1965)
+
+    def test_import_by_olid(self):
+        """
+        Test that a work and its author are imported by OLID, once.
+        """
+        from unittest import mock
+        from .views import import_openlibrary_book
+        upstream = {
+            'https://openlibrary.org/works/OL893415W.json': {
+                'title': 'Dune', 'authors': [{'author': {'key': '/authors/OL79034A'}}],
+                'created': {'value': '2009-12-10T01:45:03'}, 'description': {'value': 'Desert planet.'},
+            },
+            'https://openlibrary.org/authors/OL79034A.json': {'name': 'Frank Herbert'},
+        }
+        # The sync import goes through requests, never an event loop or an httpx.AsyncClient
+        with override_settings(OPEN_LIBRARY_URL='https://openlibrary.org'), mock.patch(
+            'books.views.requests.get', side_effect=lambda url, **kwargs: mock.Mock(ok=True, status_code=200, json=lambda: upstream[url])
+        ), mock.patch('books.views.httpx.AsyncClient') as async_client:
+            book = import_openlibrary_book('OL893415W')
+            self.assertEqual(import_openlibrary_book('OL893415W'), book)
+        async_client.assert_not_called()
+        self.assertEqual((book.title, book.author, book.description), ('Dune', 'Frank Herbert', 'Desert planet.'))
+        self.assertEqual(Book.objects.filter(isbn='OLOL893415W').count(), 1)
+
+    def test_admin_referral_imports_by_olid(self):
+        """
+        Test that setting an Open Library admin referral imports the work through import_openlibrary_book.
+        """
+        from unittest import mock
+        admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        session = self.client.session
+        session['user_id'] = admin.id
+        session.save()
+        book = Book.objects.create(title="Dune", author="Frank Herbert", isbn="OLOL893415W", published_date="1965-08-01")
+        with mock.patch('books.views.import_openlibrary_book', return_value=book) as import_book:
+            response = self.client.post(f'/admin-dashboard/edit-referral/{self.reader.id}/', {'admin_referral': 'ol:OL893415W'})
+        import_book.assert_called_once_with('OL893415W')
+        self.assertEqual(response.status_code, 302)
+        self.reader.refresh_from_db()
+        self.assertEqual(self.reader.admin_referral, book)
+
+
+class PasswordHashingTest(TestCase):
+    """
+    Test cases for the bounded password hashing pool.
+    """
+
+    def setUp(self):
+        from . import passwords
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        # Each test's settings take effect in a new pool
+        passwords.shutdown()
+        self.addCleanup(passwords.shutdown)
+
+    def sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    @override_settings(PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_EXECUTOR='thread')
+    def test_hashes_run_in_pool(self):
+        """
+        Test that passwords are hashed and checked on the pool's threads and timed.
+        """
+        import threading
+        from unittest import mock
+        from django.contrib.auth import hashers
+        from . import passwords
+        threads = []
+        make_password = hashers.make_password
+
+        def record_thread(*args):
+            threads.append(threading.current_thread().name)
+            return make_password(*args)
+
+        before = self.sample('catalog_password_hash_duration_seconds_count', operation='make')
+        with mock.patch('books.passwords.hashers.make_password', side_effect=record_thread):
+            encoded = passwords.make_password('secret')
+        self.assertTrue(threads[0].startswith('password-hash'))
+        self.assertTrue(passwords.check_password('secret', encoded))
+        self.assertFalse(passwords.check_password('wrong', encoded))
+        self.assertEqual(self.sample('catalog_password_hash_duration_seconds_count', operation='make'), before + 1)
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE=1)
+    def test_saturated_pool_rejects_at_once(self):
+        """
+        Test that a hash beyond the workers and the queue is refused without waiting.
+        """
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from unittest import mock
+        from . import passwords
+        release = threading.Event()
+        before = self.sample('catalog_password_hash_rejected_total', operation='check')
+
+        def slow_check(password, encoded):
+            release.wait(5)
+            return True
+
+        with mock.patch('books.passwords.hashers.check_password', side_effect=slow_check), \
+                ThreadPoolExecutor(2) as callers:
+            running = [callers.submit(passwords.check_password, 'pw', 'hash') for _ in range(2)]
+            while self.sample('catalog_password_hashes_in_flight') < 2:
+                time.sleep(0.01)
+            started = time.perf_counter()
+            with self.assertRaises(passwords.PasswordHashingBusy):
+                passwords.check_password('pw', 'hash')
+            self.assertLess(time.perf_counter() - started, 0.1)
+            release.set()
+            self.assertEqual([future.result() for future in running], [True, True])
+        self.assertEqual(self.sample('catalog_password_hash_rejected_total', operation='check'), before + 1)
+        self.assertTrue(passwords.check_password('pw', User.objects.get(pk=self.reader.pk).password))
+
+    def test_busy_login_answers_503(self):
+        """
+        Test that refused logins get 503 with Retry-After from the page and the API.
+        """
+        from unittest import mock
+        from .passwords import PasswordHashingBusy
+        with mock.patch('books.passwords.get_pool') as get_pool:
+            get_pool.return_value.run.side_effect = PasswordHashingBusy('busy')
+            page = self.client.post('/login/', {'username': 'reader', 'password': 'pw'})
+            api = self.client.post('/api/auth/login/', {'username': 'reader', 'password': 'pw'}, content_type='application/json')
+        self.assertEqual(page.status_code, 503)
+        self.assertEqual(page['Retry-After'], '1')
+        self.assertContains(page, 'busy signing other people in', status_code=503)
+        self.assertEqual(api.status_code, 503)
+        self.assertEqual(api['Retry-After'], '1')
+        self.assertNotIn('user_id', self.client.session)
+
+    def test_busy_pool_only_refuses_registrations(self):
+        """
+        Test that a saturated pool refuses sign-ups with 503 but not users created outside requests.
+        """
+        from unittest import mock
+        from .passwords import PasswordHashingBusy
+        with mock.patch('books.passwords.get_pool') as get_pool:
+            get_pool.return_value.run.side_effect = PasswordHashingBusy('busy')
+            user = User.objects.create(username="scripted", email="scripted@example.com", password="pw")
+            page = self.client.post('/register/', {
+                'username': 'pagereader', 'email': 'page@example.com', 'password': 'pw', 'confirm_password': 'pw',
+            })
+            api = self.client.post('/api/auth/register/', {
+                'username': 'apireader', 'email': 'api@example.com', 'password': 'long-secret', 'confirm_password': 'long-secret',
+            }, content_type='application/json')
+        self.assertTrue(check_password('pw', user.password))
+        self.assertEqual(page.status_code, 503)
+        self.assertEqual(api.status_code, 503)
+        self.assertEqual(api['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(username__in=['pagereader', 'apireader']).exists())
+
+    def test_api_registration_hashes_once(self):
+        """
+        Test that a user registered through the API can log in with their password.
+        """
+        response = self.client.post('/api/auth/register/', {
+            'username': 'newreader', 'email': 'new@example.com', 'password': 'long-secret', 'confirm_password': 'long-secret',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        login = self.client.post(
+            '/api/auth/login/', {'username': 'newreader', 'password': 'long-secret'}, content_type='application/json',
+        )
+        self.assertEqual(login.status_code, 200)
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_EXECUTOR='process')
+    def test_process_pool(self):
+        """
+        Test that hashes also run in a process pool.
+        """
+        from . import passwords
+        encoded = passwords.make_password('secret')
+        self.assertTrue(passwords.check_password('secret', encoded))
+
+
+class UserImportTest(TestCase):
+    """
+    Test cases for the bulk user import command and API.
+    """
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.admin = User.objects.create(username="admin", email="admin@example.com", password="pw")
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_csv_import_reports_rejected_lines(self):
+        """
+        Test that valid rows are imported with usable passwords and the others reported by line.
+        """
+        from io import StringIO
+        from django.core.management import call_command
+        path = self.write('users.csv', (
+            'username,email,password,user_notes\n'
+            'ada,ada@example.com,engine-1,Class 4B\n'
+            'reader,new@example.com,pw\n'
+            'grace,reader@example.com,pw\n'
+            'ada,other@example.com,pw\n'
+            'alan,not-an-email,pw\n'
+            'edsger,edsger@example.com,\n'
+            'barbara,barbara@example.com,clu-2\n'
+        ))
+        out = StringIO()
+        call_command('import_users', path, '--workers', '1', stdout=out)
+        self.assertIn('Imported 2 users, rejected 5 lines', out.getvalue())
+        for line, error in [(3, 'username already taken'), (4, 'email already taken'),
+                            (5, 'username repeated in this file'), (6, 'invalid email'), (7, 'missing password')]:
+            self.assertIn(f'line {line}: {error}', out.getvalue())
+        ada = User.objects.get(username='ada')
+        self.assertEqual(ada.user_notes, 'Class 4B')
+        self.assertTrue(check_password('engine-1', ada.password))
+        self.assertTrue(check_password('clu-2', User.objects.get(username='barbara').password))
+
+    def test_ndjson_dry_run(self):
+        """
+        Test that NDJSON is read line by line and a dry run creates nobody.
+        """
+        from io import StringIO
+        from django.core.management import call_command
+        path = self.write('users.ndjson', (
+            '{"username": "ada", "email": "ada@example.com", "password": "engine-1"}\n'
+            '\n'
+            'not json\n'
+            '{"username": "grace", "email": "grace@example.com", "password": "cobol"}\n'
+        ))
+        out = StringIO()
+        call_command('import_users', path, '--dry-run', stdout=out)
+        self.assertIn('line 3: not a JSON object', out.getvalue())
+        self.assertIn('Dry run: 2 users would be imported, 1 lines rejected.', out.getvalue())
+        self.assertFalse(User.objects.filter(username__in=['ada', 'grace']).exists())
+
+    def test_set_based_checks(self):
+        """
+        Test that uniqueness is checked with one query per field, however many rows there are.
+        """
+        from io import StringIO
+        from . import user_import
+        rows = 'username,email,password\n' + ''.join(f'user{i},user{i}@example.com,pw\n' for i in range(200))
+        with self.assertNumQueries(2):
+            valid, errors = user_import.validate_rows(user_import.read_rows(StringIO(rows), 'csv'))
+        self.assertEqual((len(valid), errors), (200, []))
+
+    def test_passwords_hashed_across_processes(self):
+        """
+        Test that a process pool returns every hash in row order and leaves no metrics files.
+        """
+        import tempfile
+        from unittest import mock
+        from . import user_import
+        passwords = ['first', 'second', 'third']
+        with tempfile.TemporaryDirectory() as store:
+            with mock.patch('books.user_import.HASH_CHUNK', 1), \
+                    mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': store}):
+                encoded = user_import.hash_passwords(passwords, workers=2)
+            self.assertEqual(os.listdir(store), [])
+        self.assertEqual(len(set(encoded)), 3)
+        for password, hashed in zip(passwords, encoded):
+            self.assertTrue(check_password(password, hashed))
+
+    def test_api_import(self):
+        """
+        Test that the admin imports users through the API, as an upload or a request body.
+        """
+        def login(user):
+            session = self.client.session
+            session['user_id'] = user.id
+            session.save()
+
+        upload = SimpleUploadedFile('users.csv', b'username,email,password\nada,ada@example.com,engine-1\n')
+        login(self.reader)
+        self.assertEqual(self.client.post('/api/users/import/', {'file': upload}).status_code, 403)
+        login(self.admin)
+        upload.seek(0)
+        response = self.client.post('/api/users/import/', {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 1, 'rejected': 0, 'errors': []})
+        response = self.client.post(
+            '/api/users/import/', '{"username": "ada", "email": "ada2@example.com", "password": "x"}\n',
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.json()['errors'], [{'line': 1, 'username': 'ada', 'error': 'username already taken'}])
+        with override_settings(USER_IMPORT_API_MAX_ROWS=1):
+            response = self.client.post(
+                '/api/users/import/', 'username,email,password\nb,b@example.com,x\nc,c@example.com,x\n',
+                content_type='text/csv',
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('import_users command', response.json()['error'])
+        self.assertFalse(User.objects.filter(username='b').exists())
+
+        from unittest import mock
+        from .passwords import PasswordHashingBusy
+        with mock.patch('books.passwords.make_password', side_effect=PasswordHashingBusy):
+            response = self.client.post(
+                '/api/users/import/', 'username,email,password\nd,d@example.com,x\n', content_type='text/csv',
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(username='d').exists())
+
+class BookActivityLogTest(TestCase):
+    """
+    Test cases for the book activity log written on uploads and deletes.
+    """
+
+    def setUp(self):
+        import tempfile
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'logs', 'activity.log')
+        override = override_settings(BOOK_ACTIVITY_LOG=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.reader = User.objects.create(username="reader", email="reader@example.com", password="pw")
+        session = self.client.session
+        session['user_id'] = self.reader.id
+        session.save()
+
+    def test_deleting_a_book_appends_to_the_activity_log(self):
+        """
+        Test that a delete is recorded in BOOK_ACTIVITY_LOG, creating its directory.
+        """
+        Book.objects.create(
+            title="Dune", author="Frank Herbert", isbn="9780441172719",
+            published_date=datetime(1965, 8, 1).date(), added_by=self.reader,
+        )
+        self.client.post('/delete/9780441172719/')
+        with open(self.path) as f:
+            entry = f.read()
+        self.assertIn('Book deleted for user: reader', entry)
+        self.assertIn('Title: Dune', entry)
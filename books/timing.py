@@ -0,0 +1,210 @@
+"""
+Per-request timing breakdown for the Book Catalog application.
+
+ServerTimingMiddleware splits each request into phases and reports them as a
+Server-Timing header (to the admin only) and, optionally, as one structured
+log line per request:
+
+    db           SQL queries, through a connection execute_wrapper
+    template     Django template rendering, through TimedDjangoTemplates
+    serialize    DRF serializer output and response rendering
+    openlibrary  Open Library API calls (books.views.open_library_get)
+    app          everything else: view logic, middleware, Python overhead
+
+Phases nest (a lazy queryset runs its SQL while a template renders), so each
+phase records only its own time, excluding phases measured inside it. The
+phases and app add up to the total.
+
+Both outputs are off by default: collecting the breakdown costs a few
+microseconds per query and rendered object, and the admin check one query
+per request.
+"""
+
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+from django.utils.deprecation import MiddlewareMixin
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('db', 'template', 'serialize', 'openlibrary')
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Exclusive time and call count per phase for one request.
+
+    Attributes:
+        seconds (dict): Own time per phase, in seconds
+        counts (dict): Number of measured calls per phase
+    """
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.counts = dict.fromkeys(PHASES, 0)
+        self._stack = []
+
+    def start(self, phase):
+        self._stack.append([phase, time.perf_counter(), 0.0])
+
+    def stop(self):
+        phase, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.seconds[phase] += elapsed - nested
+        self.counts[phase] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+
+class _Measure:
+    __slots__ = ('phase', 'timings')
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.timings = _current.get()
+
+    def __enter__(self):
+        if self.timings is not None:
+            self.timings.start(self.phase)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.timings is not None:
+            self.timings.stop()
+
+
+def measure(phase):
+    """
+    Context manager charging the enclosed block to a phase of the current request.
+
+    Does nothing outside a timed request.
+
+    Args:
+        phase: One of PHASES
+    """
+    return _Measure(phase)
+
+
+def _time_query(execute, sql, params, many, context):
+    with measure('db'):
+        return execute(sql, params, many, context)
+
+
+class TimedTemplate:
+    """Template wrapper charging render() to the template phase."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with measure('template'):
+            return self.template.render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose templates report their rendering time."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class TimedRepresentationMixin:
+    """Serializer mixin charging to_representation() to the serialize phase."""
+
+    def to_representation(self, instance):
+        with measure('serialize'):
+            return super().to_representation(instance)
+
+
+def is_admin_session(request):
+    """Check whether the request's session belongs to the admin, with one query."""
+    from .models import User
+    session = getattr(request, 'session', None)
+    user_id = session.get('user_id') if session is not None else None
+    return bool(user_id) and User.objects.filter(pk=user_id, username='admin').exists()
+
+
+def server_timing_header(timings, total):
+    """
+    Format a breakdown as a Server-Timing header value.
+
+    Args:
+        timings: RequestTimings of the request
+        total: Total request time in seconds
+
+    Returns:
+        Header value with one metric per phase, app and total, durations in milliseconds
+    """
+    entries = [f'db;dur={timings.seconds["db"] * 1000:.1f};desc="SQL ({timings.counts["db"]} queries)"']
+    for phase in PHASES[1:]:
+        if timings.counts[phase]:
+            entries.append(f'{phase};dur={timings.seconds[phase] * 1000:.1f}')
+    entries.append(f'app;dur={(total - sum(timings.seconds.values())) * 1000:.1f}')
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware(MiddlewareMixin):
+    """
+    Break requests down into timing phases.
+
+    SERVER_TIMING adds a Server-Timing header to responses for the admin;
+    SERVER_TIMING_LOG writes a JSON line per request to the books.timing
+    logger. With both off the middleware only passes requests through.
+    Under ASGI the time an async view spends awaiting is counted as app,
+    apart from the Open Library calls it measures itself.
+    """
+
+    def process_request(self, request):
+        if not (settings.SERVER_TIMING or settings.SERVER_TIMING_LOG):
+            return None
+        timings = RequestTimings()
+        _current.set(timings)
+        wrapper = connection.execute_wrapper(_time_query)
+        wrapper.__enter__()
+        request._timings = (timings, wrapper, time.perf_counter())
+        return None
+
+    def process_response(self, request, response):
+        state = getattr(request, '_timings', None)
+        if state is None:
+            return response
+        timings, wrapper, start = state
+        wrapper.__exit__(None, None, None)
+        _current.set(None)
+        total = time.perf_counter() - start
+
+        if settings.SERVER_TIMING and is_admin_session(request):
+            response['Server-Timing'] = server_timing_header(timings, total)
+        if settings.SERVER_TIMING_LOG:
+            match = getattr(request, 'resolver_match', None)
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'route': match.view_name if match else None,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 2),
+                'db_queries': timings.counts['db'],
+            }
+            record.update({f'{phase}_ms': round(timings.seconds[phase] * 1000, 2) for phase in PHASES})
+            record['app_ms'] = round((total - sum(timings.seconds.values())) * 1000, 2)
+            logger.info(json.dumps(record))
+        return response
+
+    def process_template_response(self, request, response):
+        """Render DRF and template responses here, so their rendering is charged to a phase."""
+        if _current.get() is not None:
+            with measure('serialize' if hasattr(response, 'accepted_renderer') else 'template'):
+                response.render()
+        return response
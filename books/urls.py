@@ -8,6 +8,7 @@ Each URL pattern maps to a specific view function that handles the request.
 
 from django.urls import path
 from . import views
+from .metrics import metrics_view
 
 # URL patterns for the Book Catalog application
 urlpatterns = [
@@ -26,6 +27,9 @@ urlpatterns = [
     path('admin-dashboard/edit-referral/<int:user_id>/', views.edit_admin_referral, name='edit_admin_referral'),  # Edit admin referral for user
     path('admin-dashboard/view-books/<int:user_id>/', views.admin_view_user_books, name='admin_view_user_books'),  # Admin view: books for user
     path('admin-dashboard/set-referral/<int:user_id>/', views.admin_set_referral, name='admin_set_referral'),  # Admin set referral book for user
+    path('admin-dashboard/slow-queries/', views.admin_slow_queries, name='admin_slow_queries'),  # Slow query log (admin only)
+    path('admin-dashboard/profiles/', views.admin_profiles, name='admin_profiles'),  # Request profiles (admin only)
+    path('admin-dashboard/profiles/<str:profile_id>/<str:fmt>/', views.admin_profile_download, name='admin_profile_download'),  # Download a profile (admin only)
     
     # User profile management
     path('profile/edit/', views.edit_profile, name='edit_profile'),  # Edit user profile
@@ -59,4 +63,7 @@ urlpatterns = [
     # Open Library integration
     path('open-library/', views.open_library_search, name='open_library_search'),  # Search Open Library
     path('open-library/save/', views.save_open_library_book, name='save_open_library_book'),  # Save book from Open Library
+    
+    # Monitoring
+    path('metrics', metrics_view, name='metrics'),  # Prometheus scrape endpoint
 ]
\ No newline at end of file
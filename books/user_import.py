@@ -0,0 +1,275 @@
+"""
+Bulk user import for the Book Catalog application.
+
+Onboarding a school or company means creating thousands of users at once.
+User.save() hashes each password on the calling thread, one after
+another, and runs one INSERT per user. import_users instead:
+
+    1. reads CSV (header row) or NDJSON (one JSON object per line) with the
+       columns username, email, password and optionally user_notes
+    2. checks every row, and finds usernames and emails already taken, in
+       this file or in the database, with one IN query per batch
+    3. hashes the passwords of the valid rows across a process pool, so
+       the import scales with the number of cores; in the web server they
+       go through the bounded hashing pool of books.passwords instead
+    4. inserts the users with bulk_create in one transaction
+
+Rows that fail a check are skipped and reported with their line number.
+The import_users command reads files of any size; the admin's
+POST /api/users/import/ takes up to USER_IMPORT_API_MAX_ROWS rows per
+request.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .hash_workers import init_worker
+from .models import User
+from .passwords import hash_all, hash_each
+
+FORMATS = ('csv', 'ndjson')
+FIELDS = ('username', 'email', 'password')
+# Passwords hashed per pool task; at ~0.2 s each, large enough to make the pickling negligible
+HASH_CHUNK = 50
+# Values per IN (...) lookup, below SQLite's limit on query parameters
+LOOKUP_BATCH = 900
+
+
+class UserImportError(ValueError):
+    """Raised when an import cannot start or finish, e.g. an unknown format or a missing column."""
+
+
+def detect_format(name):
+    """
+    Pick the format of an import file from its name.
+
+    Args:
+        name: File name or path
+
+    Returns:
+        "csv" or "ndjson"
+
+    Raises:
+        UserImportError: The extension is not .csv, .ndjson or .jsonl
+    """
+    extension = os.path.splitext(name or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    raise UserImportError(f"Cannot tell the format of '{name}'; use a .csv, .ndjson or .jsonl file")
+
+
+def read_rows(stream, fmt):
+    """
+    Read the users of a CSV or NDJSON file.
+
+    Args:
+        stream: Text file object
+        fmt: "csv" or "ndjson"
+
+    Yields:
+        Tuples of (line number, row dictionary); the row is None when an NDJSON line is not a JSON object
+
+    Raises:
+        UserImportError: A CSV header lacks a required column
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        missing = set(FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise UserImportError(f"CSV header lacks {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise UserImportError(f"Unknown format '{fmt}'; use one of {', '.join(FORMATS)}")
+
+
+def check_row(row):
+    """
+    Check and clean one row.
+
+    Args:
+        row: Row dictionary, or None for an unreadable line
+
+    Returns:
+        Tuple of (cleaned row, error message); the error is None for a valid row
+    """
+    if row is None:
+        return None, 'not a JSON object'
+    cleaned = {field: str(row.get(field) or '').strip() for field in FIELDS}
+    cleaned['password'] = str(row.get('password') or '')
+    cleaned['user_notes'] = str(row.get('user_notes') or '').strip() or None
+    for field in FIELDS:
+        if not cleaned[field]:
+            return cleaned, f'missing {field}'
+    if len(cleaned['username']) > User._meta.get_field('username').max_length:
+        return cleaned, 'username too long'
+    try:
+        validate_email(cleaned['email'])
+    except ValidationError:
+        return cleaned, 'invalid email'
+    return cleaned, None
+
+
+def taken_values(field, values):
+    """
+    Find which values of a unique field already belong to users.
+
+    Args:
+        field: "username" or "email"
+        values: Candidate values
+
+    Returns:
+        Set of the values already in use
+    """
+    values = list(values)
+    taken = set()
+    for start in range(0, len(values), LOOKUP_BATCH):
+        batch = values[start:start + LOOKUP_BATCH]
+        taken.update(User.objects.filter(**{f'{field}__in': batch}).values_list(field, flat=True))
+    return taken
+
+
+def validate_rows(rows):
+    """
+    Split rows into users to create and rejected lines.
+
+    Args:
+        rows: (line number, row) tuples from read_rows
+
+    Returns:
+        Tuple of (valid rows, errors); errors are dicts with line, username and error
+    """
+    valid, errors = [], []
+    usernames, emails = set(), set()
+    for line, row in rows:
+        cleaned, error = check_row(row)
+        if error is None and cleaned['username'] in usernames:
+            error = 'username repeated in this file'
+        elif error is None and cleaned['email'] in emails:
+            error = 'email repeated in this file'
+        if error is not None:
+            errors.append({'line': line, 'username': (cleaned or {}).get('username'), 'error': error})
+            continue
+        usernames.add(cleaned['username'])
+        emails.add(cleaned['email'])
+        valid.append((line, cleaned))
+
+    taken_usernames = taken_values('username', usernames)
+    taken_emails = taken_values('email', emails)
+    remaining = []
+    for line, cleaned in valid:
+        if cleaned['username'] in taken_usernames:
+            errors.append({'line': line, 'username': cleaned['username'], 'error': 'username already taken'})
+        elif cleaned['email'] in taken_emails:
+            errors.append({'line': line, 'username': cleaned['username'], 'error': 'email already taken'})
+        else:
+            remaining.append(cleaned)
+    errors.sort(key=lambda error: error['line'])
+    return remaining, errors
+
+
+def hash_passwords(passwords, workers):
+    """
+    Hash passwords with the default hasher, across a pool of processes.
+
+    Args:
+        passwords: List of passwords
+        workers: Number of processes; 1 hashes in this process
+
+    Returns:
+        List of encoded passwords, in the same order
+    """
+    chunks = [passwords[start:start + HASH_CHUNK] for start in range(0, len(passwords), HASH_CHUNK)]
+    if workers <= 1 or len(chunks) <= 1:
+        return hash_all(passwords)
+    # spawn, not fork: the children must not share the parent's database connections
+    with ProcessPoolExecutor(
+        min(workers, len(chunks)), mp_context=multiprocessing.get_context('spawn'), initializer=init_worker,
+    ) as pool:
+        return [encoded for chunk in pool.map(hash_all, chunks) for encoded in chunk]
+
+
+def _limited(rows, max_rows):
+    for count, row in enumerate(rows, 1):
+        if count > max_rows:
+            raise UserImportError(f'More than {max_rows} users; import larger files with the import_users command')
+        yield row
+
+
+def import_users(stream, fmt, workers=None, batch_size=1000, dry_run=False, max_rows=None, shared_pool=False):
+    """
+    Import the users of a CSV or NDJSON file.
+
+    Args:
+        stream: Text file object
+        fmt: "csv" or "ndjson"
+        workers: Hashing processes (default: USER_IMPORT_WORKERS)
+        batch_size: Rows per INSERT statement
+        dry_run: Check the rows without hashing or inserting anything
+        max_rows: Refuse files with more rows than this (default: no limit)
+        shared_pool: Hash one password at a time in this process's bounded hashing pool
+            (books.passwords) instead of starting a process pool; for imports inside the web server
+
+    Returns:
+        Dictionary with the valid, created and rejected counts, the errors and the seconds spent hashing
+
+    Raises:
+        UserImportError: The file cannot be read or is too long, or a user was created by someone else meanwhile
+        PasswordHashingBusy: With shared_pool, the hashing pool is saturated; nothing was imported
+    """
+    rows = read_rows(stream, fmt)
+    if max_rows:
+        rows = _limited(rows, max_rows)
+    try:
+        valid, errors = validate_rows(rows)
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise UserImportError(f'Cannot read the file: {exc}')
+    result = {'valid': len(valid), 'created': 0, 'rejected': len(errors), 'errors': errors, 'hash_seconds': 0.0}
+    if dry_run or not valid:
+        return result
+
+    started = time.perf_counter()
+    passwords = [row['password'] for row in valid]
+    if shared_pool:
+        encoded = hash_each(passwords)
+    else:
+        encoded = hash_passwords(passwords, workers or settings.USER_IMPORT_WORKERS)
+    result['hash_seconds'] = round(time.perf_counter() - started, 2)
+    # bulk_create skips User.save(), which would hash the passwords again
+    users = [
+        User(username=row['username'], email=row['email'], password=password, user_notes=row['user_notes'])
+        for row, password in zip(valid, encoded)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=batch_size)
+    except IntegrityError as exc:
+        raise UserImportError(f'A username or email was taken during the import; nothing was imported ({exc})')
+    result['created'] = len(users)
+    return result
+
+
+def open_text(data):
+    """Wrap uploaded bytes as a text stream, accepting a UTF-8 byte order mark."""
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline='')
@@ -7,18 +7,16 @@ Each view function processes specific URLs and returns appropriate responses.
 """
 
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Book, User, Notification, Tag
+from .models import Book, User, Notification, Tag, ChangeLog, LibraryEntry
 from .forms import BookForm, UserRegistrationForm, LoginForm, PasswordChangeForm, ProfileEditForm, NotificationForm, BulkNotificationForm, AdminEmailChangeForm, AdminReferralForm, AdminSetReferralForm
 from django.views.decorators.csrf import csrf_exempt
 import requests
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render, redirect
 from .models import Book
 from .forms import BookForm
 from datetime import datetime
-import random
 from django.contrib import messages
-from django.contrib.auth.hashers import check_password, make_password
 import os
 from django.contrib.auth.decorators import login_required, user_passes_test
 from .email_utils import send_custom_email
@@ -28,43 +26,173 @@ import json
 from .forms import EmailForm, BulkEmailForm
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from .conditional import collection_validators, not_modified_response, set_validators
+from .sequences import generate_js_isbn
+from .isbn import canonical_isbn
+from .metrics import observe_open_library
+from .timing import measure
+from . import profiling, slow_queries
+from .passwords import BUSY_MESSAGE, RETRY_AFTER, PasswordHashingBusy, check_password, make_password
+import asyncio
+import time
+import weakref
+import httpx
+from asgiref.sync import sync_to_async
 
-def import_openlibrary_book(olid):
+def open_library_get(url, endpoint, **kwargs):
     """
-    Fetches book data from Open Library by OLID and creates/returns a Book instance.
+    GET an Open Library URL, recording its latency in the upstream metrics and request timings.
+
+    Args:
+        url: Open Library URL
+        endpoint: API label for the metrics (search, subjects, works, authors)
+        **kwargs: Passed on to requests.get
+
+    Returns:
+        requests.Response
     """
-    import requests
-    from .models import Book
-    ol_url = f'https://openlibrary.org/works/{olid}.json'
-    resp = requests.get(ol_url)
-    if not resp.ok:
-        return None
-    data = resp.json()
-    title = data.get('title', 'No Title')
+    started = time.perf_counter()
+    try:
+        with measure('openlibrary'):
+            response = requests.get(url, **kwargs)
+    except requests.RequestException:
+        observe_open_library(endpoint, started, 'error')
+        raise
+    observe_open_library(endpoint, started, response.status_code)
+    return response
+
+# One pooled async client per event loop: an httpx client cannot be shared between loops
+_open_library_clients = weakref.WeakKeyDictionary()
+
+def open_library_client():
+    """
+    Get the async HTTP client for Open Library of the running event loop.
+
+    Its connection pool lets one process keep up to OPEN_LIBRARY_MAX_CONNECTIONS
+    upstream requests in flight, each costing a socket rather than a worker or thread.
+
+    Returns:
+        httpx.AsyncClient
+    """
+    loop = asyncio.get_running_loop()
+    client = _open_library_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=settings.OPEN_LIBRARY_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.OPEN_LIBRARY_MAX_CONNECTIONS),
+            follow_redirects=True,
+        )
+        _open_library_clients[loop] = client
+    return client
+
+async def aopen_library_get(url, endpoint, **kwargs):
+    """
+    Async version of open_library_get, on the shared httpx client.
+
+    Args:
+        url: Open Library URL
+        endpoint: API label for the metrics (search, subjects, works, authors)
+        **kwargs: Passed on to httpx.AsyncClient.get
+
+    Returns:
+        httpx.Response
+    """
+    started = time.perf_counter()
+    try:
+        with measure('openlibrary'):
+            response = await open_library_client().get(url, **kwargs)
+    except httpx.HTTPError:
+        observe_open_library(endpoint, started, 'error')
+        raise
+    observe_open_library(endpoint, started, response.status_code)
+    return response
+
+def open_library_author_key(data):
+    """Get the key of the first author of an Open Library work record, if any."""
     authors = data.get('authors', [])
-    author_name = 'Unknown'
     if authors:
-        author_key = authors[0].get('author', {}).get('key')
-        if author_key:
-            author_resp = requests.get(f'https://openlibrary.org{author_key}.json')
-            if author_resp.ok:
-                author_name = author_resp.json().get('name', 'Unknown')
+        return authors[0].get('author', {}).get('key')
+    return None
+
+def open_library_book_defaults(data, author_name):
+    """
+    Build the Book field values for an Open Library work record.
+
+    Args:
+        data: Work record from /works/<olid>.json
+        author_name: Name of the work's first author
+
+    Returns:
+        Dictionary of Book field values
+    """
+    # Published date is not always available
     published_date = None
     if 'created' in data and 'value' in data['created']:
         try:
             published_date = data['created']['value'][:10]
         except Exception:
             published_date = None
-    isbn = f'OL{olid}'
     description = data.get('description', {}).get('value', '') if isinstance(data.get('description'), dict) else data.get('description', '')
+    return {
+        'title': data.get('title', 'No Title'),
+        'author': author_name,
+        'published_date': published_date or '2000-01-01',
+        'description': description,
+    }
+
+async def aimport_openlibrary_book(olid):
+    """
+    Fetch a work and its first author from Open Library by OLID and get or create its Book.
+
+    Args:
+        olid: Open Library work id, e.g. OL45883W
+
+    Returns:
+        Book instance, or None when Open Library does not know the work
+    """
+    resp = await aopen_library_get(f'{settings.OPEN_LIBRARY_URL}/works/{olid}.json', 'works')
+    if not resp.is_success:
+        return None
+    data = resp.json()
+    author_name = 'Unknown'
+    author_key = open_library_author_key(data)
+    if author_key:
+        author_resp = await aopen_library_get(f'{settings.OPEN_LIBRARY_URL}{author_key}.json', 'authors')
+        if author_resp.is_success:
+            author_name = author_resp.json().get('name', 'Unknown')
+    book, created = await Book.objects.aget_or_create(
+        isbn=f'OL{olid}', defaults=open_library_book_defaults(data, author_name)
+    )
+    return book
+
+def import_openlibrary_book(olid):
+    """
+    Fetch a work and its first author from Open Library by OLID and get or create its Book.
+
+    Sync version of aimport_openlibrary_book for the admin and notification views.
+    It uses the blocking open_library_get, so no event loop or async client is
+    created per call.
+
+    Args:
+        olid: Open Library work id, e.g. OL45883W
+
+    Returns:
+        Book instance, or None when Open Library does not know the work
+    """
+    resp = open_library_get(f'{settings.OPEN_LIBRARY_URL}/works/{olid}.json', 'works')
+    if not resp.ok:
+        return None
+    data = resp.json()
+    author_name = 'Unknown'
+    author_key = open_library_author_key(data)
+    if author_key:
+        author_resp = open_library_get(f'{settings.OPEN_LIBRARY_URL}{author_key}.json', 'authors')
+        if author_resp.ok:
+            author_name = author_resp.json().get('name', 'Unknown')
     book, created = Book.objects.get_or_create(
-        isbn=isbn,
-        defaults={
-            'title': title,
-            'author': author_name,
-            'published_date': published_date or '2000-01-01',
-            'description': description,
-        }
+        isbn=f'OL{olid}', defaults=open_library_book_defaults(data, author_name)
     )
     return book
 
@@ -101,13 +229,14 @@ def get_current_user(request):
 def home(request):
     """
     Display the main homepage with all books in the catalog, with search, filter, and tag filter options.
-    Now supports filtering by search query (title, author, ISBN), read status, and tag.
+    Now supports filtering by search query (title, author, ISBN), read status, tag and author.
     
     This view shows the primary interface where users can see all their books
     in a table format. It includes action buttons for adding books and filtering
     by read/unread status. The view also displays a personalized welcome message
     for logged-in users and tracks book views for statistics.
-    Users must be logged in to access this page.
+    Users must be logged in to access this page. Unchanged pages are answered
+    with 304 Not Modified, in which case no view counts are incremented.
     
     Args:
         request: Django HttpRequest object
@@ -126,6 +255,7 @@ def home(request):
     search_query = request.GET.get('search', '').strip()
     read_status = request.GET.get('read_status', '')
     tag_id = request.GET.get('tag', '')
+    author_id = request.GET.get('author', '')
     
     books = Book.objects.all()
     if search_query:
@@ -142,13 +272,33 @@ def home(request):
         books = books.filter(is_read=False)
     if tag_id:
         books = books.filter(tags__id=tag_id)
+    if author_id.isdigit():
+        books = books.filter(author_ref_id=author_id)
+    
+    # Skip revalidation while flash messages are pending, they are part of the page.
+    # The page does not show view counts, so they are left out of the validators.
+    etag = last_modified = None
+    if not len(messages.get_messages(request)):
+        tag_stats = Tag.objects.aggregate(total=Count('pk'), latest=Max('pk'))
+        unread_count = Notification.objects.filter(user=current_user, is_read=False).count()
+        etag, last_modified = collection_validators(
+            books,
+            current_user.pk,
+            request.get_full_path(),
+            tag_stats['total'],
+            tag_stats['latest'],
+            unread_count,
+        )
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
     
     # Track book views for statistics (increment view count for each book)
-    for book in books:
-        book.increment_view_count()
+    books = books.prefetch_related('tags')
+    Book.increment_view_counts(books)
     
     tags = Tag.objects.all()
-    return render(request, 'books/home.html', {
+    response = render(request, 'books/home.html', {
         'books': books,
         'current_user': current_user,
         'search_query': search_query,
@@ -156,6 +306,9 @@ def home(request):
         'tags': tags,
         'selected_tag': tag_id,
     })
+    if etag:
+        set_validators(response, etag, last_modified)
+    return response
 
 @csrf_exempt
 def add_book(request):
@@ -183,18 +336,13 @@ def add_book(request):
                 # Auto-generate ISBN if blank
                 if not book.isbn:
                     book.isbn = generate_js_isbn()
-                # Check for duplicate ISBN if provided
-                if book.isbn and Book.objects.filter(isbn=book.isbn).exists():
+                # Check for duplicate ISBN (any spelling) if provided
+                if book.isbn and Book.objects.filter(isbn_key=canonical_isbn(book.isbn)).exists():
                     form.add_error('isbn', 'A book with this ISBN already exists.')
                 else:
                     book.save()
                     messages.success(request, 'Book added successfully!')
-                    # --- Append confirmation to cookies.txt ---
-                    try:
-                        with open('cookies.txt', 'a') as f:
-                            f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook uploaded for user: {current_user.username if current_user else 'unknown'}\nTitle: {book.title}\nISBN: {book.isbn}\n---\n")
-                    except Exception as log_exc:
-                        pass
+                    log_book_activity('uploaded', current_user, book.title, book.isbn)
                     return redirect('home')
             except Exception as e:
                 form.add_error(None, f'An unexpected error occurred: {str(e)}')
@@ -226,8 +374,8 @@ def edit_book(request, pk):
         if form.is_valid():
             try:
                 updated_book = form.save(commit=False)
-                # Check for duplicate ISBN if changed
-                if updated_book.isbn and Book.objects.filter(isbn=updated_book.isbn).exclude(pk=book.pk).exists():
+                # Check for duplicate ISBN (any spelling) if changed
+                if updated_book.isbn and Book.objects.filter(isbn_key=canonical_isbn(updated_book.isbn)).exclude(pk=book.pk).exists():
                     form.add_error('isbn', 'A book with this ISBN already exists.')
                 else:
                     updated_book.save()
@@ -256,30 +404,21 @@ def delete_book_by_isbn(request, isbn):
                 book = Book.objects.get(title=title, author=author)
                 book.delete()
                 messages.success(request, f'Book "{title}" by {author} deleted (no valid ISBN).')
-                # --- Append confirmation to cookies.txt ---
-                try:
-                    with open('cookies.txt', 'a') as f:
-                        f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook deleted for user: {current_user.username if current_user else 'unknown'}\nTitle: {title}\nISBN: {getattr(book, 'isbn', 'unknown')}\n---\n")
-                except Exception as log_exc:
-                    pass
+                log_book_activity('deleted', current_user, title, getattr(book, 'isbn', 'unknown'))
             except Book.DoesNotExist:
                 messages.error(request, 'No book found with the given title and author.')
         else:
             messages.error(request, 'No book found: missing ISBN, title, or author.')
         return redirect('home')
-    try:
-        book = Book.objects.get(isbn=isbn)
+    # Match any spelling of the ISBN (hyphens, case, ISBN-10 vs ISBN-13)
+    book = Book.objects.filter(isbn_key=canonical_isbn(isbn)).order_by('pk').first()
+    if book is not None:
         title = book.title
         author = book.author
         book.delete()
         messages.success(request, f'Book with ISBN {isbn} deleted.')
-        # --- Append confirmation to cookies.txt ---
-        try:
-            with open('cookies.txt', 'a') as f:
-                f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook deleted for user: {current_user.username if current_user else 'unknown'}\nTitle: {title}\nISBN: {isbn}\n---\n")
-        except Exception as log_exc:
-            pass
-    except Book.DoesNotExist:
+        log_book_activity('deleted', current_user, title, isbn)
+    else:
         # Try by title and author if provided
         title = request.GET.get('title') or request.POST.get('title')
         author = request.GET.get('author') or request.POST.get('author')
@@ -288,12 +427,7 @@ def delete_book_by_isbn(request, isbn):
                 book = Book.objects.get(title=title, author=author)
                 book.delete()
                 messages.success(request, f'Book "{title}" by {author} deleted (no valid ISBN).')
-                # --- Append confirmation to cookies.txt ---
-                try:
-                    with open('cookies.txt', 'a') as f:
-                        f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook deleted for user: {current_user.username if current_user else 'unknown'}\nTitle: {title}\nISBN: {getattr(book, 'isbn', 'unknown')}\n---\n")
-                except Exception as log_exc:
-                    pass
+                log_book_activity('deleted', current_user, title, getattr(book, 'isbn', 'unknown'))
             except Book.DoesNotExist:
                 messages.error(request, 'No book found with the given ISBN, title, and author.')
         else:
@@ -354,17 +488,15 @@ def unread_books(request):
     books = Book.objects.filter(is_read=False)
     return render(request, 'books/unread_books.html', {'books': books, 'current_user': current_user})
 
-import requests
-from django.shortcuts import render
-
-@csrf_exempt
-def open_library_search(request):
+async def open_library_search(request):
     """
     Search and browse books from the Open Library API.
     
     This view integrates with the Open Library API to search for books and
     display results. Users can search by title/author or browse popular books.
     The view handles both search queries and default browsing functionality.
+    It is async: while Open Library answers, an ASGI worker serves other
+    requests, and the session lookup and rendering run through sync_to_async.
     
     Args:
         request: Django HttpRequest object with optional 'query' parameter
@@ -372,13 +504,13 @@ def open_library_search(request):
     Returns:
         Rendered open_library.html template with search results
     """
-    current_user = get_current_user(request)
+    current_user = await sync_to_async(get_current_user)(request)
     query = request.GET.get('query', '')
     results = []
 
     if query:
         # If user searched, use the search endpoint
-        response = requests.get('https://openlibrary.org/search.json', params={'q': query})
+        response = await aopen_library_get(f'{settings.OPEN_LIBRARY_URL}/search.json', 'search', params={'q': query})
         if response.status_code == 200:
             data = response.json()
             docs = data.get('docs', [])[:30]
@@ -393,7 +525,7 @@ def open_library_search(request):
     else:
         # Default list: use a subject and sort alphabetically
         subject = 'fiction'  
-        response = requests.get(f'https://openlibrary.org/subjects/{subject}.json?limit=30')
+        response = await aopen_library_get(f'{settings.OPEN_LIBRARY_URL}/subjects/{subject}.json?limit=30', 'subjects')
         if response.status_code == 200:
             data = response.json()
             works = sorted(data.get('works', []), key=lambda x: x.get('title', '').lower())
@@ -406,12 +538,15 @@ def open_library_search(request):
                     'cover_url': f"https://covers.openlibrary.org/b/id/{book['cover_id']}-L.jpg" if book.get('cover_id') else '',
                 })
 
-    return render(request, 'books/open_library.html', {
+    return await sync_to_async(render)(request, 'books/open_library.html', {
         'results': results,
         'query': query,
         'current_user': current_user
     })
 
+# csrf_exempt() only wraps sync views before Django 5.0, so async views are marked directly
+open_library_search.csrf_exempt = True
+
 def toggle_read(request, book_id):
     """
     Toggle the read status of a book (alternative implementation).
@@ -432,8 +567,7 @@ def toggle_read(request, book_id):
     book.save()
     return redirect('home')
 
-@csrf_exempt
-def save_open_library_book(request):
+async def save_open_library_book(request):
     """
     Save a book from Open Library search results to the local catalog.
     
@@ -447,7 +581,7 @@ def save_open_library_book(request):
     Returns:
         Redirect to home page after saving
     """
-    current_user = get_current_user(request)
+    current_user = await sync_to_async(get_current_user)(request)
     if request.method == "POST":
         title = request.POST.get("title")
         author = request.POST.get("author")
@@ -465,42 +599,57 @@ def save_open_library_book(request):
 
         # Auto-generate unique ISBN if not provided or invalid
         if not isbn or isbn.lower().startswith("js"):
-            from .models import Book
-            existing_isbns = Book.objects.values_list("isbn", flat=True)
-            while True:
-                new_isbn = f"JS{random.randint(1000000, 9999999)}"
-                if new_isbn not in existing_isbns:
-                    isbn = new_isbn
-                    break
-
-        Book.objects.create(
+            isbn = await sync_to_async(generate_js_isbn)()
+        elif await Book.objects.filter(isbn_key=canonical_isbn(isbn)).aexists():
+            messages.info(request, f'A book with ISBN {isbn} is already in the catalog.')
+            return redirect("home")
+
+        await Book.objects.acreate(
             title=title,
             author=author,
             published_date=published_date,
             isbn=isbn,
             description=request.POST.get("description", ""),  # optional
         )
-        # --- Append confirmation to cookies.txt ---
-        try:
-            with open('cookies.txt', 'a') as f:
-                f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook imported from Open Library for user: {current_user.username if current_user else 'unknown'}\nTitle: {title}\nISBN: {isbn if isbn else 'auto-generated'}\n---\n")
-        except Exception as log_exc:
-            pass
+        await sync_to_async(log_open_library_import)(current_user, title, isbn)
         return redirect("home")
 
-def generate_js_isbn():
+save_open_library_book.csrf_exempt = True
+
+def log_book_activity(action, user, title, isbn):
     """
-    Generate a unique ISBN with 'JS' prefix for books without ISBNs.
-    
-    This function creates sequential ISBN numbers starting with 'JS' followed
-    by a 5-digit number. It's used for books that don't have official ISBNs
-    to ensure each book has a unique identifier.
-    
+    Append a record of a book being uploaded, deleted or imported to the BOOK_ACTIVITY_LOG file.
+    """
+    try:
+        os.makedirs(os.path.dirname(settings.BOOK_ACTIVITY_LOG) or '.', exist_ok=True)
+        with open(settings.BOOK_ACTIVITY_LOG, 'a') as f:
+            f.write(f"\n---\n{datetime.now().strftime('%d %b %Y %H:%M:%S')}\nBook {action} for user: {user.username if user else 'unknown'}\nTitle: {title}\nISBN: {isbn}\n---\n")
+    except Exception as log_exc:
+        pass
+
+def log_open_library_import(user, title, isbn):
+    """
+    Record an Open Library import in the book activity log.
+    """
+    log_book_activity('imported from Open Library', user, title, isbn if isbn else 'auto-generated')
+
+def render_hashing_busy(request, template, form, current_user):
+    """
+    Re-render a login, registration or password form refused by the saturated password hashing pool.
+
+    Args:
+        request: Django HttpRequest object
+        template: Template of the form page
+        form: Bound form, given a non-field error
+        current_user: Logged-in user or None
+
     Returns:
-        String containing the generated ISBN
+        The form page with status 503 and a Retry-After header
     """
-    count = Book.objects.count() + 1
-    return f"JS{count:05d}"  # e.g. JS00001
+    form.add_error(None, BUSY_MESSAGE)
+    response = render(request, template, {'form': form, 'current_user': current_user}, status=503)
+    response['Retry-After'] = str(RETRY_AFTER)
+    return response
 
 def register_user(request):
     """
@@ -520,7 +669,12 @@ def register_user(request):
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
+            user = form.save(commit=False)
+            try:
+                user.set_password(form.cleaned_data['password'])
+            except PasswordHashingBusy:
+                return render_hashing_busy(request, 'books/register_user.html', form, current_user)
+            user.save()
             # Store user ID in session
             request.session['user_id'] = user.id
             return redirect('home')
@@ -565,7 +719,11 @@ def login_user(request):
             try:
                 user = User.objects.get(username=username)
                 print(f"DEBUG: User found: {user.username}")
-                if check_password(password, user.password):
+                try:
+                    valid = check_password(password, user.password)
+                except PasswordHashingBusy:
+                    return render_hashing_busy(request, 'books/login.html', form, current_user)
+                if valid:
                     print(f"DEBUG: Password correct for {user.username}")
                     request.session['user_id'] = user.id
                     if user.username == 'admin':
@@ -735,12 +893,15 @@ def change_password(request):
     
     if request.method == 'POST':
         form = PasswordChangeForm(current_user, request.POST)
-        if form.is_valid():
-            user = User.objects.get(id=current_user.id)
-            user.password = make_password(form.cleaned_data['new_password'])
-            user.save()
-            messages.success(request, 'Your password has been changed successfully.')
-            return redirect('home')
+        try:
+            if form.is_valid():
+                user = User.objects.get(id=current_user.id)
+                user.password = make_password(form.cleaned_data['new_password'])
+                user.save()
+                messages.success(request, 'Your password has been changed successfully.')
+                return redirect('home')
+        except PasswordHashingBusy:
+            return render_hashing_busy(request, 'books/change_password.html', form, current_user)
     else:
         form = PasswordChangeForm(current_user)
     
@@ -877,6 +1038,7 @@ def send_notification(request, user_id=None):
             
             # Create notifications for each user
             notifications_created = 0
+            recipient_ids = []
             for user in users_to_notify:
                 notification = Notification.objects.create(
                     user=user,
@@ -886,22 +1048,7 @@ def send_notification(request, user_id=None):
                     book_recommendation=notification_data.get('book_recommendation')
                 )
                 notifications_created += 1
-                
-                # Save book to user's reading list if requested
-                if notification_data.get('save_book_to_list') and notification_data.get('book_recommendation'):
-                    book = notification_data['book_recommendation']
-                    # Check if user already has this book
-                    if not Book.objects.filter(title=book.title, author=book.author, added_by=user).exists():
-                        # Create a copy of the book for the user
-                        new_book = Book.objects.create(
-                            title=book.title,
-                            author=book.author,
-                            description=book.description,
-                            published_date=book.published_date,
-                            isbn=book.isbn,
-                            is_read=False,  # Start as unread
-                            added_by=user
-                        )
+                recipient_ids.append(user.pk)
                 
                 # TODO: Send email notification if requested
                 if send_email:
@@ -909,6 +1056,11 @@ def send_notification(request, user_id=None):
                     # Include book details and additional content in email
                     pass
             
+            # Save the recommended book to the recipients' libraries if requested:
+            # one shared book referenced by library entries, not a copy per user
+            if notification_data.get('save_book_to_list') and notification_data.get('book_recommendation'):
+                LibraryEntry.add_for_users(notification_data['book_recommendation'], recipient_ids)
+            
             messages.success(request, f'Notification sent to {notifications_created} user(s) successfully.')
             return redirect('admin_dashboard')
     else:
@@ -971,6 +1123,7 @@ def send_bulk_notification(request):
             
             # Create notifications for each user
             notifications_created = 0
+            recipient_ids = []
             for user in users_to_notify:
                 notification = Notification.objects.create(
                     user=user,
@@ -980,22 +1133,7 @@ def send_bulk_notification(request):
                     book_recommendation=notification_data.get('book_recommendation')
                 )
                 notifications_created += 1
-                
-                # Save book to user's reading list if requested
-                if notification_data.get('save_book_to_list') and notification_data.get('book_recommendation'):
-                    book = notification_data['book_recommendation']
-                    # Check if user already has this book
-                    if not Book.objects.filter(title=book.title, author=book.author, added_by=user).exists():
-                        # Create a copy of the book for the user
-                        new_book = Book.objects.create(
-                            title=book.title,
-                            author=book.author,
-                            description=book.description,
-                            published_date=book.published_date,
-                            isbn=book.isbn,
-                            is_read=False,  # Start as unread
-                            added_by=user
-                        )
+                recipient_ids.append(user.pk)
                 
                 # TODO: Send email notification if requested
                 if send_email:
@@ -1003,6 +1141,11 @@ def send_bulk_notification(request):
                     # Include book details and additional content in email
                     pass
             
+            # Save the recommended book to the recipients' libraries if requested:
+            # one shared book referenced by library entries, not a copy per user
+            if notification_data.get('save_book_to_list') and notification_data.get('book_recommendation'):
+                LibraryEntry.add_for_users(notification_data['book_recommendation'], recipient_ids)
+            
             messages.success(request, f'Bulk notification sent to {notifications_created} user(s) successfully.')
             return redirect('admin_dashboard')
     else:
@@ -1036,7 +1179,7 @@ def view_notifications(request):
     
     print(f"DEBUG: User authenticated: {current_user.username}")
     
-    notifications = Notification.objects.filter(user=current_user).order_by('-created_at')
+    notifications = Notification.objects.filter(user=current_user).select_related('book_recommendation').order_by('-created_at')
     unread_count = notifications.filter(is_read=False).count()
     
     print(f"DEBUG: Found {notifications.count()} notifications, {unread_count} unread")
@@ -1093,9 +1236,10 @@ def mark_all_notifications_read(request):
         messages.error(request, 'You must be logged in to mark notifications as read.')
         return redirect('login_user')
     
-    unread_notifications = Notification.objects.filter(user=current_user, is_read=False)
-    count = unread_notifications.count()
-    unread_notifications.update(is_read=True)
+    unread_ids = list(Notification.objects.filter(user=current_user, is_read=False).values_list('id', flat=True))
+    count = len(unread_ids)
+    Notification.objects.filter(id__in=unread_ids).update(is_read=True, updated_at=timezone.now())
+    ChangeLog.record_changes(('notification', pk, current_user.id, 'update') for pk in unread_ids)
     
     messages.success(request, f'{count} notification(s) marked as read.')
     return redirect('view_notifications')
@@ -1165,40 +1309,8 @@ def edit_admin_referral(request, user_id):
         admin_referral_val = request.POST.get('admin_referral', '')
         if admin_referral_val.startswith('ol:'):
             olid = admin_referral_val[3:]
-            # Fetch from Open Library
-            ol_url = f'https://openlibrary.org/works/{olid}.json'
-            resp = requests.get(ol_url)
-            if resp.ok:
-                data = resp.json()
-                title = data.get('title', 'No Title')
-                authors = data.get('authors', [])
-                author_name = 'Unknown'
-                if authors:
-                    # Fetch author name from author key
-                    author_key = authors[0].get('author', {}).get('key')
-                    if author_key:
-                        author_resp = requests.get(f'https://openlibrary.org{author_key}.json')
-                        if author_resp.ok:
-                            author_name = author_resp.json().get('name', 'Unknown')
-                # Published date is not always available
-                published_date = None
-                if 'created' in data and 'value' in data['created']:
-                    try:
-                        published_date = data['created']['value'][:10]
-                    except Exception:
-                        published_date = None
-                # Generate a unique ISBN for Open Library imports
-                isbn = f'OL{olid}'
-                # Check if already imported
-                book, created = Book.objects.get_or_create(
-                    isbn=isbn,
-                    defaults={
-                        'title': title,
-                        'author': author_name,
-                        'published_date': published_date or '2000-01-01',
-                        'description': data.get('description', {}).get('value', '') if isinstance(data.get('description'), dict) else data.get('description', ''),
-                    }
-                )
+            book = import_openlibrary_book(olid)
+            if book is not None:
                 user.admin_referral = book
                 user.save()
                 messages.success(request, f"Admin referral set to imported Open Library book '{book.title}'.")
@@ -1224,7 +1336,7 @@ def edit_admin_referral(request, user_id):
 
 def admin_view_user_books(request, user_id):
     """
-    Admin-only view to display all books for a specific user.
+    Admin-only view to display all books in a specific user's library.
     """
     current_user = get_current_user(request)
     if not current_user or current_user.username != 'admin':
@@ -1232,14 +1344,60 @@ def admin_view_user_books(request, user_id):
         return redirect('login_user')
 
     user = get_object_or_404(User, id=user_id)
-    # Only show books for the current user (including admin)
-    books = Book.objects.filter(added_by=current_user)
+    # The user's library: books they added plus books saved to it through library entries
+    books = Book.in_library_of(user)
     return render(request, 'books/admin_view_user_books.html', {
         'target_user': user,
         'books': books,
         'current_user': current_user,
     })
 
+def admin_slow_queries(request):
+    """
+    Admin-only view of the slow query log: statements grouped by total time, then recent entries.
+    """
+    current_user = get_current_user(request)
+    if not current_user or current_user.username != 'admin':
+        messages.error(request, 'You must be admin to view the slow query log.')
+        return redirect('login_user')
+
+    entries = slow_queries.read_entries()
+    return render(request, 'books/admin_slow_queries.html', {
+        'entries': entries,
+        'statements': slow_queries.summarize(entries),
+        'threshold_ms': settings.SLOW_QUERY_MS,
+        'current_user': current_user,
+    })
+
+def admin_profiles(request):
+    """
+    Admin-only list of saved request profiles, with flame graph downloads.
+    """
+    current_user = get_current_user(request)
+    if not current_user or current_user.username != 'admin':
+        messages.error(request, 'You must be admin to view request profiles.')
+        return redirect('login_user')
+
+    return render(request, 'books/admin_profiles.html', {
+        'profiles': profiling.list_profiles(),
+        'sample_every': settings.PROFILE_SAMPLE_EVERY,
+        'current_user': current_user,
+    })
+
+def admin_profile_download(request, profile_id, fmt):
+    """
+    Admin-only download of a saved request profile as collapsed stacks or speedscope JSON.
+    """
+    current_user = get_current_user(request)
+    if not current_user or current_user.username != 'admin':
+        messages.error(request, 'You must be admin to download request profiles.')
+        return redirect('login_user')
+
+    path = profiling.profile_path(profile_id, fmt)
+    if path is None or not os.path.exists(path):
+        raise Http404('Profile not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
+
 @csrf_exempt
 def admin_set_referral(request, user_id):
     """
@@ -0,0 +1,25 @@
+"""
+Gunicorn settings for the Book Catalog application.
+
+gunicorn loads this file automatically from the working directory. When
+PROMETHEUS_MULTIPROC_DIR is set, each worker writes its metrics to files in
+that directory (see books/metrics.py); the hooks below clear files left by
+a previous run and stop counting the live gauges of workers that exit.
+"""
+
+import os
+
+
+def on_starting(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.endswith('.db'):
+                os.remove(os.path.join(path, name))
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
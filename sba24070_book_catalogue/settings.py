@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+from importlib.util import find_spec
 import os
 import sys
 
@@ -56,6 +57,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'books.health.HealthCheckMiddleware',  # answers /healthz and /readyz before anything else runs
+    'books.metrics.MetricsMiddleware',  # its timings cover the whole stack below the probes
+    'books.timing.ServerTimingMiddleware',  # SQL/template/serialize/Open Library breakdown
+    'books.slow_queries.SlowQueryMiddleware',  # logs queries over SLOW_QUERY_MS
+    'books.memory.MemoryDiagnosticsMiddleware',  # tracemalloc peak per request with MEMORY_DIAGNOSTICS
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,13 +69,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'books.profiling.ProfilingMiddleware',  # last, so profiles cover the view; ?__profile=1 for the admin
 ]
 
 ROOT_URLCONF = 'sba24070_book_catalogue.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, with rendering time reported to books.timing
+        'BACKEND': 'books.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -85,6 +93,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sba24070_book_catalogue.wsgi.application'
+ASGI_APPLICATION = 'sba24070_book_catalogue.asgi.application'
 
 
 # Database
@@ -171,6 +180,106 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Fast API serialization: orjson replaces the stdlib JSON renderer/parser and
+# MessagePack is offered to clients that ask for it. Each is only enabled when
+# its package is installed; set API_FAST_JSON / API_MSGPACK to 'False' to opt out.
+API_FAST_JSON = os.getenv('API_FAST_JSON', 'True') == 'True' and find_spec('orjson') is not None
+API_MSGPACK = os.getenv('API_MSGPACK', 'True') == 'True' and find_spec('msgpack') is not None
+
+if API_FAST_JSON:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = 'books.renderers.ORJSONRenderer'
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = 'books.renderers.ORJSONParser'
+if API_MSGPACK:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'books.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].insert(1, 'books.renderers.MessagePackParser')
+
+# Maximum number of ids/ISBNs accepted by one /api/books/?ids=...&isbns=... multi-get
+BOOK_MULTI_GET_LIMIT = int(os.getenv('BOOK_MULTI_GET_LIMIT', '200'))
+
+# Change feed (/api/sync/): ChangeLog ids are allocated at INSERT, not COMMIT, so sync tokens stay
+# on changes older than CHANGELOG_SETTLE_SECONDS (longer than any transaction writing the feed) and
+# newer ones are sent again on the next sync. prune_changelog deletes changes older than
+# CHANGELOG_RETENTION_DAYS; clients holding an older token are told to reload their library.
+CHANGELOG_SETTLE_SECONDS = float(os.getenv('CHANGELOG_SETTLE_SECONDS', '30'))
+CHANGELOG_RETENTION_DAYS = int(os.getenv('CHANGELOG_RETENTION_DAYS', '90'))
+
+# Bearer token required to scrape /metrics; leave empty when only the cluster can reach it.
+# Set PROMETHEUS_MULTIPROC_DIR in the environment to aggregate metrics across gunicorn workers.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Per-request timing breakdown (books/timing.py): SERVER_TIMING adds a Server-Timing header
+# to the admin's responses, SERVER_TIMING_LOG logs one JSON line per request.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+SERVER_TIMING_LOG = os.getenv('SERVER_TIMING_LOG', 'False') == 'True'
+
+# Book upload/delete/import activity log (books/views.py), kept out of the source tree under var/.
+BOOK_ACTIVITY_LOG = os.getenv('BOOK_ACTIVITY_LOG', str(BASE_DIR / 'var' / 'book_activity.log'))
+
+# Slow query log (books/slow_queries.py): queries over SLOW_QUERY_MS (0 = off) go to a rotating
+# JSON-lines file; on PostgreSQL a SLOW_QUERY_EXPLAIN_RATE sample of slow SELECTs gets EXPLAIN ANALYZE.
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', '0.01'))
+SLOW_QUERY_LOG_PATH = os.getenv('SLOW_QUERY_LOG_PATH', str(BASE_DIR / 'var' / 'slow_queries.log'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', '3'))
+
+# Request profiling (books/profiling.py): the admin profiles any request with ?__profile=1, and
+# 1 in PROFILE_SAMPLE_EVERY requests (0 = off) is profiled; flame graphs are saved to PROFILE_DIR.
+PROFILE_SAMPLE_EVERY = int(os.getenv('PROFILE_SAMPLE_EVERY', '0'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '1'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', str(BASE_DIR / 'var' / 'profiles'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '200'))
+
+# Memory diagnostics (books/memory.py): traces every request with tracemalloc and logs its peak
+# memory and top allocation sites to books.memory. Slows requests severalfold; diagnosis only.
+MEMORY_DIAGNOSTICS = os.getenv('MEMORY_DIAGNOSTICS', 'False') == 'True'
+MEMORY_DIAGNOSTICS_FRAMES = int(os.getenv('MEMORY_DIAGNOSTICS_FRAMES', '10'))
+
+# Kubernetes probes (books/health.py): /readyz fails when its database, migration and
+# (with HEALTH_CHECK_CACHE) cache checks take longer than HEALTH_CHECK_TIMEOUT seconds.
+HEALTH_CHECK_TIMEOUT = float(os.getenv('HEALTH_CHECK_TIMEOUT', '2'))
+HEALTH_CHECK_CACHE = os.getenv('HEALTH_CHECK_CACHE', 'False') == 'True'
+
+# Open Library API: the async search and import views share one pooled httpx client per
+# worker, holding up to OPEN_LIBRARY_MAX_CONNECTIONS upstream requests open at a time.
+OPEN_LIBRARY_URL = os.getenv('OPEN_LIBRARY_URL', 'https://openlibrary.org')
+OPEN_LIBRARY_TIMEOUT = float(os.getenv('OPEN_LIBRARY_TIMEOUT', '10'))
+OPEN_LIBRARY_MAX_CONNECTIONS = int(os.getenv('OPEN_LIBRARY_MAX_CONNECTIONS', '200'))
+
+# Password hashing (books/passwords.py): each worker process hashes at most PASSWORD_HASH_WORKERS
+# passwords at once (0 = on the request thread) in a "thread" or "process" pool; logins beyond
+# PASSWORD_HASH_QUEUE more waiting are refused with 503 and Retry-After.
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '16'))
+PASSWORD_HASH_EXECUTOR = os.getenv('PASSWORD_HASH_EXECUTOR', 'thread')
+
+# Bulk user import (books/user_import.py): the import_users command hashes passwords across
+# USER_IMPORT_WORKERS processes (default: one per CPU). POST /api/users/import/ hashes them one at
+# a time in the password hashing pool above, so it takes at most USER_IMPORT_API_MAX_ROWS users.
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', str(os.cpu_count() or 1)))
+USER_IMPORT_API_MAX_ROWS = int(os.getenv('USER_IMPORT_API_MAX_ROWS', '100'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'books.timing': {'handlers': ['timing'], 'level': 'INFO', 'propagate': False},
+        'books.memory': {'handlers': ['timing'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Bloom filter of canonical ISBNs consulted by bulk importers before the database
+# (see books/isbn_filter.py). Rebuilt automatically when missing or saturated.
+ISBN_FILTER_PATH = os.getenv('ISBN_FILTER_PATH', str(BASE_DIR / 'var' / 'isbn_filter.bin'))
+ISBN_FILTER_ERROR_RATE = float(os.getenv('ISBN_FILTER_ERROR_RATE', '0.01'))
+ISBN_FILTER_MIN_CAPACITY = int(os.getenv('ISBN_FILTER_MIN_CAPACITY', '1000000'))
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587